@@ -1,117 +1,102 @@
 # ./app.py
 
-from flask import Flask, render_template, session, redirect, url_for
+import click
+from bson import ObjectId
+from flask import Flask, current_app, render_template, session
+from flask.cli import with_appcontext
 from flask_wtf.csrf import CSRFProtect
-import logging
-from logging.handlers import RotatingFileHandler
-import os
-from datetime import datetime
 from config import Config
+from models import db
+from models.game import life_reaper, life_transfer, story_archive, story_pipeline
+from models.game.story import Story
+from models.session import Session
+from models.user import User
+from monitoring import logging_setup, metrics, request_timing
+from routes.auth_decorator import get_db_session
 from routes.auth_routes import auth_bp
 from routes.user_routes import user_bp
 from routes.game_routes import game_bp
-from models.session import Session
-
-# Initialize Flask app
-app = Flask(__name__)
-app.config.from_object(Config)
-
-# Initialize CSRF protection
-csrf = CSRFProtect(app)
-
-# Set up logging
-if not os.path.exists('logs'):
-    os.mkdir('logs')
-
-# Configure logging at the root logger level
-logging.basicConfig(
-    level=logging.INFO,
-    format=Config.LOG_FORMAT,
-    datefmt=Config.LOG_DATE_FORMAT,
-    handlers=[
-        # File handler with rotation
-        RotatingFileHandler(
-            Config.LOG_FILE,
-            maxBytes=10240000,  # 10MB
-            backupCount=10
-        ),
-        # Console handler
-        logging.StreamHandler()
-    ]
-)
-
-# Get the root logger
-logger = logging.getLogger()
-
-# Set the level for all loggers
-logger.setLevel(logging.INFO)
-
-# Make sure all handlers have the right formatter
-formatter = logging.Formatter(
-    fmt=Config.LOG_FORMAT,
-    datefmt=Config.LOG_DATE_FORMAT
-)
-
-for handler in logger.handlers:
-    handler.setFormatter(formatter)
-
-app.logger.info('LifeByMe startup')
-
-# Register blueprints
-app.register_blueprint(auth_bp)
-app.register_blueprint(user_bp)
-app.register_blueprint(game_bp)
-
-@app.before_request
-def check_session():
-    """Check if session is valid before each request"""
-    if 'session_id' in session:
-        db_session = Session.get_by_session_id(session['session_id'])
-        if not db_session:
-            session.clear()
-
-@app.context_processor
-def utility_processor():
-    """Make certain functions available to all templates"""
-    def format_datetime(dt):
-        if dt:
-            return dt.strftime('%Y-%m-%d %H:%M:%S')
-        return ''
-    
-    return dict(
-        format_datetime=format_datetime
-    )
-
-@app.route('/')
-def index():
-    """Home page route"""
-    return render_template('index.html')
-
-# Error handlers
-@app.errorhandler(404)
-def not_found_error(error):
-    return render_template('index.html', 
-                         errors=['The requested page was not found']), 404
-
-@app.errorhandler(500)
-def internal_error(error):
-    app.logger.error(f'Server Error: {str(error)}')
-    return render_template('index.html',
-                         errors=['An unexpected error has occurred']), 500
-
-def init_app(app):
-    """Initialize the app with any first-time setup"""
-    try:
-        Session.cleanup_expired_sessions()
-        app.logger.info('Cleaned up expired sessions')
-    except Exception as e:
-        app.logger.error(f'Error cleaning up sessions: {str(e)}')
 
+csrf = CSRFProtect()
+
+def create_app(config_class=Config) -> Flask:
+    """Build the Flask app. Nothing here touches MongoDB or OpenAI; both connect on first use."""
+    app = Flask(__name__)
+    app.config.from_object(config_class)
+
+    # Set up logging (file and console I/O happen on a background thread)
+    logging_setup.configure_logging()
+
+    # Must run before the first query creates the shared Mongo client
+    request_timing.install_mongo_listener()
+    if Config.METRICS_ENABLED:
+        metrics.install_mongo_listener()
+
+    # Initialize CSRF protection
+    csrf.init_app(app)
+
+    # Per-request DB/LLM/template timing
+    request_timing.init_app(app)
+
+    # Prometheus metrics
+    if Config.METRICS_ENABLED:
+        metrics.init_app(app)
+
+    # Register blueprints
+    app.register_blueprint(auth_bp)
+    app.register_blueprint(user_bp)
+    app.register_blueprint(game_bp)
+
+    @app.before_request
+    def check_session():
+        """Check if session is valid before each request"""
+        if 'session_id' in session:
+            db_session = get_db_session()
+            if not db_session:
+                session.clear()
+
+    @app.context_processor
+    def utility_processor():
+        """Make certain functions available to all templates"""
+        def format_datetime(dt):
+            if dt:
+                return dt.strftime('%Y-%m-%d %H:%M:%S')
+            return ''
+
+        return dict(
+            format_datetime=format_datetime
+        )
+
+    @app.route('/')
+    def index():
+        """Home page route"""
+        return render_template('index.html')
+
+    # Error handlers
+    @app.errorhandler(404)
+    def not_found_error(error):
+        return render_template('index.html',
+                             errors=['The requested page was not found']), 404
+
+    @app.errorhandler(500)
+    def internal_error(error):
+        app.logger.error(f'Server Error: {str(error)}')
+        return render_template('index.html',
+                             errors=['An unexpected error has occurred']), 500
+
+    app.cli.add_command(init_db_command)
+    app.cli.add_command(archive_stories_command)
+    app.cli.add_command(export_life_command)
+    app.cli.add_command(import_life_command)
+
+    app.logger.info('LifeByMe startup')
+    return app
+
+def init_db(app: Flask) -> None:
+    """One-time database setup: check the connection, create indexes and migrate old data"""
     # Check if MongoDB is available
-    from pymongo import MongoClient
     try:
-        client = MongoClient(Config.MONGO_URI, serverSelectionTimeoutMS=5000)
-        client.server_info()
+        db.get_client().admin.command('ping')
         app.logger.info('Successfully connected to MongoDB')
     except Exception as e:
         app.logger.error(f'Failed to connect to MongoDB: {str(e)}')
@@ -119,30 +104,83 @@ def init_app(app):
 
     # Create indexes if they don't exist
     try:
-        client = MongoClient(Config.MONGO_URI)
-        db = client[Config.DB_NAME]
-        
-        # User indexes
-        db.users.create_index('username', unique=True)
-        
-        # Session indexes
-        db.sessions.create_index('session_id', unique=True)
-        db.sessions.create_index('user_id')
-        db.sessions.create_index('last_accessed')
-        
+        db.ensure_indexes()
         app.logger.info('Database indexes verified')
     except Exception as e:
         app.logger.error(f'Failed to create database indexes: {str(e)}')
         raise
 
+    # Sessions from before the expires_at TTL index
+    try:
+        count = Session.backfill_expires_at()
+        if count:
+            app.logger.info(f'Added expiry to {count} older sessions')
+    except Exception as e:
+        app.logger.error(f'Error migrating sessions: {str(e)}')
+
+    # Stories from before story_beats/story_prompts
+    try:
+        count = Story.migrate_inline_content()
+        if count:
+            app.logger.info(f'Moved the prompts and beats of {count} older stories')
+    except Exception as e:
+        app.logger.error(f'Error migrating stories: {str(e)}')
+
+@click.command('init-db')
+@with_appcontext
+def init_db_command():
+    """Create database indexes and migrate old data (run once per deploy)."""
+    init_db(current_app)
+    click.echo('Database initialized')
+
+@click.command('archive-stories')
+@with_appcontext
+def archive_stories_command():
+    """Archive old completed stories and remove old deleted ones now."""
+    story_archive.run_archive_pass()
+    click.echo('Stories archived')
+
+@click.command('export-life')
+@click.argument('life_id')
+@click.argument('path')
+@click.option('--format', 'fmt', type=click.Choice(['ndjson', 'bson']),
+              help='Defaults to bson for .bson/.bson.gz paths, otherwise ndjson.')
+@with_appcontext
+def export_life_command(life_id, path, fmt):
+    """Export a life and all its data to PATH (gzipped if it ends in .gz)."""
+    counts = life_transfer.export_life(ObjectId(life_id), path, fmt)
+    click.echo(f'Exported {sum(counts.values())} documents: {counts}')
+
+@click.command('import-life')
+@click.argument('path')
+@click.option('--format', 'fmt', type=click.Choice(['ndjson', 'bson']),
+              help='Defaults to bson for .bson/.bson.gz paths, otherwise ndjson.')
+@click.option('--user', 'username', help='Give the life to this user instead of its original owner.')
+@with_appcontext
+def import_life_command(path, fmt, username):
+    """Import a life exported by export-life, under new ids."""
+    user_id = None
+    if username:
+        user = User.get_by_username(username)
+        if not user:
+            raise click.ClickException(f'No user named {username}')
+        user_id = user._id
+    life_id = life_transfer.import_life(path, fmt, user_id)
+    click.echo(f'Imported life {life_id}')
+
 # Development server configuration
 if __name__ == '__main__':
-    # Initialize the app
-    init_app(app)
+    app = create_app()
+    init_db(app)
+    # Under gunicorn these start per worker in serve.post_fork
+    metrics.start_push_thread()
+    story_pipeline.start_queue_filler()
+    story_archive.start_archiver()
+    life_reaper.start_reaper()
 
     # Start development server
     app.run(
         host='0.0.0.0',
         port=5000,
         debug=Config.DEBUG
-    )
\ No newline at end of file
+    )
@@ -6,14 +6,33 @@ from datetime import timedelta
 class Config:
     # Flask settings
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev_secret_key_change_in_production')
-    DEBUG = True
+    DEBUG = os.getenv('DEBUG', '1') == '1'  # dev server only; serve.py always runs with debug off
+
+    # Production server (serve.py)
+    SERVER_BIND = os.getenv('SERVER_BIND', '0.0.0.0:8000')
+    SERVER_WORKERS = int(os.getenv('SERVER_WORKERS', str(min(4, (os.cpu_count() or 1) + 1))))
+    SERVER_WORKER_CLASS = os.getenv('SERVER_WORKER_CLASS', 'gthread')  # or 'gevent' (install gevent)
+    SERVER_THREADS = int(os.getenv('SERVER_THREADS', '16'))  # per worker, gthread only
+    SERVER_WORKER_CONNECTIONS = int(os.getenv('SERVER_WORKER_CONNECTIONS', '500'))  # per worker, gevent only
+    SERVER_TIMEOUT = int(os.getenv('SERVER_TIMEOUT', '180'))  # story requests wait on the LLM
+    SERVER_GRACEFUL_TIMEOUT = int(os.getenv('SERVER_GRACEFUL_TIMEOUT', '120'))  # time to drain LLM calls
+    SERVER_KEEPALIVE = 5  # seconds
 
     # MongoDB settings
     MONGO_URI = os.getenv('MONGO_URI', 'mongodb://localhost:27017/')
     DB_NAME = 'lifebyme'
+    MONGO_MAX_POOL_SIZE = int(os.getenv('MONGO_MAX_POOL_SIZE', '100'))  # per process
+    MONGO_MIN_POOL_SIZE = int(os.getenv('MONGO_MIN_POOL_SIZE', '0'))  # connections kept open when idle
 
     # Session settings
     SESSION_LIFETIME = timedelta(days=7)
+    SESSION_TOUCH_INTERVAL = timedelta(minutes=5)  # how often an active session's expiry is extended
+    # 'db': a sessions lookup per request. 'signed': user, current life and expiry live in a
+    # signed cookie; the DB is only read for revocations (logout, newer login elsewhere)
+    SESSION_BACKEND = os.getenv('SESSION_BACKEND', 'db')
+    # Comma-separated, oldest first. New tokens are signed with the last key; all are accepted.
+    SESSION_SIGNING_KEYS = [key for key in os.getenv('SESSION_SIGNING_KEYS', '').split(',') if key] or [SECRET_KEY]
+    SESSION_REVOCATION_REFRESH = 5  # seconds; how stale another worker's view of logouts can be
     
     # Password settings (minimal for development)
     MIN_PASSWORD_LENGTH = 1
@@ -22,8 +41,87 @@ class Config:
     LOG_FILE = 'logs/app.log'
     LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
     LOG_DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+    LOG_JSON = os.getenv('LOG_JSON', '1') == '1'  # one JSON object per line instead of LOG_FORMAT
+    LOG_QUEUE_SIZE = 10000  # records beyond this are dropped rather than blocking requests
+
+    # AI prompt/response logging (debug only, sampled and truncated)
+    AI_PAYLOAD_LOG_FILE = 'logs/ai_payloads.log'
+    AI_PAYLOAD_LOG_SAMPLE_RATE = float(os.getenv('AI_PAYLOAD_LOG_SAMPLE_RATE', '0'))  # 0 disables, 1 logs every call
+    AI_PAYLOAD_LOG_MAX_CHARS = int(os.getenv('AI_PAYLOAD_LOG_MAX_CHARS', '4000'))
+
+    # Request instrumentation
+    SLOW_REQUEST_MS = int(os.getenv('SLOW_REQUEST_MS', '1000'))  # log a breakdown above this
+    SERVER_TIMING_HEADER = os.getenv('SERVER_TIMING_HEADER', '0') == '1'
+
+    # Prometheus metrics (/metrics). For multi-process servers either set
+    # PROMETHEUS_MULTIPROC_DIR to a shared directory, or push to a Pushgateway.
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', '1') == '1'
+    METRICS_AUTH_TOKEN = os.getenv('METRICS_AUTH_TOKEN') or None  # /metrics requires 'Bearer <token>'; unset, it isn't served
+    METRICS_PUSHGATEWAY_URL = os.getenv('METRICS_PUSHGATEWAY_URL') or None
+    METRICS_PUSH_INTERVAL = 15  # seconds
+
+    # Per-process cache of Life objects
+    LIFE_CACHE_MAX_ENTRIES = int(os.getenv('LIFE_CACHE_MAX_ENTRIES', '1000'))
+    LIFE_CACHE_TTL = int(os.getenv('LIFE_CACHE_TTL', '300'))  # seconds
+    # How writes from other processes reach the cache: 'version' (compare a version stamp on
+    # each read), 'bus' (the invalidation bus below; with polling, reads can be stale for up to
+    # INVALIDATION_POLL_INTERVAL) or 'none' (only safe with a single process)
+    LIFE_CACHE_SYNC = os.getenv('LIFE_CACHE_SYNC', 'version')
+
+    # Cross-process cache invalidation (models/invalidation.py): 'auto' (change streams if the
+    # server supports them, else polling updated_at), 'change_stream', 'poll' or 'none'
+    INVALIDATION_BACKEND = os.getenv('INVALIDATION_BACKEND', 'auto')
+    INVALIDATION_POLL_INTERVAL = float(os.getenv('INVALIDATION_POLL_INTERVAL', '2'))  # seconds
+
+    # Threads per process for the parallel initial cast requests of new lives
+    CAST_GENERATION_THREADS = int(os.getenv('CAST_GENERATION_THREADS', '8'))
+
+    # Threads per process for the parallel reads behind /game/state
+    STATE_READ_THREADS = int(os.getenv('STATE_READ_THREADS', '8'))
+
+    # Background jobs (models/jobs.py): new life setup and next-story prewarming
+    JOB_WORKERS = int(os.getenv('JOB_WORKERS', '4'))  # per process
+    LIFE_SETUP_TIMEOUT = int(os.getenv('LIFE_SETUP_TIMEOUT', '300'))  # seconds without progress before a setup can be retried
+    PREWARM_NEXT_STORY = os.getenv('PREWARM_NEXT_STORY', '1') == '1'  # generate the next story after each memory
+
+    # Queues of story openings generated ahead of time (see models/game/story_pipeline.py).
+    # Every memory changes the life state, so queued entries mostly serve replacements for
+    # deleted stories and lives whose post-memory prewarm didn't run.
+    PREPARED_STORY_QUEUE_SIZE = int(os.getenv('PREPARED_STORY_QUEUE_SIZE', '2'))  # per life; 0 disables
+    PREPARED_STORY_TTL = 7 * 24 * 3600  # seconds
+    PREPARED_STORY_FILL = os.getenv('PREPARED_STORY_FILL', '0') == '1'  # idle workers top up queues (costs LLM calls)
+    # Only fill during these UTC hours, e.g. '1-6'; unset fills whenever a worker is idle
+    PREPARED_STORY_FILL_HOURS = tuple(int(h) for h in os.getenv('PREPARED_STORY_FILL_HOURS').split('-')) \
+        if os.getenv('PREPARED_STORY_FILL_HOURS') else None
+    PREPARED_STORY_FILL_INTERVAL = 60  # seconds between filler passes
+    PREPARED_STORY_FILL_MAX_LLM_CALLS = 0  # a worker is idle when at most this many LLM calls are in flight
+    PREPARED_STORY_ACTIVE_HOURS = 24  # only fill lives played this recently
+    PREPARED_STORY_CLAIM_SECONDS = 300  # how long one worker may hold a life's queue while filling it
+
+    # Archival of old stories (see models/game/story_archive.py)
+    STORY_ARCHIVE_AFTER_DAYS = int(os.getenv('STORY_ARCHIVE_AFTER_DAYS', '7'))  # completed/deleted stories untouched this long
+    STORY_ARCHIVE_INTERVAL = int(os.getenv('STORY_ARCHIVE_INTERVAL', '3600'))  # seconds between passes; 0 disables
+
+    # Removal of deleted lives (see models/game/life_reaper.py)
+    LIFE_REAP_BATCH_SIZE = int(os.getenv('LIFE_REAP_BATCH_SIZE', '500'))  # documents per delete
+    LIFE_REAP_BATCH_PAUSE = float(os.getenv('LIFE_REAP_BATCH_PAUSE', '0.05'))  # seconds between deletes
+    LIFE_REAP_INTERVAL = int(os.getenv('LIFE_REAP_INTERVAL', '600'))  # seconds between sweeps for unfinished reaps; 0 disables
 
     # API Configuration
     API_TIMEOUT = 30  # seconds
+    # Point at any OpenAI-compatible server (e.g. scripts/llm_stub_server.py); unset uses OpenAI
+    OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL') or None
+    OPENAI_MAX_RETRIES = int(os.getenv('OPENAI_MAX_RETRIES', '2'))
+    OPENAI_STREAM = os.getenv('OPENAI_STREAM', '0') == '1'  # also records time-to-first-token
+    LLM_TELEMETRY_ENABLED = os.getenv('LLM_TELEMETRY_ENABLED', '1') == '1'
+    LLM_TELEMETRY_RETENTION = timedelta(days=30)
+
+    # AI response cache for replays, tests and benchmarks.
+    # Backend is one of 'memory', 'disk' or 'mongo'; unset disables caching.
+    AI_CACHE_BACKEND = os.getenv('AI_CACHE_BACKEND') or None
+    AI_CACHE_MAX_ENTRIES = int(os.getenv('AI_CACHE_MAX_ENTRIES', '1024'))
+    AI_CACHE_TTL = int(os.getenv('AI_CACHE_TTL', '86400'))  # seconds
+    AI_CACHE_DIR = os.getenv('AI_CACHE_DIR', 'cache/ai_responses')
 
     STORIES_PER_SEASON = 5
\ No newline at end of file
@@ -0,0 +1,130 @@
+# ./models/db.py
+"""
+Shared MongoDB client, created on first use.
+
+Models keep module-level collection handles (e.g. `lives = collection('lives')`),
+but nothing connects until a query runs, so importing models needs no database
+and every model shares one connection pool per process.
+"""
+
+import logging
+import threading
+from typing import Dict, List, Optional
+
+from pymongo import MongoClient, monitoring
+from pymongo.collection import Collection
+from pymongo.database import Database
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+_client: Optional[MongoClient] = None
+_collections: Dict[str, Collection] = {}
+_event_listeners: List[monitoring.CommandListener] = []
+_lock = threading.Lock()
+
+def add_event_listener(listener: monitoring.CommandListener) -> None:
+    """Attach a command listener to the shared client. Only one listener of each type is kept."""
+    if any(type(existing) is type(listener) for existing in _event_listeners):
+        return
+    if _client is not None:
+        logger.warning(f"{type(listener).__name__} added after the Mongo client was created; "
+                       f"it applies from the next reset_client()")
+    _event_listeners.append(listener)
+
+def get_client() -> MongoClient:
+    """Get the process-wide client, creating it on first use"""
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                _client = MongoClient(Config.MONGO_URI,
+                                      maxPoolSize=Config.MONGO_MAX_POOL_SIZE,
+                                      minPoolSize=Config.MONGO_MIN_POOL_SIZE,
+                                      event_listeners=list(_event_listeners))
+    return _client
+
+def get_db() -> Database:
+    return get_client()[Config.DB_NAME]
+
+def get_collection(name: str) -> Collection:
+    coll = _collections.get(name)
+    if coll is None:
+        coll = _collections[name] = get_db()[name]
+    return coll
+
+def reset_client() -> None:
+    """Drop the current client (e.g. in a forked worker); the next query creates a new one"""
+    global _client
+    with _lock:
+        if _client is not None:
+            _client.close()
+        _client = None
+        _collections.clear()
+
+class LazyCollection:
+    """Stands in for a pymongo Collection, resolving it on first use"""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __getattr__(self, attr: str):
+        return getattr(get_collection(self.name), attr)
+
+    def __repr__(self) -> str:
+        return f"LazyCollection({self.name!r})"
+
+def collection(name: str) -> LazyCollection:
+    return LazyCollection(name)
+
+def ensure_indexes() -> None:
+    """Create indexes if they don't exist"""
+    db = get_db()
+
+    # User indexes
+    db.users.create_index('username', unique=True)
+
+    # Session indexes
+    db.sessions.create_index('session_id', unique=True)
+    db.sessions.create_index('user_id')
+    db.sessions.create_index('expires_at', expireAfterSeconds=0)
+    db.session_revocations.create_index('expires_at', expireAfterSeconds=0)
+
+    # Polled by the cache invalidation bus when change streams are unavailable
+    from models.invalidation import WATCHED_COLLECTIONS
+    for name in WATCHED_COLLECTIONS:
+        db[name].create_index('updated_at')
+
+    # Story transcripts, stored apart from the stories themselves
+    db.story_beats.create_index([('story_id', 1), ('index', 1)], unique=True)
+    db.story_beats.create_index('life_id')
+
+    # Queues of story openings generated ahead of time
+    db.prepared_stories.create_index([('life_id', 1), ('fingerprint', 1), ('created_at', 1)])
+    db.prepared_stories.create_index('created_at', expireAfterSeconds=Config.PREPARED_STORY_TTL)
+    db.prepared_story_claims.create_index('expires_at', expireAfterSeconds=0)
+
+    # A life's data is read, exported and reaped by life_id
+    # (prepared_stories, story_beats and stories_archive have their own life_id indexes)
+    db.memories.create_index([('life_id', 1), ('created_at', 1)])  # memories are listed oldest first
+    db.characters.create_index('life_id')
+    db.stories.create_index([('life_id', 1), ('status', 1)])  # the current story is found by status
+
+    # Lives are listed per user; deleted lives are swept by the reaper
+    db.lives.create_index('user_id')
+    db.lives.create_index('deleted_at', sparse=True)
+
+    # Old stories are archived by status and age; unused prompts are found by prompt_id
+    db.stories.create_index([('status', 1), ('last_updated', 1)])
+    db.stories.create_index('prompt_id')
+    db.stories_archive.create_index('life_id')
+    db.job_leases.create_index('expires_at', expireAfterSeconds=0)
+
+    # LLM telemetry indexes
+    db.llm_calls.create_index('created_at',
+                              expireAfterSeconds=int(Config.LLM_TELEMETRY_RETENTION.total_seconds()))
+    db.llm_calls.create_index([('function', 1), ('created_at', -1)])
+
+    # AI response cache (only used with AI_CACHE_BACKEND=mongo)
+    db.ai_response_cache.create_index('created_at', expireAfterSeconds=Config.AI_CACHE_TTL)
@@ -4,15 +4,12 @@ from datetime import datetime
 from typing import Dict, List, Optional
 from bson import ObjectId
 from dataclasses import dataclass, field
-from pymongo import MongoClient
-from config import Config
+from models.db import collection
 from .enums import LifeStage
 from enum import Enum
 import json
 
-client = MongoClient(Config.MONGO_URI)
-db = client[Config.DB_NAME]
-characters = db.characters
+characters = collection('characters')
 
 class RelationshipStatus(Enum):
     ACTIVE = "Active"
@@ -87,10 +84,22 @@ class Character:
         self.last_interaction = datetime.utcnow()
         characters.update_one(
             {'_id': self._id},
-            {'$set': self.to_dict()},
+            {'$set': {**self.to_dict(), 'updated_at': self.last_interaction}},
             upsert=True
         )
 
+    @staticmethod
+    def insert_many(new_characters: List['Character']) -> None:
+        """Insert several new characters with a single database write"""
+        if not new_characters:
+            return
+        now = datetime.utcnow()
+        docs = []
+        for character in new_characters:
+            character.last_interaction = now
+            docs.append({**character.to_dict(), 'updated_at': now})
+        characters.insert_many(docs, ordered=False)
+
     @staticmethod
     def get_by_id(char_id: ObjectId) -> Optional['Character']:
         """Get character by ID"""
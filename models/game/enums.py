@@ -30,3 +30,9 @@ class Season(Enum):
         next_index = (current_index + 1) % len(seasons)
         return seasons[next_index]
 
+class SetupStatus(Enum):
+    """Progress of a new life's background setup (see story_pipeline)"""
+    CAST = "Cast"      # generating the initial cast
+    STORY = "Story"    # generating the first story
+    READY = "Ready"
+    FAILED = "Failed"
@@ -1,31 +1,32 @@
 # ./models/game/life.py
 
+import logging
 from datetime import datetime
 from typing import Dict, List, Optional
 from bson import ObjectId
-from dataclasses import dataclass, field
-from pymongo import MongoClient
+from dataclasses import dataclass, field, replace
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from config import Config
-from .enums import LifeStage, Intensity, Difficulty, Season
+from models import invalidation
+from models.cache import LRUCache
+from models.db import collection
+from .enums import LifeStage, Intensity, Difficulty, Season, SetupStatus
 from .base import Trait
+from .traits import MEMORY_AGING_CHANCE, PRIMARY_TRAITS, PrimaryTraitVector, SecondaryTraitSet, clamp
 from .memory import Memory
 from models.utils import DatabaseError
 import random
 
 
-client = MongoClient(Config.MONGO_URI)
-db = client[Config.DB_NAME]
-lives = db.lives
+logger = logging.getLogger(__name__)
 
-# Define primary traits
-PRIMARY_TRAITS = [
-    "Curiosity",    # intellectual curiosity, creativity, and willingness to try new things
-    "Discipline",   # self-control, organization, and dedication
-    "Confidence",   # self-assurance and social comfort
-    "Empathy",      # emotional intelligence and understanding of others
-    "Resilience",   # emotional stability and stress management
-    "Ambition"      # drive, goal-setting, and determination
-]
+lives = collection('lives')
+
+# Per-process cache of Life objects by _id. Entries are private copies; callers
+# always get their own clone, so mutating a returned Life never touches the cache.
+_life_cache = LRUCache(Config.LIFE_CACHE_MAX_ENTRIES, Config.LIFE_CACHE_TTL, name='life')
+_sync_mode = Config.LIFE_CACHE_SYNC
 
 @dataclass
 class Life:
@@ -39,8 +40,8 @@ class Life:
     custom_directions: Optional[str]
     life_stage: LifeStage
     current_employment: Optional[str]
-    primary_traits: List[Trait]
-    secondary_traits: List[Trait]
+    primary_traits: PrimaryTraitVector  # lists of Traits are converted
+    secondary_traits: SecondaryTraitSet
     current_stress: int = 0  # 0-100
     current_season: Season = Season.AUTUMN
     current_year: int = 1
@@ -48,6 +49,9 @@ class Life:
     created_at: datetime = field(default_factory=datetime.utcnow)
     last_played: datetime = field(default_factory=datetime.utcnow)
     archived: bool = False
+    setup_status: SetupStatus = SetupStatus.READY
+    deleted_at: Optional[datetime] = None  # set when deleted; the life_reaper removes it and its data later
+    version: int = 0  # incremented on every save
     _id: ObjectId = field(default_factory=ObjectId)
 
     def to_dict(self) -> Dict:
@@ -71,12 +75,15 @@ class Life:
             'stories_this_season': self.stories_this_season,
             'created_at': self.created_at,
             'last_played': self.last_played,
-            'archived': self.archived
+            'archived': self.archived,
+            'setup_status': self.setup_status.value,
+            'deleted_at': self.deleted_at,
+            'version': self.version
         }
 
     @classmethod
     def from_dict(cls, data: Dict) -> 'Life':
-        return cls(
+        life = cls(
             _id=data.get('_id', ObjectId()),
             user_id=data['user_id'],
             name=data['name'],
@@ -96,33 +103,86 @@ class Life:
             stories_this_season=data.get('stories_this_season', 0),
             created_at=data.get('created_at', datetime.utcnow()),
             last_played=data.get('last_played', datetime.utcnow()),
-            archived=data.get('archived', False)
+            archived=data.get('archived', False),
+            setup_status=SetupStatus(data.get('setup_status', 'Ready')),
+            deleted_at=data.get('deleted_at'),
+            version=data.get('version', 0)
+        )
+        life._stored = True
+        return life
+
+    def __post_init__(self):
+        # Whether the life came from (or has been written to) the database. Only a life
+        # created with Life(...) that has never been saved may be inserted by save().
+        self._stored = False
+        if not isinstance(self.primary_traits, PrimaryTraitVector):
+            self.primary_traits = PrimaryTraitVector.from_traits(self.primary_traits)
+        if not isinstance(self.secondary_traits, SecondaryTraitSet):
+            self.secondary_traits = SecondaryTraitSet.from_traits(self.secondary_traits)
+
+    def copy(self) -> 'Life':
+        """Copy with independent trait containers (everything else is immutable)"""
+        life = replace(
+            self,
+            primary_traits=self.primary_traits.copy(),
+            secondary_traits=self.secondary_traits.copy()
         )
+        life._stored = self._stored
+        return life
 
     @staticmethod
-    def generate_random_primary_traits() -> List[Trait]:
-        """Generate a list of random primary traits"""
-        return [Trait.random(name) for name in PRIMARY_TRAITS]
+    def generate_random_primary_traits() -> PrimaryTraitVector:
+        """Generate random values for every primary trait"""
+        return PrimaryTraitVector(Trait.random(name).value for name in PRIMARY_TRAITS)
 
-    def save(self) -> None:
-        """Save life to database"""
+    def save(self) -> bool:
+        """Save life to database and update the cached copy.
+        Returns False if the life has been deleted; a deleted or reaped life is never written back."""
         self.last_played = datetime.utcnow()
-        lives.update_one(
-            {'_id': self._id},
-            {'$set': self.to_dict()},
-            upsert=True
-        )
+        data = self.to_dict()
+        del data['version']
+        del data['deleted_at']  # only delete() sets it
+        data['updated_at'] = self.last_played
+        try:
+            result = lives.find_one_and_update(
+                {'_id': self._id, 'deleted_at': None},
+                {'$set': data, '$inc': {'version': 1}},
+                projection={'version': 1},
+                # Only a life that has never been saved may be created
+                upsert=not self._stored,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            # The upsert found the life, but deleted
+            result = None
+        if result is None:
+            _life_cache.pop(self._id)
+            logger.warning(f"Not saving life {self._id}: it has been deleted")
+            return False
+        self.version = result['version']
+        self._stored = True
+        _life_cache.set(self._id, self.copy())
+        return True
 
     @staticmethod
     def get_by_id(life_id: ObjectId) -> Optional['Life']:
-        """Get life by ID"""
+        """Get life by ID, from the per-process cache when it is current"""
+        cached = _life_cache.get(life_id)
+        if cached is not None and _is_current(cached):
+            return cached.copy()
+
         life_data = lives.find_one({'_id': life_id})
-        return Life.from_dict(life_data) if life_data else None
+        if not life_data or life_data.get('deleted_at'):
+            _life_cache.pop(life_id)
+            return None
+        life = Life.from_dict(life_data)
+        _life_cache.set(life_id, life.copy())
+        return life
 
     @staticmethod
     def get_by_user_id(user_id: ObjectId) -> List['Life']:
-        """Get all lives for a user"""
-        life_data = lives.find({'user_id': user_id})
+        """Get all lives for a user (except deleted ones)"""
+        life_data = lives.find({'user_id': user_id, 'deleted_at': None})
         return [Life.from_dict(data) for data in life_data]
 
     def get_memories(self) -> List[Memory]:
@@ -131,59 +191,34 @@ class Life:
 
     def apply_memory(self, memory: Memory) -> None:
         """Apply a memory's impacts to the life"""
-        # Update primary traits
-        for primary_trait_impact in memory.primary_trait_impacts:
-            if primary_trait_impact.name in PRIMARY_TRAITS:
-                primary_trait = next(
-                    (t for t in self.primary_traits if t.name == primary_trait_impact.name),
-                    None
-                )
-                if primary_trait:
-                    primary_trait.value = (primary_trait + primary_trait_impact).value
-
-        # Handle modifications to existing secondary traits
-        for trait_mod in memory.secondary_trait_modifications:
-            existing_trait = next(
-                (t for t in self.secondary_traits if t.name == trait_mod.name),
-                None
-            )
-            if existing_trait:
-                existing_trait.value = (existing_trait + trait_mod).value
+        # Update primary traits (one clamped vector add)
+        self.primary_traits.apply(PrimaryTraitVector.impact_vector(memory.primary_trait_impacts))
 
-        # Handle new secondary traits
-        for trait_add in memory.secondary_trait_additions:
-            # Only add if it doesn't already exist
-            if not any(t.name == trait_add.name for t in self.secondary_traits):
-                self.secondary_traits.append(trait_add)
+        # Modify existing secondary traits, then add new ones (ignored if already present)
+        self.secondary_traits.modify(memory.secondary_trait_modifications)
+        self.secondary_traits.add(memory.secondary_trait_additions)
 
         # Update stress
-        self.current_stress = max(0, min(100, self.current_stress + memory.stress_change))
+        self.current_stress = clamp(self.current_stress + memory.stress_change)
 
         # Save changes
         self.save()
 
     def delete(self) -> None:
-        """Delete life and all associated data from database"""
+        """Delete life: it disappears at once, and its data is removed in the background"""
         try:
-            # Delete associated data first
-            from .memory import memories
-            from .character import characters
-            from .story import stories
-            
-            # Delete all associated memories
-            memories.delete_many({'life_id': self._id})
-            
-            # Delete all associated characters
-            characters.delete_many({'life_id': self._id})
-            
-            # Delete all associated stories
-            stories.delete_many({'life_id': self._id})
-            
-            # Finally delete the life itself
-            lives.delete_one({'_id': self._id})
-            
+            now = datetime.utcnow()
+            lives.update_one(
+                {'_id': self._id},
+                {'$set': {'deleted_at': now, 'updated_at': now}, '$inc': {'version': 1}}
+            )
+            self.deleted_at = now
+            _life_cache.pop(self._id)
         except Exception as e:
             raise DatabaseError(f"Error deleting life: {str(e)}")
+
+        from . import life_reaper
+        life_reaper.start_reap(self._id)
         
     def advance_season(self) -> None:
         """Advance to the next season and process year transition if needed"""
@@ -229,7 +264,7 @@ class Life:
                 if memory.importance == 1:
                     memory.permanence = 1
                 elif memory.importance == 2:
-                    if random.random() < 0.5:  # 50% chance
+                    if random.random() < MEMORY_AGING_CHANCE:
                         memory.permanence = 1
                 elif memory.importance == 3:
                     memory.importance = 2
@@ -237,6 +272,26 @@ class Life:
             
             memory.save()
 
+    def set_setup_status(self, status: SetupStatus) -> bool:
+        """Record the progress of the life's background setup.
+        Returns False if the life has been deleted."""
+        self.setup_status = status
+        self.last_played = datetime.utcnow()
+        result = lives.find_one_and_update(
+            {'_id': self._id, 'deleted_at': None},
+            {'$set': {'setup_status': status.value, 'last_played': self.last_played,
+                      'updated_at': self.last_played},
+             '$inc': {'version': 1}},
+            projection={'version': 1},
+            return_document=ReturnDocument.AFTER
+        )
+        _life_cache.pop(self._id)
+        if result is None:
+            return False
+        self.version = result['version']
+        self._stored = True
+        return True
+
     def increment_story_count(self) -> None:
         """Increment stories_this_season and advance season if needed"""
         self.stories_this_season += 1
@@ -245,3 +300,24 @@ class Life:
         else:
             self.save()
 
+def _is_current(cached: Life) -> bool:
+    """Whether a cached life can be served without re-reading it, per LIFE_CACHE_SYNC"""
+    if _sync_mode == 'bus':
+        invalidation.ensure_started()
+    elif _sync_mode == 'version':
+        # Indexed lookup of one field; much cheaper than fetching and rebuilding the life
+        doc = lives.find_one({'_id': cached._id}, {'version': 1})
+        return doc is not None and doc.get('version', 0) == cached.version
+    return True
+
+def _on_life_changed(life_id: Optional[ObjectId], fields: Optional[Dict]) -> None:
+    """Evict lives written by other processes"""
+    if life_id is None:
+        _life_cache.clear()
+        return
+    cached = _life_cache.peek(life_id)
+    # Our own saves already updated the cache to the new version
+    if cached is not None and (not fields or fields.get('version') != cached.version):
+        _life_cache.pop(life_id)
+
+invalidation.register('lives', _on_life_changed)
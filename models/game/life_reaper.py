@@ -0,0 +1,93 @@
+# ./models/game/life_reaper.py
+"""
+Removes deleted lives and their data in the background.
+
+Life.delete only sets deleted_at, which hides the life straight away, and queues
+reap_life. That deletes the life's documents from each collection in batches of
+LIFE_REAP_BATCH_SIZE, pausing LIFE_REAP_BATCH_PAUSE seconds between batches so a
+large life doesn't hit the database all at once, and removes the life itself last.
+A reap lost with its worker is picked up by the periodic sweep.
+"""
+
+import logging
+import os
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+from bson import ObjectId
+
+from config import Config
+from models import jobs
+# life must be imported before memory (memory imports LifeStage from life)
+from models.game.life import lives
+from models.game.memory import memories
+from models.game.character import characters
+from models.game.story import stories, story_beats
+from models.game.story_archive import stories_archive
+from models.game.prepared_story import prepared_stories
+
+logger = logging.getLogger(__name__)
+
+# Collections holding a life's data, by life_id
+LIFE_DATA_COLLECTIONS = (memories, characters, story_beats, stories, stories_archive, prepared_stories)
+
+def start_reap(life_id: ObjectId) -> None:
+    jobs.submit(f"reap_life {life_id}", reap_life, life_id)
+
+def reap_life(life_id: ObjectId) -> int:
+    """Delete a deleted life's data in bounded batches, then the life. Returns the number of documents removed."""
+    removed = 0
+    for data_collection in LIFE_DATA_COLLECTIONS:
+        while True:
+            batch = [doc['_id'] for doc in data_collection.find(
+                {'life_id': life_id}, {'_id': 1}).limit(Config.LIFE_REAP_BATCH_SIZE)]
+            if not batch:
+                break
+            removed += data_collection.delete_many({'_id': {'$in': batch}}).deleted_count
+            time.sleep(Config.LIFE_REAP_BATCH_PAUSE)
+
+    # Only a life that is still deleted; never one that was restored or re-imported meanwhile
+    removed += lives.delete_one({'_id': life_id, 'deleted_at': {'$ne': None}}).deleted_count
+    logger.info(f"Reaped life {life_id} ({removed} documents)")
+    return removed
+
+def reap_deleted_lives() -> int:
+    """Reap lives deleted over LIFE_REAP_INTERVAL ago whose reap never finished. Returns the number reaped."""
+    cutoff = datetime.utcnow() - timedelta(seconds=Config.LIFE_REAP_INTERVAL)
+    reaped = 0
+    for life_data in lives.find({'deleted_at': {'$ne': None, '$lt': cutoff}}, {'_id': 1}):
+        reap_life(life_data['_id'])
+        reaped += 1
+    return reaped
+
+_reaper_thread: Optional[threading.Thread] = None
+_reaper_lock = threading.Lock()
+
+def start_reaper() -> None:
+    """Start the periodic sweep thread in this process (once per worker)"""
+    global _reaper_thread
+    if Config.LIFE_REAP_INTERVAL <= 0:
+        return
+    with _reaper_lock:
+        if _reaper_thread is None or not _reaper_thread.is_alive():
+            _reaper_thread = threading.Thread(target=_run_reaper, name='life-reaper', daemon=True)
+            _reaper_thread.start()
+
+def _run_reaper() -> None:
+    # Workers start together; spread their first sweeps out
+    time.sleep(random.uniform(0, Config.LIFE_REAP_INTERVAL))
+    while True:
+        try:
+            if jobs.acquire_lease('life_reaper', Config.LIFE_REAP_INTERVAL):
+                reap_deleted_lives()
+        except Exception as e:
+            logger.error(f"Life reaper failed: {str(e)}")
+        time.sleep(Config.LIFE_REAP_INTERVAL)
+
+def _reset_after_fork() -> None:
+    global _reaper_thread
+    _reaper_thread = None
+
+os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,200 @@
+# ./models/game/life_transfer.py
+"""
+Streaming export and import of a whole life, for backups and for moving lives
+between databases.
+
+An export is a sequence of records {'collection': name, 'document': doc}: a
+header, the life, then its characters, memories, stories, story beats, archived
+stories and the prompts its stories use. Records are written as
+newline-delimited Extended JSON (bson.json_util, so ObjectIds, dates and binary
+data survive) or as concatenated BSON documents; a path ending in .gz is
+gzipped. Documents are read through cursors and written one at a time, so memory
+use doesn't grow with the size of the life.
+
+Import gives every document a new _id and rewrites every reference to one
+(ObjectIds, and ids stored as strings, anywhere in a document), so a life can be
+imported next to the original. It reads the file twice: first to collect the
+old ids, then to insert in batches of IMPORT_BATCH_SIZE. Until it finishes, the
+new life is marked deleted (and refreshed after every batch), so it is hidden
+from the player and, if the import dies, removed by the life reaper.
+"""
+
+import gzip
+import logging
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional
+from bson import ObjectId, decode_file_iter, encode, json_util
+from pymongo import UpdateOne
+
+from models.game.life import lives
+from models.game.memory import memories
+from models.game.character import characters
+from models.game.story import stories, story_beats, story_prompts
+from models.game.story_archive import stories_archive
+from models.game import life_reaper
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMAT_VERSION = 1
+EXPORT_BATCH_SIZE = 500  # documents fetched per cursor batch
+IMPORT_BATCH_SIZE = 500  # documents per insert_many
+
+HEADER = '_header'
+
+# Collections exported by life_id, in file order
+LIFE_DATA_COLLECTIONS = {
+    'characters': characters,
+    'memories': memories,
+    'stories': stories,
+    'story_beats': story_beats,
+    'stories_archive': stories_archive
+}
+
+def file_format(path: str) -> str:
+    """'bson' for .bson or .bson.gz paths, otherwise 'ndjson'"""
+    return 'bson' if path.removesuffix('.gz').endswith('.bson') else 'ndjson'
+
+def _open(path: str, mode: str):
+    return gzip.open(path, mode) if path.endswith('.gz') else open(path, mode)
+
+def _write_record(stream, fmt: str, collection_name: str, document: Dict) -> None:
+    record = {'collection': collection_name, 'document': document}
+    if fmt == 'bson':
+        stream.write(encode(record))
+    else:
+        stream.write(json_util.dumps(record, json_options=json_util.RELAXED_JSON_OPTIONS).encode('utf-8') + b'\n')
+
+def _read_records(path: str, fmt: str) -> Iterator[Dict]:
+    with _open(path, 'rb') as stream:
+        if fmt == 'bson':
+            yield from decode_file_iter(stream)
+        else:
+            for line in stream:
+                if line.strip():
+                    yield json_util.loads(line)
+
+def export_life(life_id: ObjectId, path: str, fmt: Optional[str] = None) -> Dict[str, int]:
+    """Write a life and all its data to path. Returns the number of documents per collection."""
+    fmt = fmt or file_format(path)
+    life_data = lives.find_one({'_id': life_id, 'deleted_at': None})
+    if not life_data:
+        raise ValueError(f"Life {life_id} not found")
+
+    counts = {}
+    with _open(path, 'wb') as stream:
+        _write_record(stream, fmt, HEADER, {'version': EXPORT_FORMAT_VERSION, 'life_id': life_id,
+                                            'exported_at': datetime.utcnow()})
+        _write_record(stream, fmt, 'lives', life_data)
+        counts['lives'] = 1
+
+        for name, data_collection in LIFE_DATA_COLLECTIONS.items():
+            counts[name] = 0
+            for document in data_collection.find({'life_id': life_id}).batch_size(EXPORT_BATCH_SIZE):
+                _write_record(stream, fmt, name, document)
+                counts[name] += 1
+
+        # Prompts are shared between stories, so they are looked up by the ids the life's stories use
+        counts['story_prompts'] = 0
+        prompt_ids = stories.distinct('prompt_id', {'life_id': life_id, 'prompt_id': {'$ne': None}})
+        for start in range(0, len(prompt_ids), EXPORT_BATCH_SIZE):
+            for document in story_prompts.find({'_id': {'$in': prompt_ids[start:start + EXPORT_BATCH_SIZE]}}):
+                _write_record(stream, fmt, 'story_prompts', document)
+                counts['story_prompts'] += 1
+
+    logger.info(f"Exported life {life_id} to {path}: {counts}")
+    return counts
+
+class _IdMap:
+    """Old to new ids, applied to ObjectIds and their string form anywhere in a document"""
+
+    def __init__(self):
+        self.ids: Dict[ObjectId, ObjectId] = {}
+        self.strings: Dict[str, str] = {}
+
+    def add(self, old_id: ObjectId) -> None:
+        new_id = ObjectId()
+        self.ids[old_id] = new_id
+        self.strings[str(old_id)] = str(new_id)
+
+    def remap(self, value: Any) -> Any:
+        if isinstance(value, ObjectId):
+            return self.ids.get(value, value)
+        if isinstance(value, str):
+            return self.strings.get(value, value)
+        if isinstance(value, dict):
+            return {key: self.remap(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self.remap(item) for item in value]
+        return value
+
+def import_life(path: str, fmt: Optional[str] = None, user_id: Optional[ObjectId] = None) -> ObjectId:
+    """Import a life exported by export_life under new ids, optionally giving it to another user.
+    Returns the new life's id."""
+    fmt = fmt or file_format(path)
+
+    # First pass: the ids that get replaced (prompt ids are content hashes and are kept)
+    id_map = _IdMap()
+    for record in _read_records(path, fmt):
+        if record['collection'] == HEADER:
+            if record['document'].get('version') != EXPORT_FORMAT_VERSION:
+                raise ValueError(f"Unsupported export version: {record['document'].get('version')}")
+        elif record['collection'] != 'story_prompts':
+            id_map.add(record['document']['_id'])
+
+    life_id = None
+    batches: Dict[str, list] = {name: [] for name in LIFE_DATA_COLLECTIONS}
+    prompts = []
+
+    def flush() -> None:
+        for name, batch in batches.items():
+            if batch:
+                LIFE_DATA_COLLECTIONS[name].insert_many(batch)
+                batch.clear()
+        if prompts:
+            story_prompts.bulk_write(prompts, ordered=False)
+            prompts.clear()
+        # Keeps the unfinished life from being reaped as an old deletion
+        lives.update_one({'_id': life_id}, {'$set': {'deleted_at': datetime.utcnow()}})
+
+    try:
+        for record in _read_records(path, fmt):
+            name, document = record['collection'], record['document']
+            if name == HEADER:
+                continue
+            if name == 'story_prompts':
+                fields = {key: value for key, value in document.items() if key != '_id'}
+                prompts.append(UpdateOne({'_id': document['_id']}, {'$setOnInsert': fields}, upsert=True))
+                if len(prompts) >= IMPORT_BATCH_SIZE:
+                    flush()
+                continue
+
+            document = id_map.remap(document)
+            if name == 'lives':
+                if life_id is not None:
+                    raise ValueError("Export contains more than one life")
+                if user_id is not None:
+                    document['user_id'] = user_id
+                document['deleted_at'] = datetime.utcnow()
+                lives.insert_one(document)
+                life_id = document['_id']
+                continue
+
+            if life_id is None:
+                raise ValueError("Export must start with its life")
+            if name not in batches:
+                raise ValueError(f"Unknown collection in export: {name}")
+            batches[name].append(document)
+            if len(batches[name]) >= IMPORT_BATCH_SIZE:
+                flush()
+
+        if life_id is None:
+            raise ValueError("Export contains no life")
+        flush()
+        lives.update_one({'_id': life_id}, {'$unset': {'deleted_at': ''}, '$set': {'updated_at': datetime.utcnow()}})
+    except Exception:
+        if life_id is not None:
+            life_reaper.reap_life(life_id)
+        raise
+
+    logger.info(f"Imported life {life_id} from {path}")
+    return life_id
@@ -4,17 +4,14 @@ from datetime import datetime
 from typing import Dict, List, Optional
 from bson import ObjectId
 from dataclasses import dataclass, field
-from pymongo import MongoClient
 from models.game.life import LifeStage
 from models.game.character import Character
-from config import Config
+from models.db import collection
 from .base import Trait
 from .enums import Season
 import json
 
-client = MongoClient(Config.MONGO_URI)
-db = client[Config.DB_NAME]
-memories = db.memories
+memories = collection('memories')
 
 import logging
 logger = logging.getLogger(__name__)
@@ -152,20 +149,6 @@ class Memory:
                 if isinstance(life_stage, LifeStage):
                     life_stage = life_stage.value
                 
-                # Include analyzed traits in the AI format
-                analyzed_traits = {
-                    trait.name: {
-                        'calculated_value': trait.calculated_value,
-                        'reasoning': trait.reasoning
-                    } for trait in memory.analyzed_traits
-                }
-                
-                # Format trait impacts for AI
-                trait_impacts = {
-                    "primary_traits": {t.name: t.value for t in memory.primary_trait_impacts if t.value != 0},
-                    "secondary_traits": {t.name: t.value for t in memory.secondary_trait_impacts if t.value != 0}
-                }
-                
                 memories_list.append({
                     #'title': memory.title,
                     'description': memory.description,
@@ -175,8 +158,6 @@ class Memory:
                     'year': memory.year
                     #'emotional_tags': memory.emotional_tags,
                     #'context_tags': memory.context_tags,
-                    #'trait_impacts': trait_impacts,
-                    #'analyzed_traits': analyzed_traits,
                     #'story_stress': memory.story_stress,
                     #'stress_reasoning': memory.stress_reasoning,
                     #'importance': memory.importance,
@@ -192,7 +173,7 @@ class Memory:
         """Save memory to database"""
         memories.update_one(
             {'_id': self._id},
-            {'$set': self.to_dict()},
+            {'$set': {**self.to_dict(), 'updated_at': datetime.utcnow()}},
             upsert=True
         )
 
@@ -0,0 +1,96 @@
+# ./models/game/prepared_story.py
+
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from bson import ObjectId
+from dataclasses import dataclass, field
+from pymongo.errors import DuplicateKeyError
+
+from models.db import collection
+
+prepared_stories = collection('prepared_stories')
+prepared_story_claims = collection('prepared_story_claims')
+
+@dataclass
+class PreparedStory:
+    """A story opening queued ahead of time, valid while the life's state matches its fingerprint"""
+    life_id: ObjectId
+    fingerprint: str
+    prompt: str
+    story_text: str
+    options: List[str]
+    character_ids: List[ObjectId] = field(default_factory=list)
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    _id: ObjectId = field(default_factory=ObjectId)
+
+    def to_dict(self) -> Dict:
+        return {
+            '_id': self._id,
+            'life_id': self.life_id,
+            'fingerprint': self.fingerprint,
+            'prompt': self.prompt,
+            'story_text': self.story_text,
+            'options': self.options,
+            'character_ids': [str(char_id) for char_id in self.character_ids],
+            'created_at': self.created_at
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'PreparedStory':
+        return cls(
+            _id=data.get('_id', ObjectId()),
+            life_id=data['life_id'],
+            fingerprint=data['fingerprint'],
+            prompt=data['prompt'],
+            story_text=data['story_text'],
+            options=data['options'],
+            character_ids=[ObjectId(id_str) for id_str in data.get('character_ids', [])],
+            created_at=data.get('created_at', datetime.utcnow())
+        )
+
+    def save(self) -> None:
+        """Add to the end of the life's queue"""
+        prepared_stories.insert_one(self.to_dict())
+
+    @staticmethod
+    def take(life_id: ObjectId, fingerprint: str) -> Optional['PreparedStory']:
+        """Remove and return the oldest queued story built from this life state.
+        The delete is atomic, so two requests can never both get the same story."""
+        data = prepared_stories.find_one_and_delete(
+            {'life_id': life_id, 'fingerprint': fingerprint},
+            sort=[('created_at', 1)]
+        )
+        return PreparedStory.from_dict(data) if data else None
+
+    @staticmethod
+    def count(life_id: ObjectId, fingerprint: str) -> int:
+        """Number of queued stories still valid for this life state"""
+        return prepared_stories.count_documents({'life_id': life_id, 'fingerprint': fingerprint})
+
+    @staticmethod
+    def delete_stale(life_id: ObjectId, fingerprint: str) -> int:
+        """Drop queued stories built from an older life state"""
+        return prepared_stories.delete_many({'life_id': life_id, 'fingerprint': {'$ne': fingerprint}}).deleted_count
+
+    @staticmethod
+    def delete_by_life_id(life_id: ObjectId) -> None:
+        prepared_stories.delete_many({'life_id': life_id})
+
+    @staticmethod
+    def claim(life_id: ObjectId, seconds: float) -> bool:
+        """Reserve the life's queue for one filler, across all processes, for up to seconds.
+        Returns False if another filler holds it."""
+        now = datetime.utcnow()
+        try:
+            prepared_story_claims.update_one(
+                {'_id': life_id, 'expires_at': {'$lte': now}},
+                {'$set': {'expires_at': now + timedelta(seconds=seconds)}},
+                upsert=True
+            )
+            return True
+        except DuplicateKeyError:
+            return False
+
+    @staticmethod
+    def release(life_id: ObjectId) -> None:
+        prepared_story_claims.delete_one({'_id': life_id})
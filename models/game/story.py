@@ -1,17 +1,48 @@
 # ./models/game/story.py
+"""
+Stories are stored in three collections, so that reading a story stays small:
+- stories: status, options, memory params and pointers (prompt_id, beat_count)
+- story_beats: one document per beat, appended as the story goes on; the beat's
+  response is filled in once, when the player chooses it
+- story_prompts: system prompts, compressed and keyed by their sha256, so a
+  prompt is stored once however many stories use it
 
+Documents written before the split keep `prompt` and `beats` inline; they are
+still read as-is, moved over the next time they are saved with their beats, and
+all at once by Story.migrate_inline_content (run by init-db).
+"""
+
+import hashlib
+import zlib
 from datetime import datetime
 from typing import Dict, List, Tuple, Optional
-from bson import ObjectId
+from bson import Binary, ObjectId
 from dataclasses import dataclass, field
-from pymongo import MongoClient
 from enum import Enum
+from pymongo.errors import DuplicateKeyError
+
+from models.db import collection
+from models.utils import DatabaseError
 
-from config import Config
+stories = collection('stories')
+story_beats = collection('story_beats')
+story_prompts = collection('story_prompts')
 
-client = MongoClient(Config.MONGO_URI)
-db = client[Config.DB_NAME]
-stories = db.stories
+def store_prompt(prompt: str) -> str:
+    """Store a prompt once, compressed. Returns its id (the sha256 of the text)."""
+    data = prompt.encode('utf-8')
+    prompt_id = hashlib.sha256(data).hexdigest()
+    story_prompts.update_one(
+        {'_id': prompt_id},
+        {'$setOnInsert': {'data': Binary(zlib.compress(data)), 'size': len(data),
+                          'created_at': datetime.utcnow()}},
+        upsert=True
+    )
+    return prompt_id
+
+def load_prompt(prompt_id: str) -> Optional[str]:
+    data = story_prompts.find_one({'_id': prompt_id})
+    return zlib.decompress(data['data']).decode('utf-8') if data else None
 
 class StoryStatus(Enum):
     ACTIVE = "active"
@@ -22,8 +53,8 @@ class StoryStatus(Enum):
 @dataclass
 class Story:
     life_id: ObjectId
-    prompt: str
-    beats: List[Tuple[str, Optional[str]]]  # List of (story_beat, selected_response) tuples
+    prompt: Optional[str]  # Only set on a new story (see load_prompt() for a saved one)
+    beats: Optional[List[Tuple[str, Optional[str]]]]  # List of (story_beat, selected_response) tuples; None if not loaded
     current_options: List[str]  # Response options for the latest beat
     status: StoryStatus = StoryStatus.ACTIVE
     memory_title: Optional[str] = None
@@ -34,15 +65,17 @@ class Story:
     last_updated: datetime = field(default_factory=datetime.utcnow)
     _id: ObjectId = field(default_factory=ObjectId)
     character_ids: List[ObjectId] = field(default_factory=list)
+    prompt_id: Optional[str] = None
+    beat_count: int = 0  # Beats saved to story_beats
 
 
     def to_dict(self) -> Dict:
-        """Convert Story to dictionary for database storage"""
+        """Convert Story to dictionary for database storage (without the prompt and beats)"""
         base_dict = {
             '_id': self._id,
             'life_id': self.life_id,
-            'prompt': self.prompt,
-            'beats': [(beat, response) for beat, response in self.beats],
+            'prompt_id': self.prompt_id,
+            'beat_count': self.beat_count,
             'current_options': self.current_options,
             'status': self.status.value,
             'created_at': self.created_at,
@@ -62,13 +95,15 @@ class Story:
         return base_dict
 
     @classmethod
-    def from_dict(cls, data: Dict) -> 'Story':
-        """Create Story object from dictionary"""
+    def from_dict(cls, data: Dict, beats: Optional[List[Tuple[str, Optional[str]]]] = None) -> 'Story':
+        """Create Story object from dictionary. Beats come from story_beats (or inline, in an older document)."""
+        if beats is None and 'beats' in data:
+            beats = [(beat, response) for beat, response in data['beats']]
         return cls(
             _id=data.get('_id', ObjectId()),
             life_id=data['life_id'],
-            prompt=data['prompt'],
-            beats=[(beat, response) for beat, response in data['beats']],
+            prompt=data.get('prompt'),
+            beats=beats,
             current_options=data['current_options'],
             status=StoryStatus(data.get('status', 'active')),
             memory_title=data.get('memory_title'),
@@ -77,34 +112,107 @@ class Story:
             resulting_memory_id=data.get('resulting_memory_id'),
             created_at=data.get('created_at', datetime.utcnow()),
             last_updated=data.get('last_updated', datetime.utcnow()),
-            character_ids=[ObjectId(id_str) for id_str in data.get('character_ids', [])]
+            character_ids=[ObjectId(id_str) for id_str in data.get('character_ids', [])],
+            prompt_id=data.get('prompt_id'),
+            beat_count=data.get('beat_count', 0)
         )
 
     def save(self) -> None:
-        """Save story to database"""
+        """Save story to database. New beats are appended to story_beats before the story
+        points at them; beats that were not loaded are left alone."""
         self.last_updated = datetime.utcnow()
-        stories.update_one(
-            {'_id': self._id},
-            {'$set': self.to_dict()},
-            upsert=True
-        )
+        unset = {}
+
+        if self.prompt is not None:
+            if self.prompt_id is None:
+                self.prompt_id = store_prompt(self.prompt)
+            unset['prompt'] = ''
+
+        if self.beats is not None:
+            new_beats = [
+                {'story_id': self._id, 'life_id': self.life_id, 'index': index,
+                 'beat': beat, 'response': response, 'created_at': self.last_updated}
+                for index, (beat, response) in enumerate(self.beats)
+                if index >= self.beat_count
+            ]
+            if new_beats:
+                try:
+                    story_beats.insert_many(new_beats)
+                except DuplicateKeyError:
+                    raise ValueError("Story was changed by another request")
+                self.beat_count = len(self.beats)
+            unset['beats'] = ''
+
+        update = {'$set': {**self.to_dict(), 'updated_at': self.last_updated}}
+        if unset:
+            update['$unset'] = unset
+        stories.update_one({'_id': self._id}, update, upsert=True)
 
     @staticmethod
-    def get_by_id(story_id: ObjectId) -> Optional['Story']:
-        """Get story by ID"""
-        story_data = stories.find_one({'_id': story_id})
-        return Story.from_dict(story_data) if story_data else None
+    def _find_one(query: Dict, load_beats: bool) -> Optional['Story']:
+        projection = {'prompt': 0} if load_beats else {'prompt': 0, 'beats': 0}
+        story_data = stories.find_one(query, projection)
+        if not story_data:
+            return None
+        beats = None
+        if load_beats and 'beats' not in story_data:
+            beats = Story.load_beats(story_data['_id'])
+        return Story.from_dict(story_data, beats)
 
     @staticmethod
-    def get_by_life_id(life_id: ObjectId) -> Optional['Story']:
-        """Get active or concluded story for a life"""
-        story_data = stories.find_one({
+    def get_by_id(story_id: ObjectId, load_beats: bool = True) -> Optional['Story']:
+        """Get story by ID. With load_beats=False, story.beats is None."""
+        return Story._find_one({'_id': story_id}, load_beats)
+
+    @staticmethod
+    def get_by_life_id(life_id: ObjectId, load_beats: bool = True) -> Optional['Story']:
+        """Get active or concluded story for a life. With load_beats=False, story.beats is None."""
+        return Story._find_one({
             'life_id': life_id,
             'status': {
                 '$in': [StoryStatus.ACTIVE.value, StoryStatus.CONCLUDED.value]
             }
-        })
-        return Story.from_dict(story_data) if story_data else None
+        }, load_beats)
+
+    @staticmethod
+    def load_beats(story_id: ObjectId) -> List[Tuple[str, Optional[str]]]:
+        """Get a saved story's beats from story_beats, in order"""
+        beat_docs = story_beats.find({'story_id': story_id}, {'beat': 1, 'response': 1}).sort('index', 1)
+        return [(doc['beat'], doc.get('response')) for doc in beat_docs]
+
+    def load_prompt(self) -> Optional[str]:
+        """Get the story's system prompt (stored separately, so not loaded with the story)"""
+        if self.prompt is not None:
+            return self.prompt
+        if self.prompt_id:
+            return load_prompt(self.prompt_id)
+        story_data = stories.find_one({'_id': self._id}, {'prompt': 1})
+        return story_data.get('prompt') if story_data else None
+
+    @staticmethod
+    def migrate_inline_content(batch_size: int = 100) -> int:
+        """Move the prompt and beats of stories saved before story_beats/story_prompts existed.
+        Returns the number of stories migrated."""
+        try:
+            migrated = 0
+            query = {'$or': [{'prompt': {'$exists': True}}, {'beats': {'$exists': True}}]}
+            while True:
+                batch = list(stories.find(query).limit(batch_size))
+                if not batch:
+                    return migrated
+                for story_data in batch:
+                    # Beats inserted by an interrupted earlier run are replaced
+                    if 'beats' in story_data:
+                        story_beats.delete_many({'story_id': story_data['_id']})
+                        story_data['beat_count'] = 0
+                    story = Story.from_dict(story_data)
+                    if story.prompt is None:
+                        # Saved with prompt: null; there is nothing to move
+                        stories.update_one({'_id': story._id}, {'$unset': {'prompt': ''}})
+                    story.save()
+                    migrated += 1
+        except Exception as e:
+            raise DatabaseError(f"Error migrating stories: {str(e)}")
 
     def add_player_response(self, selected_response: str) -> None:
         """Add player's selected response to the current beat"""
@@ -118,6 +226,14 @@ class Story:
         # Update the last beat with the selected response
         last_beat, _ = self.beats[-1]
         self.beats[-1] = (last_beat, selected_response)
+        if len(self.beats) <= self.beat_count:
+            # Responses are only ever set once
+            result = story_beats.update_one(
+                {'story_id': self._id, 'index': len(self.beats) - 1, 'response': None},
+                {'$set': {'response': selected_response}}
+            )
+            if result.matched_count == 0:
+                raise ValueError("Story was changed by another request")
         self.save()
 
     def add_story_beat(self, new_beat: str, new_options: List[str]) -> None:
@@ -173,4 +289,5 @@ class Story:
 
     def delete(self) -> None:
         """Delete this story from database"""
+        story_beats.delete_many({'story_id': self._id})
         stories.delete_one({'_id': self._id})
\ No newline at end of file
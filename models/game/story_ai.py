@@ -1,10 +1,14 @@
 # ./models/game/story_ai.py
 
+import contextvars
 import logging
 import random
-from typing import Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, TYPE_CHECKING
 from bson import ObjectId
 
+from config import Config
+
 import models.game.story_ai_utils as ai_utils
 import models.game.story_ai_prompts as prompts
 import models.game.story_ai_tools as tools
@@ -13,8 +17,14 @@ import models.game.story as story_module
 import models.game.life as life_module
 from models.game.enums import LifeStage
 
+if TYPE_CHECKING:
+    from openai import OpenAI
+
 logger = logging.getLogger(__name__)
 
+# Runs the initial cast groups of new lives concurrently
+_cast_executor = ThreadPoolExecutor(max_workers=Config.CAST_GENERATION_THREADS, thread_name_prefix='initial-cast')
+
 @ai_utils.handle_openai_error
 def begin_story(life: 'life_module.Life', custom_story_seed: str) -> ai_utils.StoryResponse:
     """Generate the first beat of a new story"""
@@ -25,17 +35,18 @@ def begin_story(life: 'life_module.Life', custom_story_seed: str) -> ai_utils.St
     
     # Build prompt
     prompt = prompts.build_story_begin_prompt(life, custom_story_seed)
-    print(prompt)
-    
     # Make API call
-    response = client.chat.completions.create(
+    response = ai_utils.create_chat_completion(
+        client,
         model=model,
         messages=[
             {"role": "system", "content": prompt},
             {"role": "user", "content": "Begin a new story for this character."}
         ],
         tools=tools.STORY_TOOLS_WITH_OPTIONS,
-        tool_choice={"type": "function", "function": {"name": "create_story_beat"}}
+        tool_choice={"type": "function", "function": {"name": "create_story_beat"}},
+        function_name="begin_story",
+        life=life
     )
     
     # Parse response
@@ -66,10 +77,9 @@ def continue_story(life: 'life_module.Life', story: 'story_module.Story', select
     
     # Build prompt
     prompt = prompts.build_story_continue_prompt(life, story)
-    print(prompt)
-    
     # Make API call
-    response = client.chat.completions.create(
+    response = ai_utils.create_chat_completion(
+        client,
         model=model,
         messages=[
             {"role": "system", "content": prompt},
@@ -82,7 +92,9 @@ Player chose: {selected_option}
 Continue the story based on this choice."""}
         ],
         tools=tools.STORY_TOOLS_WITH_OPTIONS,
-        tool_choice={"type": "function", "function": {"name": "create_story_beat"}}
+        tool_choice={"type": "function", "function": {"name": "create_story_beat"}},
+        function_name="continue_story",
+        life=life
     )
     
     # Parse response
@@ -113,10 +125,9 @@ def conclude_story(life: 'life_module.Life', story: 'story_module.Story', select
     
     # Build prompt
     prompt = prompts.build_story_conclusion_prompt(life, story)
-    print(prompt)
-    
     # Make API call
-    response = client.chat.completions.create(
+    response = ai_utils.create_chat_completion(
+        client,
         model=model,
         messages=[
             {"role": "system", "content": prompt},
@@ -129,7 +140,9 @@ Player chose: {selected_option}
 Conclude the story based on this choice."""}
         ],
         tools=tools.STORY_TOOLS,
-        tool_choice={"type": "function", "function": {"name": "create_story_beat"}}
+        tool_choice={"type": "function", "function": {"name": "create_story_beat"}},
+        function_name="conclude_story",
+        life=life
     )
     
     # Parse response
@@ -160,10 +173,9 @@ def generate_memory_from_story(life: 'life_module.Life', story: 'story_module.St
     
     # Build prompt
     prompt = prompts.build_memory_generation_prompt(life, story)
-    print(prompt)
-    
     # Make API call
-    response = client.chat.completions.create(
+    response = ai_utils.create_chat_completion(
+        client,
         model=model,
         messages=[
             {"role": "system", "content": prompt},
@@ -174,16 +186,13 @@ Story context:
 Generate a memory based on this story."""}
         ],
         tools=tools.MEMORY_TOOLS,
-        tool_choice={"type": "function", "function": {"name": "create_memory"}}
+        tool_choice={"type": "function", "function": {"name": "create_memory"}},
+        function_name="generate_memory_from_story",
+        life=life
     )
 
-    print(response)
-    
     # Parse response
     result = ai_utils.parse_openai_response(response, "create_memory")
-
-    print(result)
-
     
     # Create dictionary of current trait values
     current_traits = {trait.name: trait.value for trait in life.primary_traits}
@@ -228,6 +237,31 @@ Generate a memory based on this story."""}
     
     return processed_result
 
+# Where the player first met each part of the initial cast: (context, life stage)
+CAST_FIRST_MET = {
+    "parents": ("Family", LifeStage.CHILDHOOD),
+    "siblings": ("Family", LifeStage.CHILDHOOD),
+    "teachers": ("First day of school at Quillington High", LifeStage.HIGH_SCHOOL),
+    "classmates": ("First day of school at Quillington High", LifeStage.HIGH_SCHOOL)
+}
+
+def _generate_cast_group(client: 'OpenAI', model: str, life: 'life_module.Life',
+                         prompt: str, group: str, request_text: str) -> Dict:
+    """Generate one group of the initial cast (see tools.CAST_GROUPS)"""
+    response = ai_utils.create_chat_completion(
+        client,
+        model=model,
+        messages=[
+            {"role": "system", "content": prompt},
+            {"role": "user", "content": request_text}
+        ],
+        tools=tools.GENERATE_CAST_GROUP_TOOLS[group],
+        tool_choice={"type": "function", "function": {"name": "create_initial_cast"}},
+        function_name=f"generate_initial_cast.{group}",
+        life=life
+    )
+    return ai_utils.parse_openai_response(response, "create_initial_cast")
+
 @ai_utils.handle_openai_error
 def generate_initial_cast(life: 'life_module.Life') -> List['character_module.Character']:
     """Generate the initial cast of characters for a new life"""
@@ -239,93 +273,54 @@ def generate_initial_cast(life: 'life_module.Life') -> List['character_module.Ch
     # Determine number of siblings
     num_siblings = random.randint(0, 2)
     
-    # Build the prompt
+    # Build the prompt, shared by every group so the requests share a cacheable prefix
     prompt = prompts.build_initial_cast_prompt(life, num_siblings)
-    
-    # Make API call
-    response = client.chat.completions.create(
-        model=model,
-        messages=[
-            {"role": "system", "content": prompt},
-            {"role": "user", "content": f"Generate initial cast{' including ' + str(num_siblings) + ' sibling(s)' if num_siblings > 0 else ''}."}
-        ],
-        tools=tools.GENERATE_CAST_TOOLS,
-        tool_choice={"type": "function", "function": {"name": "create_initial_cast"}}
-    )
-    
-    # Parse response
-    result = ai_utils.parse_openai_response(response, "create_initial_cast")
+    sibling_text = f" including {num_siblings} sibling(s)" if num_siblings > 0 else ""
+    group_requests = {
+        "family": f"Generate only the family for the initial cast{sibling_text}. "
+                  f"The teachers and classmates are generated separately.",
+        "school": "Generate only the teachers and classmates for the initial cast. "
+                  "The family is generated separately."
+    }
+    
+    # Request the groups in parallel; each runs in a copy of this context so the
+    # calls still count towards the current request's timing and telemetry
+    futures = {
+        group: _cast_executor.submit(contextvars.copy_context().run, _generate_cast_group,
+                                     client, model, life, prompt, group, request_text)
+        for group, request_text in group_requests.items()
+    }
+    # Take only each group's own lists, so extra keys in one reply can't replace the other group's cast
+    result = {}
+    for group, future in futures.items():
+        group_result = future.result()
+        for key in tools.CAST_GROUPS[group]:
+            if key in group_result:
+                result[key] = group_result[key]
+    
+    # Keep only the siblings asked for, then check the merged cast against the full tool schema
+    result["siblings"] = result.get("siblings", [])[:num_siblings]
+    ai_utils.validate_tool_arguments(result, tools.GENERATE_CAST_TOOLS[0])
     
     # Create characters
     characters = []
-    
-    # Process parents
-    for parent_data in result["parents"]:
-        characters.append(character_module.Character(
-            life_id=life._id,
-            name=parent_data["name"],
-            age=parent_data["age"],
-            gender=parent_data["gender"],
-            physical_description=parent_data["physical_description"],
-            personality_description=parent_data["personality_description"],
-            relationship_description=parent_data["relationship_description"],
-            first_met_context="Family",
-            first_met_life_stage=LifeStage.CHILDHOOD,
-            last_appearance_age=parent_data["age"],
-            last_appearance_life_stage=LifeStage.HIGH_SCHOOL
-        ))
-
-    # Process siblings if any
-    if num_siblings > 0 and "siblings" in result:
-        for sibling_data in result["siblings"][:num_siblings]:
+    for cast_group, (first_met_context, first_met_life_stage) in CAST_FIRST_MET.items():
+        for character_data in result[cast_group]:
             characters.append(character_module.Character(
                 life_id=life._id,
-                name=sibling_data["name"],
-                age=sibling_data["age"],
-                gender=sibling_data["gender"],
-                physical_description=sibling_data["physical_description"],
-                personality_description=sibling_data["personality_description"],
-                relationship_description=sibling_data["relationship_description"],
-                first_met_context="Family",
-                first_met_life_stage=LifeStage.CHILDHOOD,
-                last_appearance_age=sibling_data["age"],
+                name=character_data["name"],
+                age=character_data["age"],
+                gender=character_data["gender"],
+                physical_description=character_data["physical_description"],
+                personality_description=character_data["personality_description"],
+                relationship_description=character_data["relationship_description"],
+                first_met_context=first_met_context,
+                first_met_life_stage=first_met_life_stage,
+                last_appearance_age=character_data["age"],
                 last_appearance_life_stage=LifeStage.HIGH_SCHOOL
             ))
 
-    # Process teachers
-    for teacher_data in result["teachers"]:
-        characters.append(character_module.Character(
-            life_id=life._id,
-            name=teacher_data["name"],
-            age=teacher_data["age"],
-            gender=teacher_data["gender"],
-            physical_description=teacher_data["physical_description"],
-            personality_description=teacher_data["personality_description"],
-            relationship_description=teacher_data["relationship_description"],
-            first_met_context="First day of school at Quillington High",
-            first_met_life_stage=LifeStage.HIGH_SCHOOL,
-            last_appearance_age=teacher_data["age"],
-            last_appearance_life_stage=LifeStage.HIGH_SCHOOL
-        ))
-
-    # Process classmates
-    for classmate_data in result["classmates"]:
-        characters.append(character_module.Character(
-            life_id=life._id,
-            name=classmate_data["name"],
-            age=classmate_data["age"],
-            gender=classmate_data["gender"],
-            physical_description=classmate_data["physical_description"],
-            personality_description=classmate_data["personality_description"],
-            relationship_description=classmate_data["relationship_description"],
-            first_met_context="First day of school at Quillington High",
-            first_met_life_stage=LifeStage.HIGH_SCHOOL,
-            last_appearance_age=classmate_data["age"],
-            last_appearance_life_stage=LifeStage.HIGH_SCHOOL
-        ))
-
-    # Save all characters
-    for character in characters:
-        character.save()
+    # Save all characters in one write
+    character_module.Character.insert_many(characters)
 
     return characters
\ No newline at end of file
@@ -0,0 +1,118 @@
+# ./models/game/story_ai_cache.py
+
+import hashlib
+import json
+import logging
+import os
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from config import Config
+from models.db import collection
+from models.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+def make_cache_key(model: str, messages: List[Dict], tools: Optional[List[Dict]], tool_choice: Optional[Dict]) -> str:
+    """Build a content-addressed key for a chat completion request"""
+    payload = json.dumps(
+        {'model': model, 'messages': messages, 'tools': tools, 'tool_choice': tool_choice},
+        sort_keys=True,
+        separators=(',', ':')
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class ResponseCache(ABC):
+    """Base class for AI response cache backends. Values are JSON-serializable response dicts."""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Dict]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, response: Dict) -> None:
+        ...
+
+class MemoryResponseCache(ResponseCache):
+    """In-process LRU backend"""
+
+    def __init__(self, max_entries: int, ttl: int):
+        self._cache = LRUCache(max_entries=max_entries, ttl=ttl)
+
+    def get(self, key: str) -> Optional[Dict]:
+        return self._cache.get(key)
+
+    def set(self, key: str, response: Dict) -> None:
+        self._cache.set(key, response)
+
+class DiskResponseCache(ResponseCache):
+    """On-disk backend storing one JSON file per response, expired by file age"""
+
+    def __init__(self, directory: str, ttl: int):
+        self.directory = directory
+        self.ttl = ttl
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict]:
+        path = self._path(key)
+        try:
+            if self.ttl and time.time() - os.path.getmtime(path) > self.ttl:
+                os.remove(path)
+                return None
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def set(self, key: str, response: Dict) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temp file first so concurrent readers never see a partial file
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(response, f)
+        os.replace(tmp_path, path)
+
+class MongoResponseCache(ResponseCache):
+    """MongoDB backend, expired by a TTL index on created_at (created by `flask init-db`)"""
+
+    def __init__(self):
+        self.collection = collection('ai_response_cache')
+
+    def get(self, key: str) -> Optional[Dict]:
+        doc = self.collection.find_one({'_id': key}, {'response': 1})
+        return doc['response'] if doc else None
+
+    def set(self, key: str, response: Dict) -> None:
+        self.collection.update_one(
+            {'_id': key},
+            {'$set': {'response': response, 'created_at': datetime.utcnow()}},
+            upsert=True
+        )
+
+_response_cache: Optional[ResponseCache] = None
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Get the configured response cache, or None if caching is disabled"""
+    global _response_cache
+
+    backend = Config.AI_CACHE_BACKEND
+    if not backend:
+        return None
+
+    if _response_cache is None:
+        if backend == 'memory':
+            _response_cache = MemoryResponseCache(Config.AI_CACHE_MAX_ENTRIES, Config.AI_CACHE_TTL)
+        elif backend == 'disk':
+            _response_cache = DiskResponseCache(Config.AI_CACHE_DIR, Config.AI_CACHE_TTL)
+        elif backend == 'mongo':
+            _response_cache = MongoResponseCache()
+        else:
+            raise ValueError(f"Unknown AI cache backend: {backend}")
+        logger.info(f"AI response cache enabled with '{backend}' backend")
+
+    return _response_cache
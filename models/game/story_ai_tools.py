@@ -1,5 +1,7 @@
 # ./models/game/story_ai_tools.py
 
+import copy
+
 # Base story tools without options
 STORY_TOOLS = [{
     "type": "function",
@@ -301,3 +303,19 @@ GENERATE_CAST_TOOLS = [{
         }
     }
 }]
+
+
+def _cast_group_tools(properties: list) -> list:
+    """GENERATE_CAST_TOOLS narrowed to some of its properties"""
+    tool = copy.deepcopy(GENERATE_CAST_TOOLS[0])
+    parameters = tool["function"]["parameters"]
+    parameters["properties"] = {name: parameters["properties"][name] for name in properties}
+    parameters["required"] = [name for name in parameters["required"] if name in properties]
+    return [tool]
+
+# The initial cast is generated as independent groups, requested in parallel
+CAST_GROUPS = {
+    "family": ["parents", "siblings"],
+    "school": ["teachers", "classmates"]
+}
+GENERATE_CAST_GROUP_TOOLS = {group: _cast_group_tools(properties) for group, properties in CAST_GROUPS.items()}
@@ -1,17 +1,30 @@
 # ./models/game/story_ai_utils.py
 
 import logging
+import sys
+import threading
+import time
 import traceback
+from contextlib import contextmanager
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import List, Optional, TYPE_CHECKING
 from bson import ObjectId
-from openai import OpenAI, OpenAIError
+from flask import has_request_context, request
 import json
 from typing import Dict, List, Tuple
 
+from config import Config
 import models.user as user_module
 import models.game.life as life_module
+import models.game.story_ai_cache as ai_cache
+from monitoring import llm_telemetry, logging_setup, metrics, request_timing
 from models.game.enums import Difficulty
+import models.game.traits as traits
+
+# openai takes most of the app's import time, so it is only imported on first use
+if TYPE_CHECKING:
+    from openai import OpenAI
+    from openai.types.chat import ChatCompletion
 
 logger = logging.getLogger(__name__)
 
@@ -23,7 +36,7 @@ class StoryResponse:
     options: Optional[List[str]]
     character_ids: Optional[List[ObjectId]]
 
-def create_openai_client(life: 'life_module.Life') -> tuple[OpenAI, str]:
+def create_openai_client(life: 'life_module.Life') -> tuple['OpenAI', str]:
     """Create an OpenAI client for the given life's user
     
     Args:
@@ -36,17 +49,186 @@ def create_openai_client(life: 'life_module.Life') -> tuple[OpenAI, str]:
         ValueError: If no API key is available
         OpenAIError: If client creation fails
     """
+    from openai import OpenAI
+
     try:
         user = user_module.User.get_by_id(life.user_id)
         if not user or not user.openai_api_key:
             raise ValueError("No OpenAI API key available")
             
-        return OpenAI(api_key=user.openai_api_key), user.gpt_model
+        # Retries are handled (and counted) by create_chat_completion
+        client = OpenAI(api_key=user.openai_api_key, base_url=Config.OPENAI_BASE_URL, max_retries=0)
+        return client, user.gpt_model
         
     except Exception as e:
         logger.error(f"Error creating OpenAI client: {str(e)}\n{traceback.format_exc()}")
         raise
 
+def _retryable_errors() -> tuple:
+    """Errors worth retrying; anything else fails the call immediately"""
+    from openai import APIConnectionError, RateLimitError, InternalServerError
+    return (APIConnectionError, RateLimitError, InternalServerError)
+
+_in_flight_calls = 0
+_in_flight_done = threading.Condition()
+
+@contextmanager
+def _track_in_flight():
+    global _in_flight_calls
+    with _in_flight_done:
+        _in_flight_calls += 1
+    try:
+        yield
+    finally:
+        with _in_flight_done:
+            _in_flight_calls -= 1
+            _in_flight_done.notify_all()
+
+def llm_calls_in_flight() -> int:
+    """Number of chat completions this process is waiting on"""
+    return _in_flight_calls
+
+def wait_for_llm_calls(timeout: float) -> bool:
+    """Block until no chat completions are in progress (e.g. on shutdown). Returns False on timeout."""
+    with _in_flight_done:
+        return _in_flight_done.wait_for(lambda: _in_flight_calls == 0, timeout)
+
+def _create_streamed_completion(client: 'OpenAI', **kwargs) -> Tuple['ChatCompletion', float]:
+    """Make a streamed chat completion call and reassemble it into a ChatCompletion
+    
+    Returns:
+        Tuple of (response, time to first token in seconds)
+    """
+    start = time.perf_counter()
+    time_to_first_token = None
+    completion = {'id': None, 'created': 0, 'model': kwargs['model'], 'usage': None}
+    content = ''
+    tool_calls: Dict[int, Dict] = {}
+    finish_reason = None
+
+    stream = client.chat.completions.create(stream=True, stream_options={'include_usage': True}, **kwargs)
+    for chunk in stream:
+        completion.update(id=chunk.id, created=chunk.created, model=chunk.model)
+        if chunk.usage:
+            completion['usage'] = chunk.usage.model_dump()
+
+        for choice in chunk.choices:
+            if time_to_first_token is None:
+                time_to_first_token = time.perf_counter() - start
+            finish_reason = choice.finish_reason or finish_reason
+            delta = choice.delta
+            if delta.content:
+                content += delta.content
+            for tool_call in delta.tool_calls or []:
+                entry = tool_calls.setdefault(tool_call.index, {
+                    'id': None, 'type': 'function', 'function': {'name': '', 'arguments': ''}
+                })
+                if tool_call.id:
+                    entry['id'] = tool_call.id
+                if tool_call.function:
+                    entry['function']['name'] += tool_call.function.name or ''
+                    entry['function']['arguments'] += tool_call.function.arguments or ''
+
+    from openai.types.chat import ChatCompletion
+
+    response = ChatCompletion.model_validate({
+        **completion,
+        'object': 'chat.completion',
+        'choices': [{
+            'index': 0,
+            'finish_reason': finish_reason or 'stop',
+            'message': {
+                'role': 'assistant',
+                'content': content or None,
+                'tool_calls': [tool_calls[i] for i in sorted(tool_calls)] or None
+            }
+        }]
+    })
+    return response, time_to_first_token
+
+def create_chat_completion(client: 'OpenAI', model: str, messages: List[Dict],
+                           tools: List[Dict], tool_choice: Dict,
+                           function_name: str, life: Optional['life_module.Life'] = None) -> 'ChatCompletion':
+    """Make a chat completion call with retries, response caching and telemetry
+    
+    Args:
+        client: Configured OpenAI client
+        model: Model name
+        messages: Chat messages
+        tools: Tool definitions
+        tool_choice: Forced tool choice
+        function_name: Name of the calling story_ai function, for telemetry
+        life: Life the call is made for, for telemetry
+        
+    Returns:
+        ChatCompletion: The API response (or an identical cached copy)
+    """
+    tags = {
+        'function': function_name,
+        'model': model,
+        'life_id': life._id if life else None,
+        'user_id': life.user_id if life else None,
+        'prompt_chars': sum(len(m.get('content') or '') for m in messages),
+        'endpoint': request.endpoint if has_request_context() else None
+    }
+
+    log_payloads = logging_setup.sample_ai_payload()
+    if log_payloads:
+        logging_setup.log_ai_payload('request', function_name, messages)
+
+    cache = ai_cache.get_response_cache()
+    key = None
+    if cache is not None:
+        key = ai_cache.make_cache_key(model, messages, tools, tool_choice)
+        cached = cache.get(key)
+        metrics.record_cache_lookup('ai_response', cached is not None)
+        if cached is not None:
+            from openai.types.chat import ChatCompletion
+
+            logger.info(f"AI response cache hit for {function_name} ({key[:12]})")
+            response = ChatCompletion.model_validate(cached)
+            llm_telemetry.record_llm_call(**tags, response=response, cache_hit=True)
+            return response
+
+    start = time.perf_counter()
+    retries = 0
+    time_to_first_token = None
+    with request_timing.llm_timer(), _track_in_flight(), \
+            metrics.LLM_IN_FLIGHT.labels(function_name).track_inprogress():
+        while True:
+            try:
+                if Config.OPENAI_STREAM:
+                    response, time_to_first_token = _create_streamed_completion(
+                        client, model=model, messages=messages, tools=tools, tool_choice=tool_choice
+                    )
+                else:
+                    response = client.chat.completions.create(
+                        model=model, messages=messages, tools=tools, tool_choice=tool_choice
+                    )
+                break
+            except _retryable_errors() as e:
+                if retries >= Config.OPENAI_MAX_RETRIES:
+                    llm_telemetry.record_llm_call(**tags, wall_time=time.perf_counter() - start,
+                                                  retries=retries, error=type(e).__name__)
+                    raise
+                retries += 1
+                delay = min(8.0, 0.5 * 2 ** retries)
+                logger.warning(f"Retrying {function_name} in {delay}s after {type(e).__name__} (attempt {retries})")
+                time.sleep(delay)
+            except Exception as e:
+                llm_telemetry.record_llm_call(**tags, wall_time=time.perf_counter() - start,
+                                              retries=retries, error=type(e).__name__)
+                raise
+
+    llm_telemetry.record_llm_call(**tags, response=response, wall_time=time.perf_counter() - start,
+                                  time_to_first_token=time_to_first_token, retries=retries)
+    if log_payloads:
+        logging_setup.log_ai_payload('response', function_name, response.model_dump_json())
+
+    if cache is not None:
+        cache.set(key, response.model_dump(mode='json'))
+    return response
+
 def clean_text_for_json(text: str) -> str:
     """Clean text to ensure it's valid for JSON encoding
     
@@ -60,19 +242,23 @@ def clean_text_for_json(text: str) -> str:
         return ""
     return text
 
+def _is_openai_error(e: Exception) -> bool:
+    # If openai was never imported, the error can't have come from it
+    openai = sys.modules.get('openai')
+    return openai is not None and isinstance(e, openai.OpenAIError)
+
 def handle_openai_error(func):
     """Decorator to standardize OpenAI error handling with logging"""
     def wrapper(*args, **kwargs):
         try:
             return func(*args, **kwargs)
-        except OpenAIError as e:
-            logger.error(f"OpenAI API error in {func.__name__}: {str(e)}\n{traceback.format_exc()}")
-            raise
-        except ValueError as e:
-            logger.error(f"Value error in {func.__name__}: {str(e)}\n{traceback.format_exc()}")
-            raise
         except Exception as e:
-            logger.error(f"Unexpected error in {func.__name__}: {str(e)}\n{traceback.format_exc()}")
+            if _is_openai_error(e):
+                logger.error(f"OpenAI API error in {func.__name__}: {str(e)}\n{traceback.format_exc()}")
+            elif isinstance(e, ValueError):
+                logger.error(f"Value error in {func.__name__}: {str(e)}\n{traceback.format_exc()}")
+            else:
+                logger.error(f"Unexpected error in {func.__name__}: {str(e)}\n{traceback.format_exc()}")
             raise
     return wrapper
 
@@ -107,6 +293,51 @@ def parse_openai_response(response, function_name: str) -> dict:
         logger.error(f"Error parsing OpenAI response: {str(e)}\n{traceback.format_exc()}")
         raise ValueError(f"Failed to parse AI response: {str(e)}")
     
+def validate_tool_arguments(arguments: dict, tool: dict) -> None:
+    """Check parsed tool call arguments against the tool's parameter schema
+    
+    Supports the parts of JSON Schema our tools use: type, properties, required,
+    items, minItems/maxItems and minimum/maximum.
+    
+    Raises:
+        ValueError: Listing every mismatch found
+    """
+    errors = []
+    _validate_value(arguments, tool["function"]["parameters"], tool["function"]["name"], errors)
+    if errors:
+        raise ValueError(f"Invalid {tool['function']['name']} response: {'; '.join(errors)}")
+
+_JSON_TYPES = {'object': dict, 'array': list, 'string': str, 'integer': int, 'number': (int, float), 'boolean': bool}
+
+def _validate_value(value, schema: dict, path: str, errors: List[str]) -> None:
+    expected = schema.get('type')
+    if expected:
+        # bool is an int subclass, but never a valid integer here
+        if not isinstance(value, _JSON_TYPES[expected]) or (isinstance(value, bool) and expected != 'boolean'):
+            errors.append(f"{path} should be {expected}")
+            return
+
+    if expected == 'object':
+        for name in schema.get('required', []):
+            if name not in value:
+                errors.append(f"{path}.{name} is missing")
+        for name, subschema in schema.get('properties', {}).items():
+            if name in value:
+                _validate_value(value[name], subschema, f"{path}.{name}", errors)
+    elif expected == 'array':
+        if 'minItems' in schema and len(value) < schema['minItems']:
+            errors.append(f"{path} has {len(value)} items, expected at least {schema['minItems']}")
+        if 'maxItems' in schema and len(value) > schema['maxItems']:
+            errors.append(f"{path} has {len(value)} items, expected at most {schema['maxItems']}")
+        if 'items' in schema:
+            for index, item in enumerate(value):
+                _validate_value(item, schema['items'], f"{path}[{index}]", errors)
+    elif expected in ('integer', 'number'):
+        if 'minimum' in schema and value < schema['minimum']:
+            errors.append(f"{path} is {value}, below the minimum of {schema['minimum']}")
+        if 'maximum' in schema and value > schema['maximum']:
+            errors.append(f"{path} is {value}, above the maximum of {schema['maximum']}")
+
 def calculate_weighted_trait_value(old_value: int, calculated_value: int, importance: int, permanence: int) -> int:
     """Calculate new trait value using weighted average.
     
@@ -119,14 +350,7 @@ def calculate_weighted_trait_value(old_value: int, calculated_value: int, import
     Returns:
         New trait value (0-100)
     """
-    # Start with weight of 12 and subtract importance and permanence
-    old_value_weight = 8 - importance - permanence
-    
-    # Weighted average
-    new_value = (calculated_value + (old_value * old_value_weight)) / (1 + old_value_weight)
-    
-    # Ensure result is between 0 and 100
-    return max(0, min(100, round(new_value)))
+    return traits.weighted_trait_values([old_value], [calculated_value], importance, permanence)[0]
 
 def calculate_trait_change_stress(primary_traits: Dict[str, int], analyzed_traits: List[Dict]) -> int:
     """Calculate stress from trait differences.
@@ -138,16 +362,10 @@ def calculate_trait_change_stress(primary_traits: Dict[str, int], analyzed_trait
     Returns:
         Stress value from trait differences (0-100)
     """
-    total_difference = 0
-    for trait in analyzed_traits:
-        current_value = primary_traits.get(trait['name'], 0)
-        calculated_value = trait['calculated_value']
-        difference = abs(current_value - calculated_value)
-        total_difference += difference
-    
-    # Divide by 6 (number of primary traits) to normalize the stress value
-    #return min(100, round(total_difference / 6))
-    return total_difference
+    return traits.trait_change_stress(
+        [primary_traits.get(trait['name'], 0) for trait in analyzed_traits],
+        [trait['calculated_value'] for trait in analyzed_traits]
+    )
 
 def adjust_trait_stress_for_difficulty(stress: int, difficulty: Difficulty) -> int:
     """Adjust trait-based stress based on difficulty setting.
@@ -159,11 +377,7 @@ def adjust_trait_stress_for_difficulty(stress: int, difficulty: Difficulty) -> i
     Returns:
         Adjusted stress value (0-100)
     """
-    if difficulty == Difficulty.STORY:
-        return round(stress / 2)
-    elif difficulty == Difficulty.CHALLENGING:
-        return min(100, round(stress * 2))
-    return stress  # No adjustment for BALANCED difficulty
+    return traits.adjust_trait_stress(stress, difficulty)
 
 def calculate_final_stress(current_stress: int, story_stress: int, 
                          trait_stress: int, difficulty: Difficulty) -> int:
@@ -182,13 +396,7 @@ def calculate_final_stress(current_stress: int, story_stress: int,
     adjusted_trait_stress = adjust_trait_stress_for_difficulty(trait_stress, difficulty)
     
     # Weights: current_stress(5), story_stress(3), trait_stress(1)
-    weighted_value = (
-        (current_stress * 5) + 
-        (story_stress * 3) + 
-        (adjusted_trait_stress * 1)
-    ) / 9
-    
-    return max(0, min(100, round(weighted_value)))
+    return traits.final_stress(current_stress, story_stress, adjusted_trait_stress)
 
 def process_trait_analysis(
     current_traits: Dict[str, int],
@@ -210,59 +418,44 @@ def process_trait_analysis(
         - trait_changes: List of dicts with name and final change value
     """
     calculated_traits = []
-    trait_changes = []
     
     logger.debug(f"Analyzing traits: {analyzed_traits}")
     logger.debug(f"Current traits: {current_traits}")
 
-    try:
-        for trait_analysis in analyzed_traits:
-            if isinstance(trait_analysis, str):
-                logger.error(f"Received string instead of dict for trait analysis: {trait_analysis}")
-                continue
-                
-            if not isinstance(trait_analysis, dict):
-                logger.error(f"Invalid trait analysis type: {type(trait_analysis)}")
-                continue
-                
-            try:
-                name = trait_analysis.get('name')
-                calculated_value = trait_analysis.get('calculated_value')
-                reasoning = trait_analysis.get('reasoning')
-                
-                if not all([name, calculated_value is not None, reasoning]):
-                    logger.error(f"Missing required fields in trait analysis: {trait_analysis}")
-                    continue
-                
-                current_value = current_traits.get(name, 0)
-                
-                # Calculate new value using weighted average
-                new_value = calculate_weighted_trait_value(
-                    current_value, 
-                    calculated_value,
-                    importance,
-                    permanence
-                )
-                
-                # Store the calculated trait analysis
-                calculated_traits.append({
-                    'name': name,
-                    'calculated_value': calculated_value,
-                    'reasoning': reasoning
-                })
-                
-                # Store the actual change that will be applied
-                trait_changes.append({
-                    'name': name,
-                    'value': new_value - current_value
-                })
-                
-            except Exception as e:
-                logger.error(f"Error processing trait analysis: {str(e)}\nTrait data: {trait_analysis}")
-                continue
-            
-    except Exception as e:
-        logger.error(f"Error in process_trait_analysis: {str(e)}")
+    # Keep the well-formed analyses, then calculate all new values in one pass
+    for trait_analysis in analyzed_traits:
+        if not isinstance(trait_analysis, dict):
+            logger.error(f"Invalid trait analysis type: {type(trait_analysis)}: {trait_analysis}")
+            continue
+
+        name = trait_analysis.get('name')
+        calculated_value = trait_analysis.get('calculated_value')
+        reasoning = trait_analysis.get('reasoning')
+
+        if not all([name, calculated_value is not None, reasoning]) or not isinstance(calculated_value, (int, float)):
+            logger.error(f"Missing required fields in trait analysis: {trait_analysis}")
+            continue
+
+        # Store the calculated trait analysis
+        calculated_traits.append({
+            'name': name,
+            'calculated_value': calculated_value,
+            'reasoning': reasoning
+        })
+
+    current_values = [current_traits.get(trait['name'], 0) for trait in calculated_traits]
+    new_values = traits.weighted_trait_values(
+        current_values,
+        [trait['calculated_value'] for trait in calculated_traits],
+        importance,
+        permanence
+    )
+
+    # Store the actual changes that will be applied
+    trait_changes = [
+        {'name': trait['name'], 'value': new_value - current_value}
+        for trait, current_value, new_value in zip(calculated_traits, current_values, new_values)
+    ]
 
     return calculated_traits, trait_changes
 
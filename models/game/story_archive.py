@@ -0,0 +1,179 @@
+# ./models/game/story_archive.py
+"""
+Keeps the stories collections proportional to active play.
+
+Completed stories older than STORY_ARCHIVE_AFTER_DAYS move to stories_archive as
+a compressed transcript: the beats and responses that view_memory shows for a
+memory's source story. Their prompt pointer, options and memory params are
+dropped. Deleted stories have no memory that shows them, so they are removed
+with their beats. Prompts that no story points at anymore are then removed from
+story_prompts.
+
+Each worker runs a pass every STORY_ARCHIVE_INTERVAL seconds; a lease makes sure
+only one of them does the work.
+"""
+
+import json
+import logging
+import os
+import random
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from bson import Binary, ObjectId
+from dataclasses import dataclass, field
+
+from config import Config
+from models import jobs
+from models.db import collection
+from models.game.story import StoryStatus, stories, story_beats, story_prompts, Story
+
+logger = logging.getLogger(__name__)
+
+stories_archive = collection('stories_archive')
+
+# Prompts younger than this are never collected: a story stores its prompt before it points at it
+PROMPT_GC_GRACE = timedelta(hours=1)
+
+@dataclass
+class ArchivedStory:
+    """The part of a completed story that outlives it: its transcript"""
+    life_id: ObjectId
+    beats: List[Tuple[str, Optional[str]]]
+    resulting_memory_id: Optional[ObjectId] = None
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    archived_at: datetime = field(default_factory=datetime.utcnow)
+    _id: ObjectId = field(default_factory=ObjectId)
+
+    def to_dict(self) -> Dict:
+        return {
+            '_id': self._id,
+            'life_id': self.life_id,
+            'transcript': Binary(zlib.compress(json.dumps(self.beats).encode('utf-8'))),
+            'resulting_memory_id': self.resulting_memory_id,
+            'created_at': self.created_at,
+            'archived_at': self.archived_at
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'ArchivedStory':
+        beats = json.loads(zlib.decompress(data['transcript']).decode('utf-8'))
+        return cls(
+            _id=data['_id'],
+            life_id=data['life_id'],
+            beats=[(beat, response) for beat, response in beats],
+            resulting_memory_id=data.get('resulting_memory_id'),
+            created_at=data.get('created_at', datetime.utcnow()),
+            archived_at=data.get('archived_at', datetime.utcnow())
+        )
+
+    @classmethod
+    def from_story(cls, story: Story) -> 'ArchivedStory':
+        return cls(
+            _id=story._id,
+            life_id=story.life_id,
+            beats=story.beats,
+            resulting_memory_id=story.resulting_memory_id,
+            created_at=story.created_at
+        )
+
+    @staticmethod
+    def get_by_id(story_id: ObjectId) -> Optional['ArchivedStory']:
+        data = stories_archive.find_one({'_id': story_id})
+        return ArchivedStory.from_dict(data) if data else None
+
+def get_story_transcript(story_id: ObjectId):
+    """A story or its archived transcript; either has .life_id and .beats"""
+    return Story.get_by_id(story_id) or ArchivedStory.get_by_id(story_id)
+
+def archive_stories(older_than: timedelta, batch_size: int = 100) -> Tuple[int, int]:
+    """Archive completed stories and remove deleted ones last updated before older_than ago.
+    Returns (archived, deleted). Safe to interrupt and rerun: a story is only removed
+    after its archive copy is written."""
+    cutoff = datetime.utcnow() - older_than
+    archived = deleted = 0
+
+    while True:
+        batch = list(stories.find(
+            {'status': StoryStatus.COMPLETED.value, 'last_updated': {'$lt': cutoff}},
+            {'prompt': 0}
+        ).limit(batch_size))
+        if not batch:
+            break
+        for story_data in batch:
+            story = Story.from_dict(story_data, None if 'beats' in story_data else Story.load_beats(story_data['_id']))
+            stories_archive.replace_one({'_id': story._id}, ArchivedStory.from_story(story).to_dict(), upsert=True)
+        story_ids = [story_data['_id'] for story_data in batch]
+        story_beats.delete_many({'story_id': {'$in': story_ids}})
+        stories.delete_many({'_id': {'$in': story_ids}})
+        archived += len(batch)
+
+    while True:
+        story_ids = [story_data['_id'] for story_data in stories.find(
+            {'status': StoryStatus.DELETED.value, 'last_updated': {'$lt': cutoff}},
+            {'_id': 1}
+        ).limit(batch_size)]
+        if not story_ids:
+            break
+        story_beats.delete_many({'story_id': {'$in': story_ids}})
+        stories.delete_many({'_id': {'$in': story_ids}})
+        deleted += len(story_ids)
+
+    return archived, deleted
+
+def collect_unused_prompts(batch_size: int = 500) -> int:
+    """Remove stored prompts that no story points at. Returns the number removed."""
+    removed = 0
+    last_id = ''
+    cutoff = datetime.utcnow() - PROMPT_GC_GRACE
+    while True:
+        prompt_ids = [data['_id'] for data in story_prompts.find(
+            {'_id': {'$gt': last_id}, 'created_at': {'$lt': cutoff}}, {'_id': 1}
+        ).sort('_id', 1).limit(batch_size)]
+        if not prompt_ids:
+            return removed
+        last_id = prompt_ids[-1]
+        in_use = set(stories.distinct('prompt_id', {'prompt_id': {'$in': prompt_ids}}))
+        unused = [prompt_id for prompt_id in prompt_ids if prompt_id not in in_use]
+        if unused:
+            removed += story_prompts.delete_many({'_id': {'$in': unused}}).deleted_count
+
+def run_archive_pass() -> None:
+    """Archive old stories, then collect the prompts they no longer use"""
+    archived, deleted = archive_stories(timedelta(days=Config.STORY_ARCHIVE_AFTER_DAYS))
+    removed_prompts = collect_unused_prompts()
+    if archived or deleted or removed_prompts:
+        logger.info(f"Archived {archived} stories, removed {deleted} deleted stories "
+                    f"and {removed_prompts} unused prompts")
+
+_archiver_thread: Optional[threading.Thread] = None
+_archiver_lock = threading.Lock()
+
+def start_archiver() -> None:
+    """Start the periodic archival thread in this process (once per worker)"""
+    global _archiver_thread
+    if Config.STORY_ARCHIVE_INTERVAL <= 0:
+        return
+    with _archiver_lock:
+        if _archiver_thread is None or not _archiver_thread.is_alive():
+            _archiver_thread = threading.Thread(target=_run_archiver, name='story-archiver', daemon=True)
+            _archiver_thread.start()
+
+def _run_archiver() -> None:
+    # Workers start together; spread their first passes out
+    time.sleep(random.uniform(0, Config.STORY_ARCHIVE_INTERVAL))
+    while True:
+        try:
+            if jobs.acquire_lease('story_archive', Config.STORY_ARCHIVE_INTERVAL):
+                run_archive_pass()
+        except Exception as e:
+            logger.error(f"Story archival failed: {str(e)}")
+        time.sleep(Config.STORY_ARCHIVE_INTERVAL)
+
+def _reset_after_fork() -> None:
+    global _archiver_thread
+    _archiver_thread = None
+
+os.register_at_fork(after_in_child=_reset_after_fork)
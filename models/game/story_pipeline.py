@@ -0,0 +1,236 @@
+# ./models/game/story_pipeline.py
+"""
+Background stages that generate stories before the player asks for them.
+
+New lives: the new_life request only saves the life and starts setup_life, which
+generates the initial cast and then the first-day story. Progress is recorded in
+Life.setup_status, so the progress page can poll it and a failed or interrupted
+setup can be resumed.
+
+Story queues: each life has a queue of up to PREPARED_STORY_QUEUE_SIZE story
+openings (PreparedStory), tagged with a fingerprint of the life state they were
+built from. One is generated right after each memory; with PREPARED_STORY_FILL,
+the rest are topped up by a filler thread in each worker when it is idle (and,
+optionally, only within PREPARED_STORY_FILL_HOURS), skipping lives mid-story. new_story pops an entry only while the life is still
+in that state (traits, stress, season, memories), and generates the story live
+otherwise.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from config import Config
+from models import jobs
+import models.game.life as life_module
+import models.game.story_ai_utils as ai_utils
+from models.game.character import Character, characters
+from models.game.enums import SetupStatus
+from models.game.memory import memories
+from models.game.prepared_story import PreparedStory
+from models.game.story import Story, StoryStatus, stories
+from models.game.story_ai import begin_story, generate_initial_cast
+
+logger = logging.getLogger(__name__)
+
+def first_day_seed(life: 'life_module.Life') -> str:
+    return (f"This is {life.name}'s first day at Quillington High School. "
+            f"They and their family have just moved to town over the summer. "
+            f"{life.name} doesn't know anyone at school yet. "
+            f"This story should focus on the nerves and excitement that accompany such an event, and introduce {life.name} to one or two characters.")
+
+def new_seeded_story(life: 'life_module.Life', custom_story_seed: str = "") -> Story:
+    """Generate and save a new story with an optional seed"""
+    # Get story beginning with custom seed
+    story_response = begin_story(life, custom_story_seed)
+
+    # Create new story object
+    story = Story(
+        life_id=life._id,
+        prompt=story_response.prompt,
+        beats=[(story_response.story_text, None)],
+        current_options=story_response.options,
+        character_ids=story_response.character_ids
+    )
+    story.save()
+
+    return story
+
+def start_life_setup(life: 'life_module.Life') -> None:
+    """Queue the setup of a new (or failed) life; the life must already be saved"""
+    jobs.submit(f"setup_life {life._id}", setup_life, life._id)
+
+def setup_life(life_id) -> None:
+    """Generate the initial cast, then the first story. Stages already done are skipped,
+    so this also resumes a setup that failed or was interrupted."""
+    life = life_module.Life.get_by_id(life_id)
+    if not life:
+        return
+
+    if not Character.get_by_life_id(life_id):
+        if not life.set_setup_status(SetupStatus.CAST):
+            return
+        try:
+            generate_initial_cast(life)
+        except Exception as e:
+            logger.error(f"Error generating initial cast: {str(e)}")
+            life.set_setup_status(SetupStatus.FAILED)
+            return
+
+    if not life.set_setup_status(SetupStatus.STORY):
+        # The life was deleted while its cast was being generated
+        characters.delete_many({'life_id': life_id})
+        return
+
+    if not Story.get_by_life_id(life_id, load_beats=False):
+        try:
+            new_seeded_story(life, first_day_seed(life))
+        except Exception as e:
+            logger.error(f"Error creating initial story: {str(e)}")
+            # Continue anyway - not having an initial story isn't catastrophic
+
+    life.set_setup_status(SetupStatus.READY)
+    logger.info(f"Finished setting up life {life_id}")
+
+def setup_stalled(life: 'life_module.Life') -> bool:
+    """Whether an unfinished setup has made no progress for LIFE_SETUP_TIMEOUT (e.g. its worker died)"""
+    if life.setup_status not in (SetupStatus.CAST, SetupStatus.STORY):
+        return False
+    return datetime.utcnow() - life.last_played > timedelta(seconds=Config.LIFE_SETUP_TIMEOUT)
+
+def life_state_fingerprint(life: 'life_module.Life') -> str:
+    """Hash of the life state that story openings are generated from"""
+    state = {
+        'age': life.age,
+        'life_stage': life.life_stage.value,
+        'season': life.current_season.value,
+        'year': life.current_year,
+        'stress': life.current_stress,
+        'primary_traits': sorted((t.name, t.value) for t in life.primary_traits),
+        'secondary_traits': sorted((t.name, t.value) for t in life.secondary_traits),
+        'memories': memories.count_documents({'life_id': life._id})
+    }
+    return hashlib.sha256(json.dumps(state, sort_keys=True).encode('utf-8')).hexdigest()
+
+def queue_next_story(life: 'life_module.Life') -> None:
+    """Start generating the life's next story opening in the background"""
+    if Config.PREWARM_NEXT_STORY:
+        jobs.submit(f"prewarm_next_story {life._id}", prepare_stories, life._id, 1)
+
+def prepare_stories(life_id, limit: int, while_idle: bool = False) -> int:
+    """Add up to limit story openings to the life's queue, without going over
+    PREPARED_STORY_QUEUE_SIZE. Entries from an older life state are dropped first.
+    Returns the number of stories generated."""
+    life = life_module.Life.get_by_id(life_id)
+    if not life or life.setup_status != SetupStatus.READY:
+        return 0
+
+    fingerprint = life_state_fingerprint(life)
+    PreparedStory.delete_stale(life._id, fingerprint)
+    wanted = min(limit, Config.PREPARED_STORY_QUEUE_SIZE - PreparedStory.count(life._id, fingerprint))
+
+    generated = 0
+    while generated < wanted and not (while_idle and not is_off_peak()):
+        story_response = begin_story(life, "")
+        PreparedStory(
+            life_id=life._id,
+            fingerprint=fingerprint,
+            prompt=story_response.prompt,
+            story_text=story_response.story_text,
+            options=story_response.options,
+            character_ids=story_response.character_ids
+        ).save()
+        generated += 1
+
+    if generated:
+        logger.info(f"Prepared {generated} stories for life {life_id}")
+    return generated
+
+def take_prepared_story(life: 'life_module.Life') -> Optional[Story]:
+    """Start the oldest queued story, if one was built from the life's current state"""
+    prepared = PreparedStory.take(life._id, life_state_fingerprint(life))
+    if not prepared:
+        return None
+
+    story = Story(
+        life_id=life._id,
+        prompt=prepared.prompt,
+        beats=[(prepared.story_text, None)],
+        current_options=prepared.options,
+        character_ids=prepared.character_ids
+    )
+    story.save()
+    return story
+
+def is_off_peak() -> bool:
+    """Whether this process may spend time filling story queues: inside the
+    PREPARED_STORY_FILL_HOURS window (UTC) and not busy with players' requests"""
+    if Config.PREPARED_STORY_FILL_HOURS:
+        start, end = Config.PREPARED_STORY_FILL_HOURS
+        hour = datetime.utcnow().hour
+        in_window = start <= hour < end if start <= end else (hour >= start or hour < end)
+        if not in_window:
+            return False
+    return jobs.pending() == 0 and ai_utils.llm_calls_in_flight() <= Config.PREPARED_STORY_FILL_MAX_LLM_CALLS
+
+def fill_story_queues() -> int:
+    """One pass of the off-peak filler over recently played lives. Returns the number of stories generated."""
+    since = datetime.utcnow() - timedelta(hours=Config.PREPARED_STORY_ACTIVE_HOURS)
+    recent_lives = life_module.lives.find(
+        {'last_played': {'$gt': since}, 'archived': {'$ne': True}, 'deleted_at': None,
+         'setup_status': {'$nin': [SetupStatus.CAST.value, SetupStatus.STORY.value, SetupStatus.FAILED.value]}},
+        {'_id': 1}
+    ).sort('last_played', -1)
+
+    generated = 0
+    for life_data in recent_lives:
+        if not is_off_peak():
+            break
+        # A life mid-story gets a new state when the story ends, so openings built now would go stale
+        if stories.find_one({'life_id': life_data['_id'],
+                             'status': {'$in': [StoryStatus.ACTIVE.value, StoryStatus.CONCLUDED.value]}},
+                            {'_id': 1}):
+            continue
+        # Other workers run the same pass; only one fills each life at a time
+        if not PreparedStory.claim(life_data['_id'], Config.PREPARED_STORY_CLAIM_SECONDS):
+            continue
+        try:
+            generated += prepare_stories(life_data['_id'], Config.PREPARED_STORY_QUEUE_SIZE, while_idle=True)
+        except Exception as e:
+            logger.error(f"Error preparing stories for life {life_data['_id']}: {str(e)}")
+        finally:
+            PreparedStory.release(life_data['_id'])
+    return generated
+
+_filler_thread: Optional[threading.Thread] = None
+_filler_lock = threading.Lock()
+
+def start_queue_filler() -> None:
+    """Start the off-peak filler thread in this process (once per worker)"""
+    global _filler_thread
+    if not Config.PREPARED_STORY_FILL or Config.PREPARED_STORY_QUEUE_SIZE <= 0:
+        return
+    with _filler_lock:
+        if _filler_thread is None or not _filler_thread.is_alive():
+            _filler_thread = threading.Thread(target=_run_filler, name='story-queue-filler', daemon=True)
+            _filler_thread.start()
+
+def _run_filler() -> None:
+    while True:
+        time.sleep(Config.PREPARED_STORY_FILL_INTERVAL)
+        try:
+            if is_off_peak():
+                fill_story_queues()
+        except Exception as e:
+            logger.error(f"Story queue filler failed: {str(e)}")
+
+def _reset_after_fork() -> None:
+    global _filler_thread
+    _filler_thread = None
+
+os.register_at_fork(after_in_child=_reset_after_fork)
@@ -1,5 +1,9 @@
 # ./models/game/trait_descriptions.py
 
+from typing import Dict, Iterable, Tuple
+
+from .base import Trait
+
 TRAIT_DEFINITIONS = {
     "Curiosity": {
         "description": "Represents intellectual curiosity, creativity, and willingness to try new things. Higher levels mean more innovative thinking and adaptability. Influences learning speed and discovery of new opportunities.",
@@ -93,6 +97,24 @@ TRAIT_DEFINITIONS = {
     }
 }
 
+def _compile_levels(trait_name: str, levels: Dict[Tuple[int, int], str]) -> Tuple[str, ...]:
+    """Expand a trait's level ranges into one description per value from 0 to 100.
+    Raises ValueError unless the ranges cover 0-100 without gaps or overlaps."""
+    table = []
+    for min_val, max_val in sorted(levels):
+        if min_val != len(table) or max_val < min_val:
+            raise ValueError(f"Level ranges for {trait_name} have a gap or overlap at ({min_val}, {max_val})")
+        table.extend([levels[(min_val, max_val)]] * (max_val - min_val + 1))
+    if len(table) != 101:
+        raise ValueError(f"Level ranges for {trait_name} must end at 100, not {len(table) - 1}")
+    return tuple(table)
+
+# Description for every value of every trait, indexed [trait_name][value]
+TRAIT_LEVEL_DESCRIPTIONS = {
+    trait_name: _compile_levels(trait_name, definition["levels"])
+    for trait_name, definition in TRAIT_DEFINITIONS.items()
+}
+
 def get_trait_description(trait_name: str, value: int) -> str:
     """
     Get the description for a trait at a specific value level.
@@ -108,18 +130,37 @@ def get_trait_description(trait_name: str, value: int) -> str:
         KeyError: If trait_name is not recognized
         ValueError: If value is not between 0 and 100
     """
-    if trait_name not in TRAIT_DEFINITIONS:
+    if trait_name not in TRAIT_LEVEL_DESCRIPTIONS:
         raise KeyError(f"Unknown trait: {trait_name}")
         
     if not 0 <= value <= 100:
         raise ValueError(f"Trait value must be between 0 and 100, got {value}")
         
-    # Find the correct level range
-    for (min_val, max_val), description in TRAIT_DEFINITIONS[trait_name]["levels"].items():
-        if min_val <= value <= max_val:
-            return description
-            
-    return "Invalid trait level"  # Should never reach this due to value check above
+    return TRAIT_LEVEL_DESCRIPTIONS[trait_name][value]
+
+def get_trait_descriptions(traits: Iterable[Trait]) -> Dict[str, str]:
+    """
+    Get the level descriptions for a set of traits in one call.
+    
+    Args:
+        traits: Traits to describe (e.g., life.primary_traits); names without
+            level descriptions, such as secondary traits, are skipped
+    
+    Returns:
+        A dict of trait name to the description at that trait's value
+    
+    Raises:
+        ValueError: If a described trait's value is not between 0 and 100
+    """
+    descriptions = {}
+    for trait in traits:
+        levels = TRAIT_LEVEL_DESCRIPTIONS.get(trait.name)
+        if levels is None:
+            continue
+        if not 0 <= trait.value <= 100:
+            raise ValueError(f"Trait value must be between 0 and 100, got {trait.value} for {trait.name}")
+        descriptions[trait.name] = levels[trait.value]
+    return descriptions
 
 def get_trait_base_description(trait_name: str) -> str:
     """
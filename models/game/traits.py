@@ -0,0 +1,172 @@
+# ./models/game/traits.py
+"""
+Trait containers used by Life, and the trait and stress rules as whole-vector operations.
+
+Primary traits are a fixed-width array indexed by PRIMARY_TRAITS; secondary traits
+are a dict keyed by name (in insertion order). Both iterate as Trait objects, so
+code that reads `life.primary_traits` / `life.secondary_traits` as lists of traits
+(prompts, templates, to_dict) works unchanged. Traits yielded by iteration are
+snapshots: change values through the container's methods.
+"""
+
+import operator
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+from .base import Trait
+from .enums import Difficulty
+
+# Define primary traits
+PRIMARY_TRAITS = [
+    "Curiosity",    # intellectual curiosity, creativity, and willingness to try new things
+    "Discipline",   # self-control, organization, and dedication
+    "Confidence",   # self-assurance and social comfort
+    "Empathy",      # emotional intelligence and understanding of others
+    "Resilience",   # emotional stability and stress management
+    "Ambition"      # drive, goal-setting, and determination
+]
+PRIMARY_TRAIT_INDEX = {name: index for index, name in enumerate(PRIMARY_TRAITS)}
+
+TRAIT_MIN = 0
+TRAIT_MAX = 100
+STRESS_MIN = 0
+STRESS_MAX = 100
+
+# Rule parameters (scripts/simulate.py starts from these when sweeping them)
+TRAIT_WEIGHT_BASE = 8  # weight of the old value is TRAIT_WEIGHT_BASE - importance - permanence
+STRESS_WEIGHTS = (5, 3, 1)  # current stress, story stress, trait-change stress
+TRAIT_STRESS_MULTIPLIER = {
+    Difficulty.STORY: 0.5,
+    Difficulty.BALANCED: 1.0,
+    Difficulty.CHALLENGING: 2.0
+}
+MEMORY_AGING_CHANCE = 0.5  # chance per season that an importance-2, permanence-2 memory fades to permanence 1
+
+def clamp(value: int, low: int = TRAIT_MIN, high: int = TRAIT_MAX) -> int:
+    return low if value < low else high if value > high else value
+
+class PrimaryTraitVector:
+    """Primary trait values in PRIMARY_TRAITS order, stored as a compact array"""
+
+    __slots__ = ('values',)
+
+    def __init__(self, values: Optional[Iterable[int]] = None):
+        self.values = array('h', values if values is not None else [0] * len(PRIMARY_TRAITS))
+
+    @classmethod
+    def from_traits(cls, traits: Iterable[Trait]) -> 'PrimaryTraitVector':
+        """Build from Trait objects; names outside PRIMARY_TRAITS are ignored"""
+        vector = cls()
+        for trait in traits:
+            index = PRIMARY_TRAIT_INDEX.get(trait.name)
+            if index is not None:
+                vector.values[index] = trait.value
+        return vector
+
+    @staticmethod
+    def impact_vector(impacts: Iterable[Trait]) -> array:
+        """Per-trait deltas for a list of impacts. Repeated names are summed; unknown names are ignored."""
+        deltas = array('h', [0] * len(PRIMARY_TRAITS))
+        for impact in impacts:
+            index = PRIMARY_TRAIT_INDEX.get(impact.name)
+            if index is not None:
+                deltas[index] += impact.value
+        return deltas
+
+    def apply(self, deltas: Sequence[int]) -> None:
+        """Add a delta vector, clamping every trait to [TRAIT_MIN, TRAIT_MAX]"""
+        self.values = array('h', map(clamp, map(operator.add, self.values, deltas)))
+
+    def get(self, name: str, default: int = 0) -> int:
+        index = PRIMARY_TRAIT_INDEX.get(name)
+        return self.values[index] if index is not None else default
+
+    def as_dict(self) -> Dict[str, int]:
+        return dict(zip(PRIMARY_TRAITS, self.values))
+
+    def copy(self) -> 'PrimaryTraitVector':
+        return PrimaryTraitVector(self.values)
+
+    def __iter__(self) -> Iterator[Trait]:
+        return map(Trait, PRIMARY_TRAITS, self.values)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, PrimaryTraitVector) and self.values == other.values
+
+    def __repr__(self) -> str:
+        return f"PrimaryTraitVector({self.as_dict()})"
+
+class SecondaryTraitSet:
+    """Secondary trait values keyed by name, in the order the traits were gained"""
+
+    __slots__ = ('values',)
+
+    def __init__(self, values: Optional[Dict[str, int]] = None):
+        self.values: Dict[str, int] = dict(values) if values else {}
+
+    @classmethod
+    def from_traits(cls, traits: Iterable[Trait]) -> 'SecondaryTraitSet':
+        return cls({trait.name: trait.value for trait in traits})
+
+    def modify(self, modifications: Iterable[Trait]) -> None:
+        """Add to the values of traits the life already has (others are ignored), clamped to [TRAIT_MIN, TRAIT_MAX]"""
+        values = self.values
+        for trait in modifications:
+            if trait.name in values:
+                values[trait.name] = clamp(values[trait.name] + trait.value)
+
+    def add(self, additions: Iterable[Trait]) -> None:
+        """Gain new traits; traits the life already has are left unchanged"""
+        values = self.values
+        for trait in additions:
+            values.setdefault(trait.name, trait.value)
+
+    def get(self, name: str, default: int = 0) -> int:
+        return self.values.get(name, default)
+
+    def copy(self) -> 'SecondaryTraitSet':
+        return SecondaryTraitSet(self.values)
+
+    def __iter__(self) -> Iterator[Trait]:
+        return map(Trait, self.values.keys(), self.values.values())
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.values
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, SecondaryTraitSet) and self.values == other.values
+
+    def __repr__(self) -> str:
+        return f"SecondaryTraitSet({self.values})"
+
+def weighted_trait_values(old_values: Sequence[int], calculated_values: Sequence[int],
+                          importance: int, permanence: int) -> List[int]:
+    """New trait values as a weighted average of old and AI-calculated values, clamped to [TRAIT_MIN, TRAIT_MAX]"""
+    old_weight = TRAIT_WEIGHT_BASE - importance - permanence
+    divisor = 1 + old_weight
+    return [clamp(round((calculated + old * old_weight) / divisor))
+            for old, calculated in zip(old_values, calculated_values)]
+
+def trait_change_stress(current_values: Sequence[int], calculated_values: Sequence[int]) -> int:
+    """Stress from how far the calculated trait values are from the current ones"""
+    return sum(map(abs, map(operator.sub, current_values, calculated_values)))
+
+def adjust_trait_stress(stress: int, difficulty: Difficulty) -> int:
+    """Scale trait-change stress by difficulty"""
+    multiplier = TRAIT_STRESS_MULTIPLIER[difficulty]
+    adjusted = round(stress * multiplier)
+    # Only amplified stress is capped
+    return min(STRESS_MAX, adjusted) if multiplier > 1 else adjusted
+
+def final_stress(current_stress: int, story_stress: int, adjusted_trait_stress: int) -> int:
+    """Weighted average of current, story and (difficulty-adjusted) trait stress"""
+    current_weight, story_weight, trait_weight = STRESS_WEIGHTS
+    weighted_value = (current_stress * current_weight + story_stress * story_weight
+                      + adjusted_trait_stress * trait_weight) / sum(STRESS_WEIGHTS)
+    return clamp(round(weighted_value), STRESS_MIN, STRESS_MAX)
@@ -0,0 +1,158 @@
+# ./models/invalidation.py
+"""
+Cross-process cache invalidation.
+
+Per-process caches register a callback for a collection, and every worker then hears
+about writes made by any process:
+- change_stream: one change stream over the watched collections (needs a replica set)
+- poll: each worker queries for documents whose updated_at moved since its last poll.
+  Deletes are invisible to polling, so caches must also expire entries (TTL).
+INVALIDATION_BACKEND 'auto' uses change streams when the server supports them.
+
+Callbacks are called as callback(doc_id, fields) on the bus thread. fields holds what is
+known about the change (the updated fields, the inserted document, or the polled
+_id/updated_at/version/life_id/user_id) and is None for deletes. doc_id is None when
+changes may have been missed, and the callback should then drop everything it caches.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+from config import Config
+from models import db
+
+logger = logging.getLogger(__name__)
+
+WATCHED_COLLECTIONS = ('lives', 'memories', 'characters', 'stories', 'sessions')
+
+# Fields returned by the polling backend
+POLL_PROJECTION = {'updated_at': 1, 'version': 1, 'life_id': 1, 'user_id': 1}
+
+# Change stream resume point is too old for the oplog
+CHANGE_STREAM_HISTORY_LOST = 286
+
+Callback = Callable[[Any, Optional[Dict]], None]
+
+_callbacks: Dict[str, List[Callback]] = defaultdict(list)
+_thread: Optional[threading.Thread] = None
+_lock = threading.Lock()
+backend_in_use: Optional[str] = None
+
+def register(collection_name: str, callback: Callback) -> None:
+    """Call callback for every write to collection_name made by any process"""
+    if collection_name not in WATCHED_COLLECTIONS:
+        raise ValueError(f"Collection {collection_name} is not watched for invalidations")
+    _callbacks[collection_name].append(callback)
+
+def ensure_started() -> None:
+    """Start the bus thread in this process if it isn't running. Cheap to call on every cache read."""
+    global _thread
+    if _thread is not None and _thread.is_alive():
+        return
+    if Config.INVALIDATION_BACKEND == 'none':
+        return
+    with _lock:
+        if _thread is None or not _thread.is_alive():
+            _thread = threading.Thread(target=_run, name='cache-invalidation', daemon=True)
+            _thread.start()
+
+def _dispatch(collection_name: str, doc_id: Any, fields: Optional[Dict]) -> None:
+    for callback in _callbacks.get(collection_name, ()):
+        try:
+            callback(doc_id, fields)
+        except Exception as e:
+            logger.error(f"Invalidation callback for {collection_name} failed: {str(e)}")
+
+def _dispatch_all() -> None:
+    for collection_name in list(_callbacks):
+        _dispatch(collection_name, None, None)
+
+def _run() -> None:
+    backend = Config.INVALIDATION_BACKEND
+    if backend in ('auto', 'change_stream'):
+        if _watch_changes():
+            return
+        if backend == 'change_stream':
+            logger.error("Change streams are not supported by this MongoDB server; polling instead")
+    _poll_updates()
+
+def _watch_changes() -> bool:
+    """Tail a change stream until the process exits. Returns False if change streams are unsupported."""
+    global backend_in_use
+    pipeline = [{'$match': {
+        'ns.coll': {'$in': list(_callbacks)},
+        'operationType': {'$in': ['insert', 'update', 'replace', 'delete']}
+    }}]
+    resume_token = None
+    while True:
+        try:
+            with db.get_db().watch(pipeline, resume_after=resume_token) as stream:
+                backend_in_use = 'change_stream'
+                logger.info(f"Cache invalidation using change streams on {', '.join(_callbacks)}")
+                for change in stream:
+                    resume_token = stream.resume_token
+                    operation = change['operationType']
+                    if operation == 'update':
+                        fields = change['updateDescription']['updatedFields']
+                    elif operation in ('insert', 'replace'):
+                        fields = change['fullDocument']
+                    else:
+                        fields = None
+                    _dispatch(change['ns']['coll'], change['documentKey']['_id'], fields)
+        except OperationFailure as e:
+            if resume_token is None:
+                logger.info(f"Change streams unavailable: {str(e)}")
+                return False
+            logger.warning(f"Invalidation change stream failed: {str(e)}")
+            if e.code == CHANGE_STREAM_HISTORY_LOST:
+                resume_token = None
+            _dispatch_all()
+            time.sleep(5)
+        except PyMongoError as e:
+            # Resuming from the last token replays anything written while disconnected
+            logger.warning(f"Invalidation change stream interrupted: {str(e)}")
+            time.sleep(5)
+
+def _poll_updates() -> None:
+    """Poll updated_at stamps until the process exits"""
+    global backend_in_use
+    backend_in_use = 'poll'
+    interval = Config.INVALIDATION_POLL_INTERVAL
+    # Look back further than one interval to tolerate clock skew between app servers
+    overlap = timedelta(seconds=max(5.0, 2 * interval))
+    logger.info(f"Cache invalidation polling {', '.join(_callbacks)} every {interval}s")
+
+    since = datetime.utcnow()
+    seen: Dict[Tuple[str, Any], datetime] = {}
+    while True:
+        time.sleep(interval)
+        now = datetime.utcnow()
+        current: Dict[Tuple[str, Any], datetime] = {}
+        for collection_name in list(_callbacks):
+            try:
+                for doc in db.get_collection(collection_name).find(
+                        {'updated_at': {'$gt': since - overlap}}, POLL_PROJECTION):
+                    key = (collection_name, doc['_id'])
+                    current[key] = doc['updated_at']
+                    # Skip changes already reported by the previous (overlapping) poll
+                    if seen.get(key) != doc['updated_at']:
+                        _dispatch(collection_name, doc['_id'], doc)
+            except PyMongoError as e:
+                logger.warning(f"Invalidation poll of {collection_name} failed: {str(e)}")
+                _dispatch(collection_name, None, None)
+        seen = current
+        since = now
+
+def _reset_after_fork() -> None:
+    global _thread, backend_in_use
+    _thread = None
+    backend_in_use = None
+
+os.register_at_fork(after_in_child=_reset_after_fork)
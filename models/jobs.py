@@ -0,0 +1,83 @@
+# ./models/jobs.py
+"""
+Background jobs on a per-process thread pool.
+
+Jobs are fire-and-forget: exceptions are logged, not raised to the caller.
+Queued jobs are lost if the process dies, so a job must either be safe to lose
+or record its progress in the database so it can be resumed (see story_pipeline).
+Periodic work that every worker schedules takes a lease, so one worker does it.
+"""
+
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable
+
+from pymongo.errors import DuplicateKeyError
+
+from config import Config
+from models.db import collection
+from monitoring import metrics
+
+logger = logging.getLogger(__name__)
+
+job_leases = collection('job_leases')
+
+_executor = ThreadPoolExecutor(max_workers=Config.JOB_WORKERS, thread_name_prefix='job')
+_pending = 0
+_pending_done = threading.Condition()
+
+def submit(name: str, fn: Callable, *args, **kwargs) -> Future:
+    """Run fn(*args, **kwargs) in the background; name identifies the job in logs"""
+    global _pending
+    with _pending_done:
+        _pending += 1
+        metrics.JOB_QUEUE_DEPTH.labels('jobs').set(_pending)
+    return _executor.submit(_run, name, fn, *args, **kwargs)
+
+def _run(name: str, fn: Callable, *args, **kwargs) -> None:
+    global _pending
+    try:
+        fn(*args, **kwargs)
+    except Exception as e:
+        logger.exception(f"Background job {name} failed: {str(e)}")
+    finally:
+        with _pending_done:
+            _pending -= 1
+            metrics.JOB_QUEUE_DEPTH.labels('jobs').set(_pending)
+            if _pending == 0:
+                _pending_done.notify_all()
+
+def pending() -> int:
+    """Number of queued and running jobs"""
+    return _pending
+
+def wait_for_jobs(timeout: float) -> bool:
+    """Wait until queued and running jobs finish. Returns False on timeout."""
+    with _pending_done:
+        return _pending_done.wait_for(lambda: _pending == 0, timeout)
+
+def acquire_lease(name: str, seconds: float) -> bool:
+    """Take the named lease for seconds, across all processes. Returns False if another
+    process holds it. Leases are not released; they expire."""
+    now = datetime.utcnow()
+    try:
+        job_leases.update_one(
+            {'_id': name, 'expires_at': {'$lte': now}},
+            {'$set': {'expires_at': now + timedelta(seconds=seconds), 'pid': os.getpid()}},
+            upsert=True
+        )
+        return True
+    except DuplicateKeyError:
+        return False
+
+def _reset_after_fork() -> None:
+    # The parent's pool threads don't exist in a forked child
+    global _executor, _pending, _pending_done
+    _executor = ThreadPoolExecutor(max_workers=Config.JOB_WORKERS, thread_name_prefix='job')
+    _pending = 0
+    _pending_done = threading.Condition()
+
+os.register_at_fork(after_in_child=_reset_after_fork)
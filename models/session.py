@@ -1,19 +1,79 @@
 # ./models/session.py
 
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import Optional, Dict, Any, List
 from bson import ObjectId
-from pymongo import MongoClient
+from itsdangerous import BadSignature, URLSafeSerializer
 from config import Config
+from models.cache import LRUCache
+from models.db import collection
 from .utils import validate_object_id, DatabaseError
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-client = MongoClient(Config.MONGO_URI)
-db = client[Config.DB_NAME]
-sessions = db.sessions
+sessions = collection('sessions')
+# Only used with SESSION_BACKEND = 'signed'
+session_revocations = collection('session_revocations')
+
+_MISSING = object()
+
+class RevocationList:
+    """Checks signed tokens against the session_revocations collection.
+
+    Holds revoked session ids (logout) and, per user, the time before which all of
+    their tokens are revoked (a new login replaces every older session). Each check
+    is one lookup by _id for the token's session and user, and the answer is cached
+    in-process for SESSION_REVOCATION_REFRESH, so the collection is never loaded whole.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        # session_id -> revoked; user_id -> not_before (or None)
+        self._sessions = LRUCache(max_entries, Config.SESSION_REVOCATION_REFRESH, name='session_revocations')
+        self._users = LRUCache(max_entries, Config.SESSION_REVOCATION_REFRESH)
+
+    def _load(self, session_id: str, user_id: ObjectId) -> None:
+        revoked, not_before = False, None
+        for doc in session_revocations.find(
+                {'_id': {'$in': [f"session:{session_id}", f"user:{user_id}"]}}, {'not_before': 1}):
+            if doc['_id'].startswith('session:'):
+                revoked = True
+            else:
+                not_before = doc['not_before']
+        self._sessions.set(session_id, revoked)
+        self._users.set(user_id, not_before)
+
+    def is_revoked(self, session_id: str, user_id: ObjectId, issued_at: datetime) -> bool:
+        revoked = self._sessions.get(session_id, _MISSING)
+        not_before = self._users.peek(user_id, _MISSING)
+        if revoked is _MISSING or not_before is _MISSING:
+            self._load(session_id, user_id)
+            revoked, not_before = self._sessions.peek(session_id, False), self._users.peek(user_id)
+        return revoked or (not_before is not None and issued_at < not_before)
+
+    def revoke_session(self, session_id: str, expires_at: datetime) -> None:
+        session_revocations.update_one(
+            {'_id': f"session:{session_id}"},
+            {'$set': {'session_id': session_id, 'expires_at': expires_at}},
+            upsert=True
+        )
+        self._sessions.set(session_id, True)
+
+    def revoke_user(self, user_id: ObjectId) -> None:
+        now = datetime.utcnow()
+        session_revocations.update_one(
+            {'_id': f"user:{user_id}"},
+            {'$set': {'user_id': user_id, 'not_before': now, 'expires_at': now + Config.SESSION_LIFETIME}},
+            upsert=True
+        )
+        self._users.set(user_id, now)
+
+revocations = RevocationList()
+
+def _serializer() -> URLSafeSerializer:
+    # itsdangerous signs with the last key and accepts any of them, so keys can be rotated
+    return URLSafeSerializer(Config.SESSION_SIGNING_KEYS, salt='lifebyme-session')
 
 class Session:
     def __init__(self,
@@ -23,6 +83,8 @@ class Session:
                  created_at: Optional[datetime] = None,
                  last_accessed: Optional[datetime] = None,
                  ip_address: Optional[str] = None,
+                 updated_at: Optional[datetime] = None,
+                 expires_at: Optional[datetime] = None,
                  _id: Optional[Any] = None):
         self._id = _id if isinstance(_id, ObjectId) else ObjectId()
         self.session_id = session_id
@@ -33,6 +95,11 @@ class Session:
         self.created_at = created_at or datetime.utcnow()
         self.last_accessed = last_accessed or datetime.utcnow()
         self.ip_address = ip_address
+        self.updated_at = updated_at or self.created_at  # changes other than access times
+        # Mongo removes the document once this passes (TTL index)
+        self.expires_at = expires_at or self.last_accessed + Config.SESSION_LIFETIME
+        # What goes in the cookie: the session id, or a signed token for the 'signed' backend
+        self.token = session_id
 
     @classmethod
     def from_db_dict(cls, data: Dict[str, Any]) -> Optional['Session']:
@@ -53,11 +120,51 @@ class Session:
             'current_life_id': self.current_life_id,
             'created_at': self.created_at,
             'last_accessed': self.last_accessed,
-            'ip_address': self.ip_address
+            'ip_address': self.ip_address,
+            'updated_at': self.updated_at,
+            'expires_at': self.expires_at
         }
 
+    def sign(self) -> str:
+        """Issue a signed token carrying this session's state ('signed' backend)"""
+        self.token = _serializer().dumps({
+            'sid': self.session_id,
+            'uid': str(self.user_id),
+            'lid': str(self.current_life_id) if self.current_life_id else None,
+            'iat': self.created_at.replace(tzinfo=timezone.utc).timestamp(),
+            'acc': self.last_accessed.replace(tzinfo=timezone.utc).timestamp(),
+            'exp': self.expires_at.replace(tzinfo=timezone.utc).timestamp()
+        })
+        return self.token
+
+    @staticmethod
+    def from_token(token: str) -> Optional['Session']:
+        """Verify a signed token. Returns None if it is forged, expired or revoked."""
+        try:
+            data = _serializer().loads(token)
+        except BadSignature:
+            return None
+
+        expires_at = datetime.utcfromtimestamp(data['exp'])
+        if expires_at <= datetime.utcnow():
+            return None
+
+        session = Session(
+            session_id=data['sid'],
+            user_id=data['uid'],
+            current_life_id=data['lid'],
+            created_at=datetime.utcfromtimestamp(data['iat']),
+            last_accessed=datetime.utcfromtimestamp(data.get('acc', data['iat'])),
+            expires_at=expires_at
+        )
+        if revocations.is_revoked(session.session_id, session.user_id, session.created_at):
+            return None
+        session.token = token
+        return session
+
     @staticmethod
     def create(session_id: str, user_id: Any, ip_address: str) -> 'Session':
+        """Start a session, ending any others the user has. Store the returned session's token in the cookie."""
         # Clean up any existing sessions for this user
         Session.cleanup_user_sessions(user_id)
         
@@ -66,6 +173,10 @@ class Session:
             user_id=user_id if isinstance(user_id, ObjectId) else validate_object_id(str(user_id)),
             ip_address=ip_address
         )
+
+        if Config.SESSION_BACKEND == 'signed':
+            session.sign()
+            return session
         
         try:
             result = sessions.insert_one(session.to_db_dict())
@@ -77,34 +188,55 @@ class Session:
 
     @staticmethod
     def get_by_session_id(session_id: str) -> Optional['Session']:
+        """Look up a session by the value stored in the cookie"""
+        if Config.SESSION_BACKEND == 'signed':
+            try:
+                session = Session.from_token(session_id)
+            except Exception as e:
+                raise DatabaseError(f"Database error: {str(e)}")
+            # Reissuing the token extends it; the caller stores the new session.token in the cookie
+            if session and datetime.utcnow() - session.last_accessed >= Config.SESSION_TOUCH_INTERVAL:
+                session.update_access()
+            return session
+
         try:
-            session_data = sessions.find_one({'session_id': session_id})
+            # The TTL monitor only runs once a minute, so skip expired sessions it hasn't removed yet
+            session_data = sessions.find_one({
+                'session_id': session_id,
+                'expires_at': {'$gt': datetime.utcnow()}
+            })
             session = Session.from_db_dict(session_data)
-            
-            if session and session.is_valid():
+
+            # Extending the expiry is a write, so only do it every SESSION_TOUCH_INTERVAL
+            if session and datetime.utcnow() - session.last_accessed >= Config.SESSION_TOUCH_INTERVAL:
                 session.update_access()
-                return session
-            
-            if session:
-                session.delete()
-            return None
+            return session
         except Exception as e:
             raise DatabaseError(f"Database error: {str(e)}")
 
     def update_access(self) -> None:
-        """Update the last accessed time"""
+        """Update the last accessed time and push back the expiry"""
+        new_time = datetime.utcnow()
+        expires_at = new_time + Config.SESSION_LIFETIME
+        if Config.SESSION_BACKEND == 'signed':
+            self.last_accessed = new_time
+            self.expires_at = expires_at
+            self.sign()
+            return
+
         try:
-            new_time = datetime.utcnow()
             result = sessions.update_one(
                 {'session_id': self.session_id},
                 {
                     '$set': {
-                        'last_accessed': new_time
+                        'last_accessed': new_time,
+                        'expires_at': expires_at
                     }
                 }
             )
             if result.matched_count > 0:
                 self.last_accessed = new_time
+                self.expires_at = expires_at
             else:
                 raise DatabaseError("Session not found in database")
         except Exception as e:
@@ -112,11 +244,7 @@ class Session:
 
     def is_valid(self) -> bool:
         """Check if the session is still valid (not expired)"""
-        if not self.last_accessed:
-            return False
-        
-        expiry_time = self.last_accessed + Config.SESSION_LIFETIME
-        return datetime.utcnow() <= expiry_time
+        return datetime.utcnow() <= self.expires_at
 
     @staticmethod
     def cleanup_user_sessions(user_id: Any) -> None:
@@ -126,30 +254,44 @@ class Session:
         
         try:
             sessions.delete_many({'user_id': user_id})
+            if Config.SESSION_BACKEND == 'signed':
+                revocations.revoke_user(user_id)
         except Exception as e:
             raise DatabaseError(f"Database error: {str(e)}")
 
     @staticmethod
-    def cleanup_expired_sessions() -> None:
-        """Remove all expired sessions from the database"""
+    def backfill_expires_at() -> int:
+        """Give sessions created before expires_at existed an expiry, so the TTL index removes them"""
         try:
-            expiry_time = datetime.utcnow() - Config.SESSION_LIFETIME
-            sessions.delete_many({'last_accessed': {'$lt': expiry_time}})
+            result = sessions.update_many(
+                {'expires_at': {'$exists': False}},
+                [{'$set': {'expires_at': {'$add': [
+                    '$last_accessed', int(Config.SESSION_LIFETIME.total_seconds() * 1000)
+                ]}}}]
+            )
+            return result.modified_count
         except Exception as e:
             raise DatabaseError(f"Database error: {str(e)}")
 
     def update_current_life(self, life_id: Any) -> None:
-        """Update the current life ID for this session"""
+        """Update the current life ID for this session. The cookie must then be updated to self.token."""
         if isinstance(life_id, str):
             life_id = validate_object_id(life_id)
+
+        if Config.SESSION_BACKEND == 'signed':
+            self.current_life_id = life_id
+            self.sign()
+            return
                 
         try:
+            now = datetime.utcnow()
             result = sessions.update_one(
                 {'session_id': self.session_id},
                 {
                     '$set': {
                         'current_life_id': life_id,
-                        'last_accessed': datetime.utcnow()
+                        'last_accessed': now,
+                        'updated_at': now
                     }
                 }
             )
@@ -159,7 +301,8 @@ class Session:
             
             # Update the instance variables
             self.current_life_id = life_id
-            self.last_accessed = datetime.utcnow()
+            self.last_accessed = now
+            self.updated_at = now
             
         except Exception as e:
             logger.error(f"Error updating current life: {str(e)}")
@@ -167,6 +310,13 @@ class Session:
 
     def delete(self) -> None:
         """Delete this session from the database"""
+        if Config.SESSION_BACKEND == 'signed':
+            try:
+                revocations.revoke_session(self.session_id, self.expires_at)
+                return
+            except Exception as e:
+                raise DatabaseError(f"Database error: {str(e)}")
+
         try:
             result = sessions.delete_one({'session_id': self.session_id})
             if not result.deleted_count:
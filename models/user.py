@@ -3,14 +3,12 @@
 from datetime import datetime
 from typing import Optional, Dict, Any
 from bson import ObjectId
-from pymongo import MongoClient
 from werkzeug.security import generate_password_hash, check_password_hash
 from config import Config
+from models.db import collection
 from .utils import validate_object_id, DatabaseError
 
-client = MongoClient(Config.MONGO_URI)
-db = client[Config.DB_NAME]
-users = db.users
+users = collection('users')
 
 class User:
     def __init__(self, 
@@ -0,0 +1,167 @@
+# ./monitoring/llm_telemetry.py
+
+import atexit
+import logging
+import queue
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from config import Config
+from models.db import collection
+from monitoring import metrics
+
+logger = logging.getLogger(__name__)
+
+llm_calls = collection('llm_calls')
+
+# Bucket boundaries used when summarizing calls
+LATENCY_BUCKETS = [0.5, 1, 2, 4, 8, 15, 30, 60]  # seconds
+TOKEN_BUCKETS = [500, 1000, 2000, 4000, 8000, 16000, 32000, 64000]
+
+def extract_usage(response: Any) -> Dict[str, int]:
+    """Pull token counts out of a ChatCompletion's usage block"""
+    usage = getattr(response, 'usage', None)
+    if usage is None:
+        return {'prompt_tokens': 0, 'completion_tokens': 0, 'cached_tokens': 0}
+
+    details = getattr(usage, 'prompt_tokens_details', None)
+    return {
+        'prompt_tokens': usage.prompt_tokens or 0,
+        'completion_tokens': usage.completion_tokens or 0,
+        'cached_tokens': (getattr(details, 'cached_tokens', None) or 0) if details else 0
+    }
+
+class TelemetryWriter:
+    """Buffers LLM call records and writes them to Mongo in batches on a background thread"""
+
+    def __init__(self, max_queue: int = 10000, batch_size: int = 100, flush_interval: float = 2.0):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._queue: 'queue.Queue[Optional[Dict]]' = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, record: Dict) -> None:
+        """Queue a record without blocking; drops it if the queue is full"""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+        metrics.JOB_QUEUE_DEPTH.labels('llm_telemetry').set(self._queue.qsize())
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='llm-telemetry', daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch: List[Dict] = []
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+                if item is None:
+                    stopping = True
+                else:
+                    batch.append(item)
+                while len(batch) < self.batch_size and not stopping:
+                    item = self._queue.get_nowait()
+                    if item is None:
+                        stopping = True
+                    else:
+                        batch.append(item)
+            except queue.Empty:
+                pass
+
+            metrics.JOB_QUEUE_DEPTH.labels('llm_telemetry').set(self._queue.qsize())
+            if batch:
+                try:
+                    llm_calls.insert_many(batch, ordered=False)
+                except Exception as e:
+                    logger.error(f"Failed to write {len(batch)} LLM telemetry records: {str(e)}")
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Flush pending records and stop the writer thread"""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout)
+
+_writer = TelemetryWriter()
+atexit.register(_writer.close)
+
+def close() -> None:
+    """Flush queued records (e.g. when a worker exits)"""
+    _writer.close()
+
+def record_llm_call(function: str, model: str, life_id: Any = None, user_id: Any = None,
+                    response: Any = None, wall_time: float = 0.0,
+                    time_to_first_token: Optional[float] = None, retries: int = 0,
+                    error: Optional[str] = None, cache_hit: bool = False,
+                    prompt_chars: int = 0, endpoint: Optional[str] = None) -> Dict:
+    """Record one chat completion call. Returns the record that was queued."""
+    record = {
+        'function': function,
+        'endpoint': endpoint,
+        'life_id': life_id,
+        'user_id': user_id,
+        'model': model,
+        **extract_usage(response),
+        'prompt_chars': prompt_chars,
+        'wall_time': wall_time,
+        'time_to_first_token': time_to_first_token,
+        'retries': retries,
+        'error': error,
+        'cache_hit': cache_hit,
+        'created_at': datetime.utcnow()
+    }
+
+    metrics.observe_llm_call(record)
+    if Config.LLM_TELEMETRY_ENABLED:
+        _writer.submit(dict(record))
+    return record
+
+def summarize_llm_calls(since: Optional[datetime] = None) -> Dict[str, Any]:
+    """Summarize recorded calls as latency and prompt-size histograms per function,
+    plus the lives with the largest prompts"""
+    match = {'cache_hit': False, 'error': None}
+    if since:
+        match['created_at'] = {'$gte': since}
+
+    def histogram(field: str, boundaries: List[float]) -> Dict[str, List[Dict]]:
+        return {
+            function: list(llm_calls.aggregate([
+                {'$match': {**match, 'function': function}},
+                {'$bucket': {
+                    'groupBy': f'${field}',
+                    'boundaries': [0] + boundaries,
+                    'default': f'>{boundaries[-1]}',
+                    'output': {'count': {'$sum': 1}}
+                }}
+            ]))
+            for function in llm_calls.distinct('function', match)
+        }
+
+    top_lives = list(llm_calls.aggregate([
+        {'$match': match},
+        {'$group': {
+            '_id': '$life_id',
+            'calls': {'$sum': 1},
+            'avg_prompt_tokens': {'$avg': '$prompt_tokens'},
+            'max_prompt_tokens': {'$max': '$prompt_tokens'},
+            'total_tokens': {'$sum': {'$add': ['$prompt_tokens', '$completion_tokens']}}
+        }},
+        {'$sort': {'max_prompt_tokens': -1}},
+        {'$limit': 20}
+    ]))
+
+    return {
+        'latency': histogram('wall_time', LATENCY_BUCKETS),
+        'prompt_tokens': histogram('prompt_tokens', TOKEN_BUCKETS),
+        'top_lives': top_lives
+    }
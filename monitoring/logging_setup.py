@@ -0,0 +1,155 @@
+# ./monitoring/logging_setup.py
+"""
+Non-blocking logging.
+
+Request threads only put records on a bounded in-memory queue (QueueHandler);
+a single QueueListener thread formats them and does the file/console I/O.
+If the queue is full, records are dropped rather than blocking the request.
+
+AI prompts and responses go to the separate 'lifebyme.ai_payloads' logger at
+DEBUG level. It does not propagate to the root logger and writes to its own file,
+sampled (AI_PAYLOAD_LOG_SAMPLE_RATE) and truncated (AI_PAYLOAD_LOG_MAX_CHARS).
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Any, List, Optional
+
+from config import Config
+
+AI_PAYLOAD_LOGGER = 'lifebyme.ai_payloads'
+
+# Attributes every LogRecord has; anything else was passed via extra={...}
+_RESERVED_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+_listeners: List[QueueListener] = []
+_configured = False
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line, including any extra fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'thread': record.threadName
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exc_info'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that never blocks: drops records when the queue is full"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Render the message and traceback on the calling thread, while args and
+        # exc_info are still valid; extra fields are kept for the JSON formatter
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.message = record.getMessage()
+        record.msg, record.args, record.exc_info = record.message, None, None
+        return record
+
+def _make_formatter() -> logging.Formatter:
+    if Config.LOG_JSON:
+        return JsonFormatter()
+    return logging.Formatter(fmt=Config.LOG_FORMAT, datefmt=Config.LOG_DATE_FORMAT)
+
+def _start_listener(logger: logging.Logger, handlers: List[logging.Handler]) -> DroppingQueueHandler:
+    formatter = _make_formatter()
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue: queue.Queue = queue.Queue(maxsize=Config.LOG_QUEUE_SIZE)
+    queue_handler = DroppingQueueHandler(log_queue)
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    _listeners.append(listener)
+
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    logger.addHandler(queue_handler)
+    return queue_handler
+
+def configure_logging() -> None:
+    """Route the root logger and the AI payload logger through background queue listeners"""
+    global _configured
+    if _configured:
+        return
+    _configured = True
+
+    log_dir = os.path.dirname(Config.LOG_FILE)
+    if log_dir:
+        os.makedirs(log_dir, exist_ok=True)
+
+    root = logging.getLogger()
+    root.setLevel(Config.LOG_LEVEL)
+    _start_listener(root, [
+        RotatingFileHandler(Config.LOG_FILE, maxBytes=10240000, backupCount=10),  # 10MB
+        logging.StreamHandler()
+    ])
+
+    payloads = logging.getLogger(AI_PAYLOAD_LOGGER)
+    payloads.propagate = False
+    if Config.AI_PAYLOAD_LOG_SAMPLE_RATE > 0:
+        payloads.setLevel(logging.DEBUG)
+        _start_listener(payloads, [
+            RotatingFileHandler(Config.AI_PAYLOAD_LOG_FILE, maxBytes=10240000, backupCount=5)
+        ])
+    else:
+        payloads.setLevel(logging.WARNING)
+
+def stop_logging() -> None:
+    """Flush queued records and stop the listener threads"""
+    while _listeners:
+        _listeners.pop().stop()
+
+def _restart_after_fork() -> None:
+    # Listener threads don't survive fork (e.g. gunicorn's preload), so a forked
+    # child starts its own with fresh queues
+    global _configured
+    if _configured:
+        _listeners.clear()
+        _configured = False
+        configure_logging()
+
+atexit.register(stop_logging)
+os.register_at_fork(after_in_child=_restart_after_fork)
+
+_payload_logger = logging.getLogger(AI_PAYLOAD_LOGGER)
+
+def sample_ai_payload() -> bool:
+    """Decide whether to log the payloads of one AI call"""
+    return _payload_logger.isEnabledFor(logging.DEBUG) and random.random() < Config.AI_PAYLOAD_LOG_SAMPLE_RATE
+
+def log_ai_payload(kind: str, function_name: str, payload: Any, max_chars: Optional[int] = None) -> None:
+    """Log a prompt or response at DEBUG, truncated to max_chars"""
+    text = payload if isinstance(payload, str) else json.dumps(payload, default=str)
+    max_chars = max_chars or Config.AI_PAYLOAD_LOG_MAX_CHARS
+    size = len(text)
+    if size > max_chars:
+        text = f"{text[:max_chars]}... [{size - max_chars} chars truncated]"
+    _payload_logger.debug(text, extra={'kind': kind, 'function': function_name, 'chars': size})
@@ -0,0 +1,191 @@
+# ./monitoring/metrics.py
+"""
+Prometheus metrics for the app.
+
+Works in three modes:
+- single process: metrics live in the default registry
+- multi-process (shared directory): set PROMETHEUS_MULTIPROC_DIR to an empty, writable
+  directory shared by all workers *before* the app starts; /metrics aggregates it
+- push: set METRICS_PUSHGATEWAY_URL and each process pushes its metrics periodically
+"""
+
+import hmac
+import logging
+import os
+import socket
+import threading
+import time
+from typing import Dict
+
+from flask import Flask, Response, abort, g, request
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge,
+                               Histogram, generate_latest, multiprocess, push_to_gateway)
+from pymongo import monitoring
+
+from config import Config
+from models import db
+
+logger = logging.getLogger(__name__)
+
+REQUEST_LATENCY = Histogram(
+    'lifebyme_http_request_duration_seconds',
+    'HTTP request latency',
+    ['blueprint', 'route', 'method', 'status'],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+)
+
+MONGO_COMMANDS = Counter(
+    'lifebyme_mongo_commands_total',
+    'Mongo commands executed',
+    ['collection', 'command', 'outcome']
+)
+
+MONGO_COMMAND_LATENCY = Histogram(
+    'lifebyme_mongo_command_duration_seconds',
+    'Mongo command latency',
+    ['command'],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+)
+
+LLM_IN_FLIGHT = Gauge(
+    'lifebyme_llm_in_flight',
+    'LLM calls currently in progress',
+    ['function'],
+    multiprocess_mode='livesum'
+)
+
+LLM_CALLS = Counter(
+    'lifebyme_llm_calls_total',
+    'LLM calls by outcome (ok, error, cache_hit)',
+    ['function', 'outcome']
+)
+
+LLM_TOKENS = Counter(
+    'lifebyme_llm_tokens_total',
+    'LLM tokens by kind (prompt, completion, cached)',
+    ['function', 'kind']
+)
+
+LLM_LATENCY = Histogram(
+    'lifebyme_llm_call_duration_seconds',
+    'LLM call wall time, including retries',
+    ['function'],
+    buckets=(0.5, 1, 2, 4, 8, 15, 30, 60, 120)
+)
+
+CACHE_REQUESTS = Counter(
+    'lifebyme_cache_requests_total',
+    'In-process cache lookups by result (hit, miss)',
+    ['cache', 'result']
+)
+
+JOB_QUEUE_DEPTH = Gauge(
+    'lifebyme_job_queue_depth',
+    'Items waiting in background queues',
+    ['queue'],
+    multiprocess_mode='livesum'
+)
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.labels(cache, 'hit' if hit else 'miss').inc()
+
+def observe_llm_call(record: Dict) -> None:
+    """Update LLM counters from a telemetry record (see llm_telemetry.record_llm_call)"""
+    function = record['function']
+    outcome = 'cache_hit' if record['cache_hit'] else 'error' if record['error'] else 'ok'
+    LLM_CALLS.labels(function, outcome).inc()
+
+    if record['cache_hit']:
+        return
+
+    LLM_LATENCY.labels(function).observe(record['wall_time'])
+    for kind in ('prompt', 'completion', 'cached'):
+        tokens = record[f'{kind}_tokens']
+        if tokens:
+            LLM_TOKENS.labels(function, kind).inc(tokens)
+
+class MetricsCommandListener(monitoring.CommandListener):
+    """Counts Mongo commands by collection and records their latency"""
+
+    def __init__(self):
+        self._collections: Dict[int, str] = {}
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        collection = event.command.get(event.command_name)
+        # Remember the collection so the completion event can be labelled
+        self._collections[event.request_id] = collection if isinstance(collection, str) else ''
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._finish(event, 'ok')
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._finish(event, 'error')
+
+    def _finish(self, event, outcome: str) -> None:
+        collection = self._collections.pop(event.request_id, '')
+        MONGO_COMMANDS.labels(collection, event.command_name, outcome).inc()
+        MONGO_COMMAND_LATENCY.labels(event.command_name).observe(event.duration_micros / 1e6)
+
+def install_mongo_listener() -> None:
+    """Attach the command listener to the shared Mongo client"""
+    db.add_event_listener(MetricsCommandListener())
+
+def _collect() -> bytes:
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+def _push_loop(url: str, interval: float) -> None:
+    grouping_key = {'instance': f"{socket.gethostname()}-{os.getpid()}"}
+    while True:
+        time.sleep(interval)
+        try:
+            push_to_gateway(url, job='lifebyme', registry=REGISTRY, grouping_key=grouping_key)
+        except Exception as e:
+            logger.warning(f"Failed to push metrics to {url}: {str(e)}")
+
+def start_push_thread() -> None:
+    """Start pushing this process's metrics to the Pushgateway. Call once per worker process."""
+    if not Config.METRICS_PUSHGATEWAY_URL:
+        return
+    thread = threading.Thread(
+        target=_push_loop,
+        args=(Config.METRICS_PUSHGATEWAY_URL, Config.METRICS_PUSH_INTERVAL),
+        name='metrics-push',
+        daemon=True
+    )
+    thread.start()
+
+def init_app(app: Flask) -> None:
+    """Add request metrics hooks to the app, and the /metrics endpoint if METRICS_AUTH_TOKEN is set"""
+
+    @app.before_request
+    def start_request_metrics():
+        g._metrics_start = time.perf_counter()
+
+    @app.after_request
+    def record_request_metrics(response):
+        start = g.pop('_metrics_start', None)
+        if start is not None:
+            REQUEST_LATENCY.labels(
+                request.blueprint or '',
+                request.url_rule.rule if request.url_rule else 'unmatched',
+                request.method,
+                str(response.status_code)
+            ).observe(time.perf_counter() - start)
+        return response
+
+    # /metrics shares the game's public port, so it is only served behind a token
+    if not Config.METRICS_AUTH_TOKEN:
+        logger.info("METRICS_AUTH_TOKEN is not set; /metrics is not served")
+        return
+
+    def metrics():
+        expected = f"Bearer {Config.METRICS_AUTH_TOKEN}"
+        if not hmac.compare_digest(request.headers.get('Authorization', ''), expected):
+            abort(403)
+        return Response(_collect(), mimetype=CONTENT_TYPE_LATEST)
+
+    app.add_url_rule('/metrics', 'metrics', metrics)
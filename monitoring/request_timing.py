@@ -0,0 +1,210 @@
+# ./monitoring/request_timing.py
+
+import contextvars
+import logging
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Optional
+
+from flask import Flask, before_render_template, g, request, template_rendered
+from pymongo import monitoring
+
+from config import Config
+from models import db
+
+logger = logging.getLogger(__name__)
+
+class _BusyTime:
+    """Wall-clock time during which at least one operation of a kind was in flight,
+    so overlapping operations on several threads are only counted once"""
+
+    def __init__(self):
+        self.seconds = 0.0
+        self._active = 0
+        self._since = 0.0
+
+    def start(self, now: float) -> None:
+        if self._active == 0:
+            self._since = now
+        self._active += 1
+
+    def stop(self, now: float) -> None:
+        if self._active == 0:
+            return  # started before this request was being timed
+        self._active -= 1
+        if self._active == 0:
+            self.seconds += now - self._since
+
+    def total(self, now: float) -> float:
+        return self.seconds + (now - self._since if self._active else 0.0)
+
+class RequestStats:
+    """Time breakdown for a single request.
+
+    Parallel reads and LLM calls update it from executor threads, so every update
+    takes the lock. DB and LLM time are wall-clock time with at least one command or
+    call in flight; they can still overlap each other, so 'python' is the remainder
+    clamped at zero rather than an exact measure."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.db_commands = 0
+        self.collections = Counter()
+        self.llm_calls = 0
+        self.template_time = 0.0
+        self._template_start: Optional[float] = None
+        self._db = _BusyTime()
+        self._llm = _BusyTime()
+        self._lock = threading.Lock()
+
+    @property
+    def total_time(self) -> float:
+        return time.perf_counter() - self.start
+
+    @property
+    def db_time(self) -> float:
+        with self._lock:
+            return self._db.total(time.perf_counter())
+
+    @property
+    def llm_time(self) -> float:
+        with self._lock:
+            return self._llm.total(time.perf_counter())
+
+    def db_started(self, collection: Optional[str]) -> None:
+        with self._lock:
+            self.db_commands += 1
+            if collection:
+                self.collections[collection] += 1
+            self._db.start(time.perf_counter())
+
+    def db_finished(self) -> None:
+        with self._lock:
+            self._db.stop(time.perf_counter())
+
+    def llm_started(self) -> None:
+        with self._lock:
+            self._llm.start(time.perf_counter())
+
+    def llm_finished(self) -> None:
+        with self._lock:
+            self.llm_calls += 1
+            self._llm.stop(time.perf_counter())
+
+    def breakdown(self) -> dict:
+        """Seconds spent in each part of the request; 'python' is everything else"""
+        total = self.total_time
+        db_time, llm_time = self.db_time, self.llm_time
+        return {
+            'total': total,
+            'db': db_time,
+            'llm': llm_time,
+            'template': self.template_time,
+            'python': max(0.0, total - db_time - llm_time - self.template_time)
+        }
+
+_current_stats: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar(
+    'request_stats', default=None
+)
+
+def current_stats() -> Optional[RequestStats]:
+    """Stats for the request being handled on this thread, if any"""
+    return _current_stats.get()
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Counts Mongo commands and their durations against the current request"""
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        stats = _current_stats.get()
+        if stats is None:
+            return
+        collection = event.command.get(event.command_name)
+        stats.db_started(collection if isinstance(collection, str) else None)
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.db_finished()
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.db_finished()
+
+def install_mongo_listener() -> None:
+    """Attach the command listener to the shared Mongo client"""
+    db.add_event_listener(MongoCommandListener())
+
+@contextmanager
+def llm_timer():
+    """Attribute the time spent inside the block to LLM calls for the current request"""
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.llm_started()
+    try:
+        yield
+    finally:
+        if stats is not None:
+            stats.llm_finished()
+
+def _before_render(sender, template, context, **extra):
+    stats = _current_stats.get()
+    if stats is not None:
+        stats._template_start = time.perf_counter()
+
+def _after_render(sender, template, context, **extra):
+    stats = _current_stats.get()
+    if stats is not None and stats._template_start is not None:
+        stats.template_time += time.perf_counter() - stats._template_start
+        stats._template_start = None
+
+def format_server_timing(stats: RequestStats) -> str:
+    breakdown = stats.breakdown()
+    return ", ".join([
+        f'db;dur={breakdown["db"] * 1000:.1f};desc="{stats.db_commands} commands"',
+        f'llm;dur={breakdown["llm"] * 1000:.1f};desc="{stats.llm_calls} calls"',
+        f'tpl;dur={breakdown["template"] * 1000:.1f}',
+        f'app;dur={breakdown["python"] * 1000:.1f}',
+        f'total;dur={breakdown["total"] * 1000:.1f}'
+    ])
+
+def init_app(app: Flask) -> None:
+    """Attach per-request timing hooks to the app"""
+
+    @app.before_request
+    def start_request_timing():
+        stats = RequestStats()
+        g._request_stats_token = _current_stats.set(stats)
+
+    @app.after_request
+    def finish_request_timing(response):
+        stats = _current_stats.get()
+        if stats is None:
+            return response
+
+        breakdown = stats.breakdown()
+        if breakdown['total'] * 1000 >= Config.SLOW_REQUEST_MS:
+            collections = ", ".join(f"{name} x{count}" for name, count in stats.collections.most_common())
+            logger.warning(
+                f"Slow request {request.method} {request.path} ({response.status_code}): "
+                f"total={breakdown['total'] * 1000:.0f}ms "
+                f"db={breakdown['db'] * 1000:.0f}ms ({stats.db_commands} commands: {collections or 'none'}) "
+                f"llm={breakdown['llm'] * 1000:.0f}ms ({stats.llm_calls} calls) "
+                f"template={breakdown['template'] * 1000:.0f}ms "
+                f"python={breakdown['python'] * 1000:.0f}ms"
+            )
+
+        if Config.SERVER_TIMING_HEADER:
+            response.headers['Server-Timing'] = format_server_timing(stats)
+        return response
+
+    @app.teardown_request
+    def reset_request_timing(exception=None):
+        token = g.pop('_request_stats_token', None)
+        if token is not None:
+            _current_stats.reset(token)
+
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_after_render, app)
@@ -1,9 +1,20 @@
 # ./routes/auth_decorator.py
 
 from functools import wraps
-from flask import session, redirect, url_for
+from typing import Optional
+from flask import g, session, redirect, url_for
 from models.session import Session
 
+def get_db_session() -> Optional[Session]:
+    """Get the session for the current request, looking it up at most once per request"""
+    if 'db_session' not in g:
+        session_id = session.get('session_id')
+        g.db_session = Session.get_by_session_id(session_id) if session_id else None
+        # A signed session gets a new token when its expiry is extended
+        if g.db_session and g.db_session.token != session_id:
+            session['session_id'] = g.db_session.token
+    return g.db_session
+
 def login_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
@@ -11,7 +22,7 @@ def login_required(f):
         if not session_id:
             return redirect(url_for('auth.login'))
         
-        db_session = Session.get_by_session_id(session_id)
+        db_session = get_db_session()
         if not db_session:
             session.clear()
             return redirect(url_for('auth.login'))
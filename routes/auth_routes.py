@@ -5,7 +5,7 @@ from flask_wtf.csrf import generate_csrf
 import secrets
 from models.user import User
 from models.session import Session
-from .auth_decorator import login_required
+from .auth_decorator import get_db_session, login_required
 from config import Config  # Add this import
 import logging
 from datetime import datetime
@@ -59,8 +59,8 @@ def login():
         
         # Create session
         session_id = secrets.token_urlsafe(32)
-        Session.create(session_id, user._id, ip_address)
-        session['session_id'] = session_id
+        db_session = Session.create(session_id, user._id, ip_address)
+        session['session_id'] = db_session.token
         
         # Update user login info
         user.update_login(ip_address)
@@ -79,7 +79,7 @@ def logout():
     try:
         session_id = session.get('session_id')
         if session_id:
-            db_session = Session.get_by_session_id(session_id)
+            db_session = get_db_session()
             if db_session:
                 db_session.delete()
         session.clear()
@@ -135,8 +135,8 @@ def register():
         
         # Auto-login after registration
         session_id = secrets.token_urlsafe(32)
-        Session.create(session_id, user._id, ip_address)
-        session['session_id'] = session_id
+        db_session = Session.create(session_id, user._id, ip_address)
+        session['session_id'] = db_session.token
         
         return redirect(url_for('index'))
         
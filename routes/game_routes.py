@@ -6,31 +6,37 @@ from models.session import Session
 from models.user import User
 from models.game.life import Life
 from models.game.story import Story, StoryStatus, stories
-from .auth_decorator import login_required
+from .auth_decorator import get_db_session, login_required
+import contextvars
 import logging
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Optional
 from datetime import datetime
 from bson import ObjectId
-from models.game.enums import LifeStage, Intensity, Difficulty
+from models.game.enums import LifeStage, Intensity, Difficulty, SetupStatus
 import bleach
 from typing import Tuple, List
 from models.game.life import PRIMARY_TRAITS
+from models.game.trait_descriptions import get_trait_descriptions
 from models.game.base import Trait
-from models.game.story_ai import begin_story, continue_story, conclude_story, generate_memory_from_story, generate_initial_cast
+from models.game.story_ai import continue_story, conclude_story, generate_memory_from_story
+from models.game import story_pipeline
+from models.game.story_pipeline import new_seeded_story
+from models.game.story_archive import get_story_transcript
 from models.game.memory import Memory, TraitAnalysis
 from models.game.character import Character, RelationshipStatus
 import traceback
+from config import Config
 
 game_bp = Blueprint('game', __name__)
 logger = logging.getLogger(__name__)
 
+# Parallel collection reads for /game/state
+_state_executor = ThreadPoolExecutor(max_workers=Config.STATE_READ_THREADS, thread_name_prefix='game-state')
+
 def get_current_user() -> Optional[User]:
     """Get current user from session"""
-    session_id = session.get('session_id')
-    if not session_id:
-        return None
-    
-    db_session = Session.get_by_session_id(session_id)
+    db_session = get_db_session()
     if not db_session:
         return None
         
@@ -49,11 +55,13 @@ def game():
     if not user:
         return redirect(url_for('auth.login'))
 
-    db_session = Session.get_by_session_id(session['session_id'])
-    current_life = get_current_life(db_session)
+    current_life = get_current_life(get_db_session())
     
     if not current_life:
         return redirect(url_for('game.lives'))
+
+    if current_life.setup_status != SetupStatus.READY:
+        return redirect(url_for('game.life_setup'))
     
     current_story = Story.get_by_life_id(current_life._id)
     
@@ -69,6 +77,7 @@ def game():
                          active_characters=active_characters,
                          StoryStatus=StoryStatus,
                          PRIMARY_TRAITS=PRIMARY_TRAITS,
+                         trait_descriptions=get_trait_descriptions(current_life.primary_traits),
                          csrf_token=generate_csrf())
 
 
@@ -107,13 +116,14 @@ def load_life(life_id):
             return redirect(url_for('game.lives'))
         
         # Update session with new life
-        db_session = Session.get_by_session_id(session['session_id'])
+        db_session = get_db_session()
         if not db_session:
             logger.error("No database session found")
             return redirect(url_for('auth.login'))
         
         logger.info(f"Updating session {db_session.session_id} with life {life_id}")
-        db_session.update_current_life(life._id)  
+        db_session.update_current_life(life._id)
+        session['session_id'] = db_session.token
         logger.info("Successfully updated current life")
         
         return redirect(url_for('game.game'))
@@ -227,39 +237,23 @@ def new_life():
             current_employment=None,
             primary_traits=Life.generate_random_primary_traits(),
             secondary_traits=[],
-            current_stress=25
+            current_stress=25,
+            setup_status=SetupStatus.CAST
         )
         
         # Save to database
         life.save()
-
-        # Generate initial cast of characters
-        try:
-            generate_initial_cast(life)
-        except Exception as e:
-            logger.error(f"Error generating initial cast: {str(e)}")
-            return render_template('game/new_life.html',
-                                 errors=['An error occurred while creating your initial cast of characters'],
-                                 form_data=form_data,
-                                 csrf_token=generate_csrf())
         
         # Update session with new life
-        db_session = Session.get_by_session_id(session['session_id'])
+        db_session = get_db_session()
         db_session.update_current_life(life._id)
-        
-        # Create initial story
-        first_day_seed = (f"This is {life.name}'s first day at Quillington High School. "
-                         f"They and their family have just moved to town over the summer. "
-                         f"{life.name} doesn't know anyone at school yet. "
-                         f"This story should focus on the nerves and excitement that accompany such an event, and introduce {life.name} to one or two characters.")
-        try:
-            new_seeded_story(life, first_day_seed)
-        except Exception as e:
-            logger.error(f"Error creating initial story: {str(e)}")
-            # Continue anyway - not having an initial story isn't catastrophic
+        session['session_id'] = db_session.token
+
+        # Generate the initial cast and first story in the background
+        story_pipeline.start_life_setup(life)
         
         logger.info(f"Created new life '{life.name}' for user {user.username}")
-        return redirect(url_for('game.game'))
+        return redirect(url_for('game.life_setup'))
         
     except Exception as e:
         logger.error(f"Error creating new life: {str(e)}")
@@ -268,24 +262,51 @@ def new_life():
                              form_data=form_data,
                              csrf_token=generate_csrf())
 
+@game_bp.route('/game/setup')
+@login_required
+def life_setup():
+    """Progress page shown while a new life is being set up"""
+    current_life = get_current_life(get_db_session())
+    if not current_life:
+        return redirect(url_for('game.lives'))
+
+    if current_life.setup_status == SetupStatus.READY:
+        return redirect(url_for('game.game'))
+
+    return render_template('game/setup.html',
+                         life=current_life,
+                         csrf_token=generate_csrf())
 
+@game_bp.route('/game/setup/status')
+@login_required
+def life_setup_status():
+    """Setup progress of the current life, polled by the progress page"""
+    current_life = get_current_life(get_db_session())
+    if not current_life:
+        return jsonify({'error': 'No active life'}), 400
 
-def new_seeded_story(life: 'Life', custom_story_seed: str = "") -> 'Story':
-    """Generate and save a new story with an optional seed"""
-    # Get story beginning with custom seed
-    story_response = begin_story(life, custom_story_seed)
+    status = current_life.setup_status
+    if story_pipeline.setup_stalled(current_life):
+        status = SetupStatus.FAILED
 
-    # Create new story object
-    story = Story(
-        life_id=life._id,
-        prompt=story_response.prompt,
-        beats=[(story_response.story_text, None)],
-        current_options=story_response.options,
-        character_ids=story_response.character_ids
-    )
-    story.save()
-    
-    return story
+    return jsonify({
+        'status': status.value,
+        'redirect': url_for('game.game') if status == SetupStatus.READY else None
+    })
+
+@game_bp.route('/game/setup/retry', methods=['POST'])
+@login_required
+def retry_life_setup():
+    """Restart a failed or stalled setup from the first unfinished stage"""
+    current_life = get_current_life(get_db_session())
+    if not current_life:
+        return jsonify({'error': 'No active life'}), 400
+
+    if current_life.setup_status == SetupStatus.FAILED or story_pipeline.setup_stalled(current_life):
+        current_life.set_setup_status(SetupStatus.CAST)
+        story_pipeline.start_life_setup(current_life)
+
+    return jsonify({'success': True})
 
 @game_bp.route('/game/new_story', methods=['POST'])
 @login_required
@@ -295,13 +316,13 @@ def new_story():
         if not user:
             return jsonify({'error': 'Not logged in'}), 401
 
-        db_session = Session.get_by_session_id(session['session_id'])
+        db_session = get_db_session()
         current_life = get_current_life(db_session)
         if not current_life:
             return jsonify({'error': 'No active life'}), 400
 
         # Check if there's an active story
-        existing_story = Story.get_by_life_id(current_life._id)
+        existing_story = Story.get_by_life_id(current_life._id, load_beats=False)
         if existing_story and not existing_story.completed:
             return jsonify({'error': 'There is already an active story'}), 400
 
@@ -309,8 +330,12 @@ def new_story():
         data = request.get_json() or {}
         custom_story_seed = data.get('custom_story_seed', '').strip()
 
-        # Create the new story
-        story = new_seeded_story(current_life, custom_story_seed)
+        # Create the new story, using the prepared one when the player didn't ask for anything specific
+        story = None
+        if not custom_story_seed:
+            story = story_pipeline.take_prepared_story(current_life)
+        if not story:
+            story = new_seeded_story(current_life, custom_story_seed)
 
         # Return rendered partial template
         return render_template('game/partials/story.html', 
@@ -335,7 +360,7 @@ def choose_option():
         if not user:
             return jsonify({'error': 'Not logged in'}), 401
 
-        db_session = Session.get_by_session_id(session['session_id'])
+        db_session = get_db_session()
         current_life = get_current_life(db_session)
         if not current_life:
             return jsonify({'error': 'No active life'}), 400
@@ -370,8 +395,6 @@ def choose_option():
                 story_response.options
             )
 
-        print(story_response)
-
         # Return rendered partial template
         return render_template('game/partials/story.html', 
                              story=story,
@@ -393,12 +416,12 @@ def delete_story(story_id):
         if not user:
             return jsonify({'error': 'Not logged in'}), 401
 
-        story = Story.get_by_id(ObjectId(story_id))
+        story = Story.get_by_id(ObjectId(story_id), load_beats=False)
         if not story:
             return jsonify({'error': 'Story not found'}), 404
 
         # Verify story belongs to current life
-        db_session = Session.get_by_session_id(session['session_id'])
+        db_session = get_db_session()
         current_life = get_current_life(db_session)
         if not current_life or story.life_id != current_life._id:
             return jsonify({'error': 'Story not found'}), 404
@@ -423,7 +446,7 @@ def make_memory(story_id):
             return jsonify({'error': 'Story not found'}), 404
 
         # Verify story belongs to current life
-        db_session = Session.get_by_session_id(session['session_id'])
+        db_session = get_db_session()
         current_life = get_current_life(db_session)
         if not current_life or story.life_id != current_life._id:
             return jsonify({'error': 'Story not found'}), 404
@@ -530,6 +553,9 @@ def make_memory(story_id):
 
         current_life.increment_story_count()
 
+        # Generate the next story's opening while the player reads the memory
+        story_pipeline.queue_next_story(current_life)
+
         # Redirect to memory view
         return jsonify({
             'success': True,
@@ -561,7 +587,7 @@ def view_memory(memory_id):
             return redirect(url_for('game.game'))
 
         # Verify memory belongs to current life
-        db_session = Session.get_by_session_id(session['session_id'])
+        db_session = get_db_session()
         current_life = get_current_life(db_session)
         if not current_life or memory.life_id != current_life._id:
             logger.error(f"Memory {memory_id} does not belong to current life")
@@ -576,7 +602,7 @@ def view_memory(memory_id):
         
         # Get original story if it exists
         try:
-            story = Story.get_by_id(memory.source_story_id) if memory.source_story_id else None
+            story = get_story_transcript(memory.source_story_id) if memory.source_story_id else None
         except Exception as e:
             logger.error(f"Error retrieving story for memory {memory_id}: {str(e)}\n{traceback.format_exc()}")
             story = None
@@ -593,29 +619,90 @@ def view_memory(memory_id):
         logger.error(f"Error viewing memory: {str(e)}\n{traceback.format_exc()}")
         #return redirect(url_for('game.game'))
 
+def _traits_payload(life: Life) -> List[dict]:
+    """Secondary traits, sorted alphabetically by name"""
+    sorted_traits = sorted(life.secondary_traits, key=lambda t: t.name)
+    return [trait.to_dict() for trait in sorted_traits]
+
+def _memories_payload(life_id: ObjectId) -> List[dict]:
+    """Memory summaries for the memories panel"""
+    memories = Memory.get_by_life_id(life_id)
+
+    # Create the memory list, making sure to handle the life_stage correctly
+    memory_list = []
+    for memory in memories:
+        try:
+            # If life_stage is already a string, use it directly
+            life_stage = memory.life_stage if isinstance(memory.life_stage, str) else memory.life_stage.value
+        except AttributeError:
+            # Fallback to a default if something goes wrong
+            life_stage = "Unknown"
+
+        memory_list.append({
+            'id': str(memory._id),
+            'title': memory.title,
+            'importance': memory.importance,
+            'age_experienced': memory.age_experienced,
+            'life_stage': life_stage,
+            'emotional_tags': memory.emotional_tags[:2],  # Just show first 2 tags
+            'created_at': memory.created_at.strftime('%Y-%m-%d')
+        })
+    return memory_list
+
+def _characters_payload(life_id: ObjectId) -> List[dict]:
+    """Active characters, sorted by name"""
+    characters = Character.get_by_life_id(life_id)
+    active_characters = [c for c in characters if c.relationship_status == RelationshipStatus.ACTIVE]
+    active_characters.sort(key=lambda x: x.name.lower())  # Case-insensitive sort
+
+    return [{
+        'id': str(char._id),
+        'name': char.name,
+        'age': char.age,
+        'relationship_type': char.relationship_description.split('.')[0].strip(),  # Get first sentence
+    } for char in active_characters]
+
+def _submit_read(fn, *args) -> Future:
+    # Run in a copy of the request's context so DB time is still attributed to the request
+    return _state_executor.submit(contextvars.copy_context().run, fn, *args)
+
+@game_bp.route('/game/state', methods=['GET'])
+@login_required
+def get_game_state():
+    """Get traits, memories and characters for the current life in one response"""
+    try:
+        current_life = get_current_life(get_db_session())
+        if not current_life:
+            return jsonify({'error': 'No active life'}), 400
+
+        # Memories and characters are independent queries, so read them in parallel
+        memories = _submit_read(_memories_payload, current_life._id)
+        characters = _submit_read(_characters_payload, current_life._id)
+
+        response = jsonify({
+            'traits': _traits_payload(current_life),
+            'memories': memories.result(),
+            'characters': characters.result()
+        })
+        # Let the browser revalidate instead of re-downloading unchanged state
+        response.add_etag()
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response.make_conditional(request)
+
+    except Exception as e:
+        logger.error(f"Error getting game state: {str(e)}\n{traceback.format_exc()}")
+        return jsonify({'error': str(e)}), 500
+
 @game_bp.route('/game/traits', methods=['GET'])
 @login_required
 def get_traits():
     """Get all secondary traits for current life"""
     try:
-        user = get_current_user()
-        if not user:
-            return jsonify({'error': 'Not logged in'}), 401
-
-        db_session = Session.get_by_session_id(session['session_id'])
-        current_life = get_current_life(db_session)
+        current_life = get_current_life(get_db_session())
         if not current_life:
             return jsonify({'error': 'No active life'}), 400
 
-        # Sort traits alphabetically by name
-        sorted_traits = sorted(
-            current_life.secondary_traits,  # Changed from life.traits 
-            key=lambda t: t.name
-        )        
-        
-        return jsonify({
-            'traits': [trait.to_dict() for trait in sorted_traits]
-        })
+        return jsonify({'traits': _traits_payload(current_life)})
 
     except Exception as e:
         logger.error(f"Error getting traits: {str(e)}\n{traceback.format_exc()}")
@@ -626,43 +713,11 @@ def get_traits():
 def get_memories():
     """Get all memories for current life"""
     try:
-        user = get_current_user()
-        if not user:
-            return jsonify({'error': 'Not logged in'}), 401
-
-        db_session = Session.get_by_session_id(session['session_id'])
-        current_life = get_current_life(db_session)
+        current_life = get_current_life(get_db_session())
         if not current_life:
             return jsonify({'error': 'No active life'}), 400
 
-        memories = Memory.get_by_life_id(current_life._id)
-        # Sort memories by importance and then by creation date
-        #sorted_memories = sorted(
-        #    memories,
-        #    key=lambda m: (-m.importance, -m.created_at.timestamp())
-        #)
-        
-        # Create the memory list, making sure to handle the life_stage correctly
-        memory_list = []
-        for memory in memories:
-            try:
-                # If life_stage is already a string, use it directly
-                life_stage = memory.life_stage if isinstance(memory.life_stage, str) else memory.life_stage.value
-            except AttributeError:
-                # Fallback to a default if something goes wrong
-                life_stage = "Unknown"
-
-            memory_list.append({
-                'id': str(memory._id),
-                'title': memory.title,
-                'importance': memory.importance,
-                'age_experienced': memory.age_experienced,
-                'life_stage': life_stage,
-                'emotional_tags': memory.emotional_tags[:2],  # Just show first 2 tags
-                'created_at': memory.created_at.strftime('%Y-%m-%d')
-            })
-
-        return jsonify({'memories': memory_list})
+        return jsonify({'memories': _memories_payload(current_life._id)})
 
     except Exception as e:
         logger.error(f"Error getting memories: {str(e)}")
@@ -673,29 +728,11 @@ def get_memories():
 def get_characters():
     """Get all active characters for current life"""
     try:
-        user = get_current_user()
-        if not user:
-            return jsonify({'error': 'Not logged in'}), 401
-
-        db_session = Session.get_by_session_id(session['session_id'])
-        current_life = get_current_life(db_session)
+        current_life = get_current_life(get_db_session())
         if not current_life:
             return jsonify({'error': 'No active life'}), 400
 
-        # Get active characters
-        characters = Character.get_by_life_id(current_life._id)
-        active_characters = [c for c in characters if c.relationship_status == RelationshipStatus.ACTIVE]
-        active_characters.sort(key=lambda x: x.name.lower())  # Case-insensitive sort
-        
-        # Format character data
-        character_list = [{
-            'id': str(char._id),
-            'name': char.name,
-            'age': char.age,
-            'relationship_type': char.relationship_description.split('.')[0].strip(),  # Get first sentence
-        } for char in active_characters]
-
-        return jsonify({'characters': character_list})
+        return jsonify({'characters': _characters_payload(current_life._id)})
 
     except Exception as e:
         logger.error(f"Error getting characters: {str(e)}")
@@ -1,10 +1,9 @@
 # ./routes/user_routes.py
 
-from flask import Blueprint, request, render_template, redirect, url_for, session
+from flask import Blueprint, request, render_template, redirect, url_for
 from flask_wtf.csrf import generate_csrf
 from models.user import User
-from models.session import Session
-from .auth_decorator import login_required
+from .auth_decorator import get_db_session, login_required
 import logging
 from typing import Tuple, Optional, List
 from config import Config
@@ -14,11 +13,7 @@ logger = logging.getLogger(__name__)
 
 def get_current_user() -> Optional[User]:
     """Get current user from session"""
-    session_id = session.get('session_id')
-    if not session_id:
-        return None
-    
-    db_session = Session.get_by_session_id(session_id)
+    db_session = get_db_session()
     if not db_session:
         return None
         
@@ -0,0 +1,42 @@
+# ./scripts/llm_report.py
+"""
+Summarize recorded LLM calls: latency and prompt-size histograms per story_ai
+function, and the lives with the largest prompts.
+
+Usage:
+    python -m scripts.llm_report --hours 24
+"""
+
+import argparse
+from datetime import datetime, timedelta
+
+from monitoring.llm_telemetry import summarize_llm_calls
+
+def print_histograms(title: str, histograms: dict, unit: str) -> None:
+    print(f"\n{title}")
+    for function, buckets in sorted(histograms.items()):
+        total = sum(b['count'] for b in buckets) or 1
+        print(f"  {function}")
+        for bucket in buckets:
+            label = bucket['_id'] if isinstance(bucket['_id'], str) else f">={bucket['_id']}{unit}"
+            bar = '#' * round(40 * bucket['count'] / total)
+            print(f"    {label:>12} {bucket['count']:7} {bar}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize LLM call telemetry")
+    parser.add_argument('--hours', type=float, default=24, help="Only include calls from the last N hours")
+    args = parser.parse_args()
+
+    summary = summarize_llm_calls(since=datetime.utcnow() - timedelta(hours=args.hours))
+
+    print_histograms("Wall time per call", summary['latency'], 's')
+    print_histograms("Prompt tokens per call", summary['prompt_tokens'], '')
+
+    print("\nLives with the largest prompts")
+    print(f"  {'life_id':26} {'calls':>6} {'avg prompt':>11} {'max prompt':>11} {'total tokens':>13}")
+    for life in summary['top_lives']:
+        print(f"  {str(life['_id']):26} {life['calls']:6} {life['avg_prompt_tokens']:11.0f} "
+              f"{life['max_prompt_tokens']:11} {life['total_tokens']:13}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,240 @@
+# ./scripts/llm_stub_server.py
+"""
+Local OpenAI-compatible stub server for offline development and load testing.
+
+Speaks the chat-completions tool-call protocol and answers every request with a
+schema-valid payload generated from the tool definitions sent by the client
+(create_story_beat, create_memory, create_initial_cast, ...).
+
+Usage:
+    python -m scripts.llm_stub_server --port 8001 --latency lognormal:0.0,0.5
+
+Then run the app with OPENAI_BASE_URL=http://127.0.0.1:8001/v1
+"""
+
+import argparse
+import json
+import random
+import re
+import string
+import time
+import uuid
+from typing import Callable, Dict, List, Optional
+
+from flask import Flask, Response, jsonify, request
+
+OBJECT_ID_PATTERN = re.compile(r'"id":\s*"([0-9a-f]{24})"')
+
+# Fields whose values must be ids of characters the game actually knows about
+CHARACTER_ID_FIELDS = {'id', 'character_ids'}
+
+WORDS = ("the quiet hallway morning friend teacher smile nervous locker bell class "
+         "lunch bus homework laugh window rain coffee notebook promise secret game "
+         "weekend music library practice coach dinner phone message door").split()
+
+def parse_latency(spec: str) -> Callable[[], float]:
+    """Parse a latency distribution spec into a sampler returning seconds.
+
+    Supported specs: 'fixed:S', 'uniform:LO,HI', 'normal:MEAN,STD', 'lognormal:MU,SIGMA'
+    """
+    kind, _, params = spec.partition(':')
+    values = [float(v) for v in params.split(',')] if params else []
+
+    if kind == 'fixed':
+        return lambda: values[0] if values else 0.0
+    if kind == 'uniform':
+        return lambda: random.uniform(values[0], values[1])
+    if kind == 'normal':
+        return lambda: max(0.0, random.gauss(values[0], values[1]))
+    if kind == 'lognormal':
+        return lambda: random.lognormvariate(values[0], values[1])
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+def random_text(words: int) -> str:
+    """Generate filler prose of roughly the given number of words"""
+    text = " ".join(random.choice(WORDS) for _ in range(words))
+    return text[0].upper() + text[1:] + "."
+
+def generate_value(schema: Dict, known_ids: List[str], key: Optional[str], text_words: int):
+    """Generate a random value that satisfies the given (tool parameter) JSON schema"""
+    if 'enum' in schema:
+        return random.choice(schema['enum'])
+
+    schema_type = schema.get('type')
+
+    if schema_type == 'object':
+        result = {}
+        required = set(schema.get('required', []))
+        for name, sub_schema in schema.get('properties', {}).items():
+            if name in required or random.random() < 0.5:
+                result[name] = generate_value(sub_schema, known_ids, name, text_words)
+        return result
+
+    if schema_type == 'array':
+        min_items = schema.get('minItems', 0)
+        max_items = schema.get('maxItems', max(min_items, 3))
+        count = random.randint(min_items, max_items)
+        items_schema = schema.get('items', {})
+
+        if key in CHARACTER_ID_FIELDS:
+            return random.sample(known_ids, min(count, len(known_ids)))
+
+        # Arrays of objects keyed by character id can only reference known characters
+        if 'id' in items_schema.get('properties', {}):
+            ids = random.sample(known_ids, min(count, len(known_ids)))
+            items = []
+            for char_id in ids:
+                item = generate_value(items_schema, known_ids, None, text_words)
+                item['id'] = char_id
+                items.append(item)
+            return items
+
+        return [generate_value(items_schema, known_ids, key, text_words) for _ in range(count)]
+
+    if schema_type == 'integer':
+        return random.randint(schema.get('minimum', 0), schema.get('maximum', 100))
+
+    if schema_type == 'number':
+        return random.uniform(schema.get('minimum', 0), schema.get('maximum', 100))
+
+    if schema_type == 'boolean':
+        return random.random() < 0.5
+
+    if schema_type == 'string':
+        if key in CHARACTER_ID_FIELDS and known_ids:
+            return random.choice(known_ids)
+        if key == 'name':
+            return f"{random.choice(string.ascii_uppercase)}{random_text(1)[1:-1]} Stub"
+        if key == 'gender':
+            return random.choice(['Female', 'Male', 'Non-Binary'])
+        if key == 'story_text':
+            return random_text(text_words)
+        return random_text(12)
+
+    return None
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (about 4 characters per token)"""
+    return max(1, len(text) // 4)
+
+def create_app(latency: Callable[[], float], text_words: int, stream_chunks: int) -> Flask:
+    app = Flask(__name__)
+
+    @app.route('/v1/chat/completions', methods=['POST'])
+    def chat_completions():
+        body = request.get_json(force=True)
+        model = body.get('model', 'stub-model')
+        messages = body.get('messages', [])
+        tools = body.get('tools') or []
+        tool_choice = body.get('tool_choice') or {}
+
+        # Pick the forced tool, or the first one offered
+        function_name = (tool_choice.get('function', {}).get('name')
+                         if isinstance(tool_choice, dict) else None)
+        tool = next((t for t in tools if t['function']['name'] == function_name),
+                    tools[0] if tools else None)
+        if tool is None:
+            return jsonify({'error': {'message': 'The stub server only supports tool calls'}}), 400
+
+        prompt_text = "\n".join(str(m.get('content') or '') for m in messages)
+        known_ids = list(dict.fromkeys(OBJECT_ID_PATTERN.findall(prompt_text)))
+        arguments = json.dumps(generate_value(
+            tool['function']['parameters'], known_ids, None, text_words
+        ))
+
+        completion_id = f"chatcmpl-stub-{uuid.uuid4().hex[:24]}"
+        call_id = f"call_{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+        usage = {
+            'prompt_tokens': estimate_tokens(prompt_text),
+            'completion_tokens': estimate_tokens(arguments),
+            'total_tokens': estimate_tokens(prompt_text) + estimate_tokens(arguments),
+            'prompt_tokens_details': {'cached_tokens': 0}
+        }
+        total_latency = latency()
+
+        if not body.get('stream'):
+            time.sleep(total_latency)
+            return jsonify({
+                'id': completion_id,
+                'object': 'chat.completion',
+                'created': created,
+                'model': model,
+                'choices': [{
+                    'index': 0,
+                    'finish_reason': 'tool_calls',
+                    'message': {
+                        'role': 'assistant',
+                        'content': None,
+                        'tool_calls': [{
+                            'id': call_id,
+                            'type': 'function',
+                            'function': {'name': tool['function']['name'], 'arguments': arguments}
+                        }]
+                    }
+                }],
+                'usage': usage
+            })
+
+        include_usage = (body.get('stream_options') or {}).get('include_usage', False)
+
+        def chunk(delta: Dict, finish_reason: Optional[str] = None, with_usage: bool = False) -> str:
+            data = {
+                'id': completion_id,
+                'object': 'chat.completion.chunk',
+                'created': created,
+                'model': model,
+                'choices': [] if with_usage else [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}]
+            }
+            if with_usage:
+                data['usage'] = usage
+            return f"data: {json.dumps(data)}\n\n"
+
+        def generate():
+            # Spend a third of the latency before the first token, the rest spread across chunks
+            time.sleep(total_latency / 3)
+            yield chunk({'role': 'assistant', 'content': None, 'tool_calls': [{
+                'index': 0, 'id': call_id, 'type': 'function',
+                'function': {'name': tool['function']['name'], 'arguments': ''}
+            }]})
+
+            piece_size = max(1, len(arguments) // stream_chunks + 1)
+            pieces = [arguments[i:i + piece_size] for i in range(0, len(arguments), piece_size)]
+            for piece in pieces:
+                time.sleep(total_latency * 2 / 3 / len(pieces))
+                yield chunk({'tool_calls': [{'index': 0, 'function': {'arguments': piece}}]})
+
+            yield chunk({}, finish_reason='tool_calls')
+            if include_usage:
+                yield chunk({}, with_usage=True)
+            yield "data: [DONE]\n\n"
+
+        return Response(generate(), mimetype='text/event-stream')
+
+    @app.route('/v1/models', methods=['GET'])
+    def list_models():
+        return jsonify({'object': 'list', 'data': [{'id': 'stub-model', 'object': 'model', 'owned_by': 'stub'}]})
+
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI-compatible stub server for offline load testing")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--latency', default='fixed:0',
+                        help="Latency distribution in seconds: fixed:S, uniform:LO,HI, normal:MEAN,STD or lognormal:MU,SIGMA")
+    parser.add_argument('--text-words', type=int, default=150,
+                        help="Approximate number of words in generated story text")
+    parser.add_argument('--stream-chunks', type=int, default=20,
+                        help="Number of argument chunks to send for streamed responses")
+    parser.add_argument('--seed', type=int, default=None, help="Random seed for reproducible payloads")
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    app = create_app(parse_latency(args.latency), args.text_words, args.stream_chunks)
+    app.run(host=args.host, port=args.port, threaded=True)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,289 @@
+# ./scripts/loadtest.py
+"""
+End-to-end load test for the game loop.
+
+Drives virtual players through register -> new life -> stories -> memories (which
+advance the seasons), and reports per-endpoint latency percentiles, throughput and
+Mongo operations per request. Meant to be run against a local MongoDB and the LLM
+stub server (scripts/llm_stub_server.py).
+
+Usage:
+    python -m scripts.loadtest --base-url http://127.0.0.1:5000 --players 50 --concurrency 10 \\
+        --stories 6 --output run.json
+    python -m scripts.loadtest --compare baseline.json run.json
+"""
+
+import argparse
+import http.cookiejar
+import json
+import math
+import random
+import re
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+CSRF_PATTERN = re.compile(r'name="csrf_token" value="([^"]+)"')
+STORY_ID_PATTERN = re.compile(r'make-memory-button"\s+data-story-id="([0-9a-f]{24})"')
+OPTION_PATTERN = re.compile(r'class="story-option button" data-option="(\d+)"')
+OBJECT_ID_PATTERN = re.compile(r'[0-9a-f]{24}')
+SETUP_POLL_INTERVAL = 0.5  # seconds
+
+class Stats:
+    """Thread-safe collection of request timings grouped by endpoint"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, seconds: float, ok: bool) -> None:
+        with self._lock:
+            self.latencies[endpoint].append(seconds)
+            if not ok:
+                self.errors[endpoint] += 1
+
+    @property
+    def total_requests(self) -> int:
+        return sum(len(values) for values in self.latencies.values())
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+class Player:
+    """A single virtual player with its own cookie jar"""
+
+    def __init__(self, base_url: str, stats: Stats, timeout: float):
+        self.base_url = base_url.rstrip('/')
+        self.stats = stats
+        self.timeout = timeout
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar())
+        )
+        self.csrf_token: Optional[str] = None
+
+    def request(self, method: str, path: str, form: Optional[Dict] = None,
+                json_body: Optional[Dict] = None, endpoint: Optional[str] = None) -> str:
+        """Make a request, record its latency and return the response body"""
+        headers = {}
+        data = None
+        if form is not None:
+            data = urllib.parse.urlencode(form).encode()
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        elif json_body is not None:
+            data = json.dumps(json_body).encode()
+            headers['Content-Type'] = 'application/json'
+        if self.csrf_token and method == 'POST':
+            headers['X-CSRFToken'] = self.csrf_token
+
+        endpoint = endpoint or f"{method} {OBJECT_ID_PATTERN.sub('<id>', path)}"
+        req = urllib.request.Request(self.base_url + path, data=data, headers=headers, method=method)
+
+        start = time.perf_counter()
+        try:
+            with self.opener.open(req, timeout=self.timeout) as response:
+                body = response.read().decode('utf-8', errors='replace')
+            self.stats.record(endpoint, time.perf_counter() - start, True)
+        except urllib.error.HTTPError as e:
+            body = e.read().decode('utf-8', errors='replace')
+            self.stats.record(endpoint, time.perf_counter() - start, False)
+            raise RuntimeError(f"{endpoint} failed with HTTP {e.code}: {body[:200]}")
+
+        match = CSRF_PATTERN.search(body)
+        if match:
+            self.csrf_token = match.group(1)
+        return body
+
+    def register(self, username: str, password: str) -> None:
+        self.request('GET', '/register')
+        self.request('POST', '/register', form={
+            'username': username,
+            'password': password,
+            'password_confirm': password,
+            'openai_api_key': 'stub-key',
+            'gpt_model': 'gpt-4o',
+            'csrf_token': self.csrf_token
+        })
+
+    def create_life(self) -> None:
+        self.request('GET', '/game/new_life')
+        self.request('POST', '/game/new_life', form={
+            'name': f"Load {uuid.uuid4().hex[:6]}",
+            'gender': random.choice(['Female', 'Male', 'Non-Binary']),
+            'intensity': random.choice(['LIGHT', 'MODERATE', 'GRITTY']),
+            'difficulty': random.choice(['STORY', 'BALANCED', 'CHALLENGING']),
+            'custom_directions': '',
+            'csrf_token': self.csrf_token
+        })
+
+        # The cast and first story are generated in the background; wait like the progress page does
+        deadline = time.monotonic() + self.timeout
+        while time.monotonic() < deadline:
+            status = json.loads(self.request('GET', '/game/setup/status'))
+            if status['status'] == 'Ready':
+                return
+            if status['status'] == 'Failed':
+                raise RuntimeError("Life setup failed")
+            time.sleep(SETUP_POLL_INTERVAL)
+        raise RuntimeError("Life setup did not finish")
+
+    def play_story(self) -> None:
+        """Play one story through to a memory"""
+        page = self.request('GET', '/game')
+        if 'start-story-button' in page:
+            page = self.request('POST', '/game/new_story', json_body={'custom_story_seed': ''})
+
+        # Keep choosing options until the story concludes
+        for _ in range(10):
+            match = STORY_ID_PATTERN.search(page)
+            if match:
+                break
+            options = OPTION_PATTERN.findall(page)
+            if not options:
+                raise RuntimeError("Story has neither options nor a memory button")
+            page = self.request('POST', '/game/story/choose',
+                                json_body={'option_index': int(random.choice(options))})
+        else:
+            raise RuntimeError("Story did not conclude")
+
+        result = json.loads(self.request('POST', f"/game/story/make_memory/{match.group(1)}", json_body={}))
+        if result.get('redirect'):
+            self.request('GET', result['redirect'])
+
+        # The sidebar panels the game page loads
+        self.request('GET', '/game/state')
+
+def run_player(index: int, args, stats: Stats, run_id: str) -> Optional[str]:
+    player = Player(args.base_url, stats, args.timeout)
+    try:
+        player.register(f"load{run_id}{index}", 'loadtest')
+        player.create_life()
+        for _ in range(args.stories):
+            player.play_story()
+        return None
+    except Exception as e:
+        return f"player {index}: {e}"
+
+def mongo_op_count(mongo_uri: Optional[str]) -> Optional[int]:
+    """Total operations the server has executed, from serverStatus opcounters"""
+    if not mongo_uri:
+        return None
+    from pymongo import MongoClient
+    counters = MongoClient(mongo_uri).admin.command('serverStatus')['opcounters']
+    return sum(counters.get(name, 0) for name in ('insert', 'query', 'update', 'delete', 'getmore', 'command'))
+
+def summarize(stats: Stats, elapsed: float, concurrency: int, mongo_ops: Optional[int]) -> Dict:
+    endpoints = {}
+    for endpoint, values in sorted(stats.latencies.items()):
+        ordered = sorted(values)
+        endpoints[endpoint] = {
+            'count': len(ordered),
+            'errors': stats.errors.get(endpoint, 0),
+            'p50_ms': round(percentile(ordered, 50) * 1000, 2),
+            'p95_ms': round(percentile(ordered, 95) * 1000, 2),
+            'p99_ms': round(percentile(ordered, 99) * 1000, 2),
+        }
+
+    total = stats.total_requests
+    return {
+        'concurrency': concurrency,
+        'elapsed_s': round(elapsed, 2),
+        'requests': total,
+        'throughput_rps': round(total / elapsed, 2) if elapsed else 0.0,
+        'mongo_ops_per_request': round(mongo_ops / total, 2) if mongo_ops is not None and total else None,
+        'endpoints': endpoints
+    }
+
+def print_summary(summary: Dict) -> None:
+    print(f"\nRequests: {summary['requests']} in {summary['elapsed_s']}s "
+          f"at concurrency {summary['concurrency']} -> {summary['throughput_rps']} req/s")
+    if summary['mongo_ops_per_request'] is not None:
+        print(f"Mongo ops per request: {summary['mongo_ops_per_request']}")
+    print(f"\n{'endpoint':45} {'count':>6} {'err':>4} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for endpoint, data in summary['endpoints'].items():
+        print(f"{endpoint:45} {data['count']:6} {data['errors']:4} "
+              f"{data['p50_ms']:9.1f} {data['p95_ms']:9.1f} {data['p99_ms']:9.1f}")
+
+def compare(baseline: Dict, current: Dict, threshold: float) -> bool:
+    """Print per-endpoint changes between two runs. Returns True if any regression exceeds threshold (%)."""
+    regressed = False
+    print(f"\n{'endpoint':45} {'metric':7} {'baseline':>10} {'current':>10} {'change':>8}")
+    for endpoint, current_data in current['endpoints'].items():
+        base_data = baseline['endpoints'].get(endpoint)
+        if not base_data:
+            continue
+        for metric in ('p50_ms', 'p95_ms', 'p99_ms'):
+            before, after = base_data[metric], current_data[metric]
+            change = ((after - before) / before * 100) if before else 0.0
+            flag = ''
+            if change > threshold:
+                flag = '  REGRESSION'
+                regressed = True
+            print(f"{endpoint:45} {metric:7} {before:10.1f} {after:10.1f} {change:+7.1f}%{flag}")
+
+    before, after = baseline['throughput_rps'], current['throughput_rps']
+    change = ((after - before) / before * 100) if before else 0.0
+    flag = ''
+    if change < -threshold:
+        flag = '  REGRESSION'
+        regressed = True
+    print(f"\nThroughput: {before} -> {after} req/s ({change:+.1f}%){flag}")
+    return regressed
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end load test for the LifeByMe game loop")
+    parser.add_argument('--base-url', default='http://127.0.0.1:5000')
+    parser.add_argument('--players', type=int, default=20, help="Total virtual players")
+    parser.add_argument('--concurrency', type=int, default=5, help="Players running at the same time")
+    parser.add_argument('--stories', type=int, default=6, help="Stories each player plays to a memory")
+    parser.add_argument('--timeout', type=float, default=120.0, help="Per-request timeout in seconds")
+    parser.add_argument('--mongo-uri', default=None, help="If set, report Mongo ops per request")
+    parser.add_argument('--output', default=None, help="Write the run summary as JSON")
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CURRENT'),
+                        help="Compare two saved runs instead of running a test")
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help="Regression threshold in percent for --compare")
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            baseline = json.load(f)
+        with open(args.compare[1]) as f:
+            current = json.load(f)
+        sys.exit(1 if compare(baseline, current, args.threshold) else 0)
+
+    stats = Stats()
+    run_id = uuid.uuid4().hex[:6]
+    ops_before = mongo_op_count(args.mongo_uri)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        failures = [f for f in executor.map(lambda i: run_player(i, args, stats, run_id), range(args.players)) if f]
+    elapsed = time.perf_counter() - start
+
+    ops_after = mongo_op_count(args.mongo_uri)
+    mongo_ops = ops_after - ops_before if ops_before is not None else None
+
+    summary = summarize(stats, elapsed, args.concurrency, mongo_ops)
+    summary['failed_players'] = len(failures)
+    print_summary(summary)
+    for failure in failures[:10]:
+        print(f"FAILED {failure}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(summary, f, indent=2)
+
+if __name__ == '__main__':
+    main()
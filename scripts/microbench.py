@@ -0,0 +1,261 @@
+# ./scripts/microbench.py
+"""
+Microbenchmarks for model serialization and prompt assembly.
+
+Times the per-beat hot paths (Memory.to_dict/from_dict, Life.from_dict,
+Character.format_characters_for_ai, build_base_prompt, process_memory_response,
+trait application)
+against synthetic lives at several scales, and records peak allocations.
+The Mongo collections are swapped for in-memory stand-ins so only Python time
+is measured.
+
+Usage:
+    python -m scripts.microbench --output bench.json
+    python -m scripts.microbench --compare baseline.json bench.json
+"""
+
+import argparse
+import json
+import random
+import sys
+import timeit
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+
+from bson import ObjectId
+
+# life must be imported before memory (memory imports LifeStage from life)
+from models.game.life import Life, PRIMARY_TRAITS
+import models.game.character as character_module
+import models.game.memory as memory_module
+import models.game.story_ai_prompts as prompts
+import models.game.story_ai_utils as ai_utils
+from models.game.base import Trait
+from models.game.character import Character, RelationshipStatus
+from models.game.enums import Difficulty, Intensity, LifeStage, Season
+from models.game.memory import Memory, TraitAnalysis
+from models.game.traits import PrimaryTraitVector
+
+MEMORY_SCALES = [10, 100, 1000]
+CHARACTER_SCALES = [5, 50, 200]
+SECONDARY_TRAIT_SCALES = [5, 50, 200]
+
+class InMemoryCursor(list):
+    def sort(self, key, direction=1):
+        return InMemoryCursor(sorted(self, key=lambda d: d.get(key), reverse=direction < 0))
+
+class InMemoryCollection:
+    """Minimal stand-in for the find() queries used by the benchmarked functions"""
+
+    def __init__(self, docs: List[Dict]):
+        self.docs = docs
+
+    @staticmethod
+    def _matches(doc: Dict, query: Dict) -> bool:
+        for field, condition in query.items():
+            value = doc.get(field)
+            if isinstance(condition, dict):
+                if '$in' in condition and value not in condition['$in']:
+                    return False
+                if '$gt' in condition and not (value is not None and value > condition['$gt']):
+                    return False
+            elif value != condition:
+                return False
+        return True
+
+    def find(self, query: Dict = None, projection: Dict = None) -> InMemoryCursor:
+        return InMemoryCursor(doc for doc in self.docs if self._matches(doc, query or {}))
+
+def make_life(num_secondary_traits: int = 10) -> Life:
+    return Life(
+        user_id=ObjectId(),
+        name="Bench Mark",
+        age=17,
+        gender="Female",
+        custom_gender=None,
+        intensity=Intensity.MODERATE,
+        difficulty=Difficulty.BALANCED,
+        custom_directions="Likes long walks and benchmarks.",
+        life_stage=LifeStage.HIGH_SCHOOL,
+        current_employment=None,
+        primary_traits=Life.generate_random_primary_traits(),
+        secondary_traits=[Trait(f"Secondary {i}", random.randint(1, 100)) for i in range(num_secondary_traits)],
+        current_stress=45,
+        current_season=Season.WINTER,
+        current_year=2
+    )
+
+def make_memory(life_id: ObjectId, index: int) -> Memory:
+    return Memory(
+        life_id=life_id,
+        title=f"Memory {index}",
+        description="A detailed description of something that happened at school. " * 4,
+        importance=random.randint(1, 3),
+        permanence=random.randint(1, 3),
+        emotional_tags=["Nervous", "Excited", "Proud"],
+        context_tags=["School", "Hallway"],
+        story_tags=["Friendship"],
+        primary_trait_impacts=[Trait(name, random.randint(-5, 5)) for name in random.sample(PRIMARY_TRAITS, 2)],
+        secondary_trait_modifications=[Trait("Secondary 1", 3)],
+        secondary_trait_additions=[Trait(f"New Trait {index}", 5)],
+        life_stage=LifeStage.HIGH_SCHOOL,
+        age_experienced=16,
+        impact_explanation="It mattered because it was the first time.",
+        analyzed_traits=[TraitAnalysis(name, random.randint(0, 100), "Because of the choices made.")
+                         for name in random.sample(PRIMARY_TRAITS, 2)],
+        story_stress=random.randint(0, 100),
+        stress_reasoning="The situation was tense.",
+        stress_change=random.randint(-10, 10),
+        season=random.choice(list(Season)),
+        year=random.randint(1, 3),
+        character_ids=[ObjectId() for _ in range(2)],
+        source_story_id=ObjectId(),
+        created_at=datetime.utcnow() - timedelta(minutes=index)
+    )
+
+def make_character(life_id: ObjectId, index: int) -> Character:
+    return Character(
+        life_id=life_id,
+        name=f"Character {index}",
+        age=random.randint(15, 55),
+        gender=random.choice(["Female", "Male", "Non-Binary"]),
+        physical_description="Tall, with short dark hair and a friendly face.",
+        personality_description="Outgoing and curious, but quick to judge. " * 2,
+        relationship_description="Friend from School. They sit together at lunch most days.",
+        first_met_context="First day of school at Quillington High",
+        first_met_life_stage=LifeStage.HIGH_SCHOOL,
+        last_appearance_life_stage=LifeStage.HIGH_SCHOOL,
+        relationship_status=RelationshipStatus.ACTIVE,
+        last_appearance_age=16
+    )
+
+def make_memory_response() -> Dict:
+    return {
+        'title': "Standing Up to the Bully",
+        'description': "A long description of the memory.",
+        'importance': 2,
+        'permanence': 2,
+        'emotional_tags': ["Brave"],
+        'context_tags': ["School"],
+        'story_tags': ["Conflict"],
+        'impact_explanation': "It changed how they see themselves.",
+        'trait_analysis': {'analyzed_traits': [
+            {'name': name, 'calculated_value': random.randint(0, 100), 'reasoning': "Choices made."}
+            for name in random.sample(PRIMARY_TRAITS, 3)
+        ]},
+        'story_stress': 60,
+        'stress_reasoning': "Confrontation is stressful.",
+        'character_changes': []
+    }
+
+def measure(func: Callable[[], object], number: int, repeat: int = 3) -> Dict:
+    """Best-of-repeat time per call (µs), plus the peak allocation of a single call"""
+    best = min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {'us_per_call': round(best * 1e6, 2), 'peak_kb': round(peak / 1024, 2)}
+
+def run_benchmarks(number_scale: float) -> Dict[str, Dict]:
+    random.seed(18)
+    results = {}
+
+    def iterations(base: int) -> int:
+        return max(1, int(base * number_scale))
+
+    for count in MEMORY_SCALES:
+        life = make_life()
+        memories = [make_memory(life._id, i) for i in range(count)]
+        docs = [m.to_dict() for m in memories]
+
+        results[f"Memory.to_dict[{count}]"] = measure(
+            lambda: [m.to_dict() for m in memories], iterations(2000 / count))
+        results[f"Memory.from_dict[{count}]"] = measure(
+            lambda: [Memory.from_dict(d) for d in docs], iterations(2000 / count))
+
+        memory_module.memories = InMemoryCollection(docs)
+        character_module.characters = InMemoryCollection([])
+        results[f"build_base_prompt[{count} memories]"] = measure(
+            lambda: prompts.build_base_prompt(life), iterations(2000 / count))
+
+    for count in SECONDARY_TRAIT_SCALES:
+        life_doc = make_life(count).to_dict()
+        results[f"Life.from_dict[{count} secondary traits]"] = measure(
+            lambda: Life.from_dict(life_doc), iterations(20000 / count))
+
+    for count in CHARACTER_SCALES:
+        life = make_life()
+        character_module.characters = InMemoryCollection(
+            [make_character(life._id, i).to_dict() for i in range(count)])
+        results[f"format_characters_for_ai[{count}]"] = measure(
+            lambda: Character.format_characters_for_ai(life_id=life._id), iterations(2000 / count))
+
+    current_traits = {name: random.randint(0, 100) for name in PRIMARY_TRAITS}
+    response = make_memory_response()
+    results["process_memory_response"] = measure(
+        lambda: ai_utils.process_memory_response(response, current_traits, 50, Difficulty.BALANCED),
+        iterations(20000))
+
+    life = make_life(SECONDARY_TRAIT_SCALES[-1])
+    impacts = [Trait(name, random.randint(-5, 5)) for name in random.sample(PRIMARY_TRAITS, 3)]
+    modifications = [Trait(trait.name, random.randint(-5, 5)) for trait in list(life.secondary_traits)[:3]]
+
+    def apply_traits():
+        life.primary_traits.apply(PrimaryTraitVector.impact_vector(impacts))
+        life.secondary_traits.modify(modifications)
+
+    results["apply trait impacts"] = measure(apply_traits, iterations(200000))
+
+    return results
+
+def print_results(results: Dict[str, Dict]) -> None:
+    print(f"{'benchmark':45} {'µs/call':>12} {'peak KB':>10}")
+    for name, data in results.items():
+        print(f"{name:45} {data['us_per_call']:12.2f} {data['peak_kb']:10.2f}")
+
+def compare(baseline: Dict[str, Dict], current: Dict[str, Dict], threshold: float) -> bool:
+    """Print changes between two runs. Returns True if any benchmark slowed down by more than threshold (%)."""
+    regressed = False
+    print(f"{'benchmark':45} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name, data in current.items():
+        if name not in baseline:
+            continue
+        before, after = baseline[name]['us_per_call'], data['us_per_call']
+        change = (after - before) / before * 100 if before else 0.0
+        flag = ''
+        if change > threshold:
+            flag = '  REGRESSION'
+            regressed = True
+        print(f"{name:45} {before:10.2f} {after:10.2f} {change:+7.1f}%{flag}")
+    return regressed
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmarks for serialization and prompt assembly")
+    parser.add_argument('--output', default=None, help="Write results as JSON")
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CURRENT'),
+                        help="Compare two saved runs instead of running the benchmarks")
+    parser.add_argument('--threshold', type=float, default=15.0,
+                        help="Regression threshold in percent for --compare")
+    parser.add_argument('--quick', action='store_true', help="Run fewer iterations")
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            baseline = json.load(f)
+        with open(args.compare[1]) as f:
+            current = json.load(f)
+        sys.exit(1 if compare(baseline, current, args.threshold) else 0)
+
+    results = run_benchmarks(0.1 if args.quick else 1.0)
+    print_results(results)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == '__main__':
+    main()
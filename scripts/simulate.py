@@ -0,0 +1,275 @@
+# ./scripts/simulate.py
+"""
+Offline Monte-Carlo simulator for trait and stress dynamics.
+
+Plays thousands of synthetic lives through many in-game years using the rules in
+models/game/traits.py (weighted trait values, trait-change stress, difficulty
+adjustment, final stress) and the seasonal memory aging of Life. Memory outcomes
+are sampled instead of generated, so no LLM or MongoDB is involved. Every life in
+a batch advances in lock-step as NumPy arrays, and batches run on all cores.
+
+Rule parameters default to the game's values; give several comma-separated values
+to sweep them. Each combination is simulated for every difficulty, and the final
+trait and stress distributions are printed per combination.
+
+Needs NumPy (pip install -r requirements-dev.txt).
+
+Usage:
+    python -m scripts.simulate --lives 10000 --years 4
+    python -m scripts.simulate --weight-base 6,8,10 --stress-weights 5,3,1 4,4,1 --output sweep.json
+    python -m scripts.simulate --difficulty Challenging --multiplier Challenging=1.5,2,3
+"""
+
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    sys.exit("scripts.simulate needs NumPy: pip install -r requirements-dev.txt")
+
+from config import Config
+from models.game import traits
+from models.game.enums import Difficulty
+
+SEASONS_PER_YEAR = 4
+INITIAL_STRESS = 25  # new lives start at this stress (see game_routes.new_life)
+INITIAL_TRAIT_MEAN = 50  # Trait.random
+INITIAL_TRAIT_SD = 15
+HIGH_STRESS = 75  # lives at or above this stress are counted separately
+
+@dataclass(frozen=True)
+class RuleParams:
+    """One point of a parameter sweep"""
+    weight_base: int = traits.TRAIT_WEIGHT_BASE
+    stress_weights: Tuple[int, int, int] = traits.STRESS_WEIGHTS
+    multiplier: float = 1.0
+    aging_chance: float = traits.MEMORY_AGING_CHANCE
+
+@dataclass(frozen=True)
+class OutcomeModel:
+    """How memory outcomes are sampled in place of the LLM"""
+    importance_p: Tuple[float, float, float] = (0.5, 0.35, 0.15)
+    permanence_p: Tuple[float, float, float] = (0.4, 0.4, 0.2)
+    trait_drift: float = 0.0  # mean of calculated minus current trait value
+    trait_sd: float = 15.0
+    story_stress_mean: float = 45.0
+    story_stress_sd: float = 20.0
+
+def age_memories(memory_counts: 'np.ndarray', aging_chance: float, rng: 'np.random.Generator') -> 'np.ndarray':
+    """One season of Life._process_memory_aging, applied to per-life counts of
+    memories indexed [life, importance, permanence]"""
+    aged = memory_counts.copy()
+    # permanence 1 -> 0
+    aged[:, :, 0] += memory_counts[:, :, 1]
+    aged[:, :, 1] -= memory_counts[:, :, 1]
+    # permanence 2: importance 1 fades, importance 2 fades by chance, importance 3 drops to importance 2
+    aged[:, 1, 1] += memory_counts[:, 1, 2]
+    aged[:, 1, 2] -= memory_counts[:, 1, 2]
+    faded = rng.binomial(memory_counts[:, 2, 2], aging_chance)
+    aged[:, 2, 1] += faded
+    aged[:, 2, 2] -= faded
+    aged[:, 2, 2] += memory_counts[:, 3, 2]
+    aged[:, 3, 2] -= memory_counts[:, 3, 2]
+    return aged
+
+def simulate_batch(params: RuleParams, model: OutcomeModel, lives: int, years: int,
+                   seed: 'np.random.SeedSequence') -> Dict[str, 'np.ndarray']:
+    """Simulate a batch of lives. Returns their final traits, stress and memory
+    counts, and the sum of their stress at the end of each year."""
+    rng = np.random.default_rng(seed)
+    trait_count = len(traits.PRIMARY_TRAITS)
+    rows = np.arange(lives)
+
+    primary = np.clip(rng.normal(INITIAL_TRAIT_MEAN, INITIAL_TRAIT_SD, (lives, trait_count)).astype(np.int64),
+                      traits.TRAIT_MIN, traits.TRAIT_MAX)
+    stress = np.full(lives, INITIAL_STRESS, dtype=np.int64)
+    memory_counts = np.zeros((lives, 4, 4), dtype=np.int64)  # [life, importance 0-3, permanence 0-3]
+
+    current_weight, story_weight, trait_weight = params.stress_weights
+    total_weight = current_weight + story_weight + trait_weight
+    yearly_stress = np.zeros(years)
+
+    for year in range(years):
+        for _ in range(SEASONS_PER_YEAR):
+            for _ in range(Config.STORIES_PER_SEASON):
+                importance = rng.choice(3, lives, p=model.importance_p) + 1
+                permanence = rng.choice(3, lives, p=model.permanence_p) + 1
+
+                # The AI analyzes as many distinct traits as the memory's importance
+                ranks = rng.random((lives, trait_count)).argsort(axis=1).argsort(axis=1)
+                analyzed = ranks < importance[:, None]
+                calculated = np.clip(np.rint(primary + rng.normal(model.trait_drift, model.trait_sd, primary.shape)),
+                                     traits.TRAIT_MIN, traits.TRAIT_MAX).astype(np.int64)
+
+                # traits.weighted_trait_values
+                old_weight = (params.weight_base - importance - permanence)[:, None]
+                weighted = np.clip(np.rint((calculated + primary * old_weight) / (1 + old_weight)),
+                                   traits.TRAIT_MIN, traits.TRAIT_MAX).astype(np.int64)
+
+                # traits.trait_change_stress and adjust_trait_stress
+                trait_stress = np.where(analyzed, np.abs(primary - calculated), 0).sum(axis=1)
+                adjusted = np.rint(trait_stress * params.multiplier).astype(np.int64)
+                if params.multiplier > 1:
+                    adjusted = np.minimum(adjusted, traits.STRESS_MAX)
+
+                # traits.final_stress
+                story_stress = np.clip(np.rint(rng.normal(model.story_stress_mean, model.story_stress_sd, lives)),
+                                       traits.STRESS_MIN, traits.STRESS_MAX).astype(np.int64)
+                stress = np.clip(np.rint((stress * current_weight + story_stress * story_weight
+                                          + adjusted * trait_weight) / total_weight),
+                                 traits.STRESS_MIN, traits.STRESS_MAX).astype(np.int64)
+
+                primary = np.where(analyzed, weighted, primary)
+                memory_counts[rows, importance, permanence] += 1
+
+            memory_counts = age_memories(memory_counts, params.aging_chance, rng)
+        yearly_stress[year] = stress.sum()
+
+    return {'primary': primary, 'stress': stress, 'memory_counts': memory_counts, 'yearly_stress': yearly_stress}
+
+def _run_task(task: Tuple) -> Tuple:
+    key, params, model, lives, years, seed = task
+    return key, simulate_batch(params, model, lives, years, seed)
+
+def distribution(values: 'np.ndarray') -> Dict[str, float]:
+    p5, p50, p95 = np.percentile(values, [5, 50, 95])
+    return {'mean': round(float(values.mean()), 2), 'sd': round(float(values.std()), 2),
+            'p5': float(p5), 'p50': float(p50), 'p95': float(p95)}
+
+def summarize(batches: List[Dict[str, 'np.ndarray']]) -> Dict:
+    primary = np.concatenate([b['primary'] for b in batches])
+    stress = np.concatenate([b['stress'] for b in batches])
+    memory_counts = np.concatenate([b['memory_counts'] for b in batches])
+    lives = len(stress)
+    by_permanence = memory_counts.sum(axis=1).mean(axis=0)
+
+    return {
+        'lives': lives,
+        'stress': distribution(stress),
+        'high_stress_share': round(float((stress >= HIGH_STRESS).mean()), 4),
+        'yearly_mean_stress': [round(float(s), 2) for s in sum(b['yearly_stress'] for b in batches) / lives],
+        'traits': distribution(primary),
+        'trait_means': {name: round(float(primary[:, i].mean()), 2) for i, name in enumerate(traits.PRIMARY_TRAITS)},
+        'traits_at_bounds_share': round(float(((primary == traits.TRAIT_MIN) | (primary == traits.TRAIT_MAX)).mean()), 4),
+        'memories_by_permanence': [round(float(count), 2) for count in by_permanence]
+    }
+
+def parse_list(value: str, cast) -> List:
+    return [cast(item) for item in value.split(',') if item]
+
+def parse_multipliers(values: List[str]) -> Dict[Difficulty, List[float]]:
+    multipliers = {difficulty: [multiplier] for difficulty, multiplier in traits.TRAIT_STRESS_MULTIPLIER.items()}
+    for value in values:
+        name, _, numbers = value.partition('=')
+        multipliers[Difficulty(name)] = parse_list(numbers, float)
+    return multipliers
+
+def build_grid(args) -> List[Tuple[Difficulty, RuleParams]]:
+    multipliers = parse_multipliers(args.multiplier)
+    stress_weights = [tuple(parse_list(weights, int)) for weights in args.stress_weights]
+    grid = []
+    for difficulty in [Difficulty(name) for name in args.difficulty]:
+        for weight_base, weights, multiplier, aging_chance in itertools.product(
+                parse_list(args.weight_base, int), stress_weights,
+                multipliers[difficulty], parse_list(args.aging_chance, float)):
+            grid.append((difficulty, RuleParams(weight_base, weights, multiplier, aging_chance)))
+    return grid
+
+def run(args) -> List[Dict]:
+    grid = build_grid(args)
+    model = OutcomeModel(
+        importance_p=tuple(parse_list(args.importance_p, float)),
+        permanence_p=tuple(parse_list(args.permanence_p, float)),
+        trait_drift=args.trait_drift,
+        trait_sd=args.trait_sd,
+        story_stress_mean=args.story_stress_mean,
+        story_stress_sd=args.story_stress_sd
+    )
+
+    # Split every grid point into batches so all cores stay busy even for a single point
+    batch_count = max(1, -(-args.lives // args.batch_size))
+    seeds = iter(np.random.SeedSequence(args.seed).spawn(len(grid) * batch_count))
+    tasks = []
+    for key, (_, params) in enumerate(grid):
+        for batch in range(batch_count):
+            lives = min(args.batch_size, args.lives - batch * args.batch_size)
+            tasks.append((key, params, model, lives, args.years, next(seeds)))
+
+    batches: Dict[int, List] = {key: [] for key in range(len(grid))}
+    with multiprocessing.Pool(args.processes) as pool:
+        for key, result in pool.imap_unordered(_run_task, tasks):
+            batches[key].append(result)
+
+    return [{'difficulty': difficulty.value, 'params': asdict(params), **summarize(batches[key])}
+            for key, (difficulty, params) in enumerate(grid)]
+
+def print_results(results: List[Dict]) -> None:
+    print(f"{'difficulty':12} {'base':>4} {'weights':>8} {'mult':>5} {'aging':>5} | "
+          f"{'stress mean':>11} {'p5/p50/p95':>12} {'>=' + str(HIGH_STRESS):>6} | "
+          f"{'trait sd':>8} {'p5/p50/p95':>12} {'bounds':>6} | {'memories by permanence':>24}")
+    for result in results:
+        params, stress, trait_stats = result['params'], result['stress'], result['traits']
+        weights = ','.join(str(w) for w in params['stress_weights'])
+        memories = '/'.join(f"{count:.1f}" for count in result['memories_by_permanence'])
+        print(f"{result['difficulty']:12} {params['weight_base']:4} {weights:>8} {params['multiplier']:5.2f} "
+              f"{params['aging_chance']:5.2f} | "
+              f"{stress['mean']:11.1f} {stress['p5']:4.0f}/{stress['p50']:3.0f}/{stress['p95']:3.0f} "
+              f"{result['high_stress_share']:6.1%} | "
+              f"{trait_stats['sd']:8.1f} {trait_stats['p5']:4.0f}/{trait_stats['p50']:3.0f}/{trait_stats['p95']:3.0f} "
+              f"{result['traits_at_bounds_share']:6.1%} | {memories:>24}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte-Carlo simulation of trait and stress dynamics")
+    parser.add_argument('--lives', type=int, default=10000, help="Lives per parameter combination and difficulty")
+    parser.add_argument('--years', type=int, default=4)
+    parser.add_argument('--difficulty', nargs='+', default=[d.value for d in Difficulty],
+                        choices=[d.value for d in Difficulty])
+    parser.add_argument('--seed', type=int, default=18)
+    parser.add_argument('--processes', type=int, default=os.cpu_count())
+    parser.add_argument('--batch-size', type=int, default=2500, help="Lives simulated together by one process")
+
+    rules = parser.add_argument_group('rule parameters (comma-separated values are swept)')
+    rules.add_argument('--weight-base', default=str(traits.TRAIT_WEIGHT_BASE),
+                       help="Old trait value weight is this minus importance and permanence")
+    rules.add_argument('--stress-weights', nargs='+', default=[','.join(map(str, traits.STRESS_WEIGHTS))],
+                       help="current,story,trait stress weights; give several to sweep them")
+    rules.add_argument('--multiplier', action='append', default=[], metavar='DIFFICULTY=VALUES',
+                       help="Trait stress multiplier for a difficulty, e.g. Challenging=1.5,2")
+    rules.add_argument('--aging-chance', default=str(traits.MEMORY_AGING_CHANCE),
+                       help="Chance per season that an importance-2, permanence-2 memory fades")
+
+    outcomes = parser.add_argument_group('sampled memory outcomes')
+    outcomes.add_argument('--importance-p', default=','.join(map(str, OutcomeModel.importance_p)),
+                          help="Probabilities of importance 1,2,3")
+    outcomes.add_argument('--permanence-p', default=','.join(map(str, OutcomeModel.permanence_p)),
+                          help="Probabilities of permanence 1,2,3")
+    outcomes.add_argument('--trait-drift', type=float, default=OutcomeModel.trait_drift,
+                          help="Mean difference between the calculated and current value of an analyzed trait")
+    outcomes.add_argument('--trait-sd', type=float, default=OutcomeModel.trait_sd)
+    outcomes.add_argument('--story-stress-mean', type=float, default=OutcomeModel.story_stress_mean)
+    outcomes.add_argument('--story-stress-sd', type=float, default=OutcomeModel.story_stress_sd)
+
+    parser.add_argument('--output', help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    results = run(args)
+    elapsed = time.perf_counter() - start
+
+    print_results(results)
+    print(f"\n{len(results)} combinations x {args.lives} lives x {args.years} years in {elapsed:.1f}s")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+# ./serve.py
+"""
+Production server: gunicorn with the app preloaded in the master process.
+
+    python serve.py
+
+Workers, threads and timeouts come from the SERVER_* settings in config.py.
+Run `flask --app app init-db` once before starting. Linux/macOS only
+(gunicorn does not run on Windows; use `python app.py` there).
+"""
+
+import logging
+import os
+
+from gunicorn.app.base import BaseApplication
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+def post_fork(server, worker):
+    """Give each worker its own Mongo pool and warm it before taking requests, then start its background threads"""
+    from models import db
+    from models.game import story_ai_cache, life_reaper, story_archive, story_pipeline
+    from monitoring import metrics
+
+    db.reset_client()
+    try:
+        db.get_client().admin.command('ping')
+    except Exception as e:
+        logger.error(f"Worker {worker.pid} could not reach MongoDB: {str(e)}")
+    story_ai_cache.get_response_cache()
+    metrics.start_push_thread()
+    story_pipeline.start_queue_filler()
+    story_archive.start_archiver()
+    life_reaper.start_reaper()
+
+def worker_exit(server, worker):
+    """Let background jobs and in-flight LLM calls finish, then flush buffered telemetry and logs"""
+    from models import jobs
+    from models.game import story_ai_utils
+    from monitoring import llm_telemetry, logging_setup
+
+    if not jobs.wait_for_jobs(Config.SERVER_GRACEFUL_TIMEOUT):
+        logger.warning(f"Worker {worker.pid} exiting with background jobs still running")
+    if not story_ai_utils.wait_for_llm_calls(Config.SERVER_GRACEFUL_TIMEOUT):
+        logger.warning(f"Worker {worker.pid} exiting with LLM calls still in progress")
+    llm_telemetry.close()
+    logging_setup.stop_logging()
+
+def child_exit(server, worker):
+    """Drop a dead worker's live gauges from the shared metrics directory"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
+
+def server_options() -> dict:
+    return {
+        'bind': Config.SERVER_BIND,
+        'workers': Config.SERVER_WORKERS,
+        'worker_class': Config.SERVER_WORKER_CLASS,
+        'threads': Config.SERVER_THREADS,
+        'worker_connections': Config.SERVER_WORKER_CONNECTIONS,
+        'timeout': Config.SERVER_TIMEOUT,
+        'graceful_timeout': Config.SERVER_GRACEFUL_TIMEOUT,
+        'keepalive': Config.SERVER_KEEPALIVE,
+        'preload_app': True,
+        'post_fork': post_fork,
+        'worker_exit': worker_exit,
+        'child_exit': child_exit
+    }
+
+class LifeByMeServer(BaseApplication):
+    def __init__(self, options: dict):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        from app import create_app
+
+        app = create_app()
+        app.debug = False
+        # Import openai once in the master so workers share it instead of each
+        # paying for the import on their first story request
+        import openai  # noqa: F401
+        return app
+
+if __name__ == '__main__':
+    LifeByMeServer(server_options()).run()
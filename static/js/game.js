@@ -49,12 +49,9 @@ function initializePanels() {
             if (panel) {
                 panel.classList.add('active');
                 overlay.classList.add('active');
-                
-                switch (button.dataset.panel) {
-                    case 'traits': loadTraits(); break;
-                    case 'memories': loadMemories(); break;
-                    case 'characters': loadCharacters(); break;
-                }
+
+                // Panels are rendered from the page's game state; only retry if that failed
+                if (!gameStateRequest) loadGameState();
             }
         });
     });
@@ -174,6 +171,7 @@ document.addEventListener('DOMContentLoaded', () => {
     initializeStoryScroll();
     initializeCustomizeForm();
     initializePanels();
+    loadGameState();
     initializeStoryControls();
     initializeStoryManagement();
     StoryCustomization.initialize();
@@ -255,130 +253,123 @@ async function handleStoryChoice(optionButton) {
 }
 
 // Panel content loading functions
-async function loadTraits() {
-    const panel = document.querySelector('#traits-panel');
-    const loading = panel.querySelector('.loading-placeholder');
-    const traitsList = panel.querySelector('.traits-list');
 
-    try {
-        const response = await fetch('/game/traits', {
+// Traits, memories and characters all come from one /game/state request made
+// when the page loads; they only change when a memory is made, which reloads the
+// page. Opening a panel shows what was rendered; the browser revalidates with the ETag.
+let gameStateRequest = null;
+
+function fetchGameState() {
+    if (!gameStateRequest) {
+        gameStateRequest = fetch('/game/state', {
+            cache: 'no-cache',
             headers: {
                 'X-CSRFToken': CSRFToken.getToken()
             }
+        }).then(response => {
+            if (!response.ok) throw new Error('Failed to load game state');
+            return response.json();
+        }).catch(error => {
+            // Let the next panel click retry
+            gameStateRequest = null;
+            throw error;
         });
-        
-        if (!response.ok) throw new Error('Failed to load traits');
-        
-        const data = await response.json();
-        
-        if (data.traits.length === 0) {
-            traitsList.innerHTML = '<div class="empty-state">No secondary traits developed yet.</div>';
-        } else {
-            traitsList.innerHTML = data.traits.map(trait => `
-                <div class="trait-item">
-                    <span class="trait-name">${trait.name}</span>
-                    <span class="trait-value ${trait.value > 0 ? 'positive' : 'negative'}">${trait.value > 0 ? '+' : ''}${trait.value}</span>
-                </div>
-            `).join('');
-        }
-        
-        loading.style.display = 'none';
-        traitsList.style.display = 'flex';
-        
+    }
+    return gameStateRequest;
+}
+
+async function loadGameState() {
+    try {
+        const data = await fetchGameState();
+        renderTraits(data.traits);
+        renderMemories(data.memories);
+        renderCharacters(data.characters);
     } catch (error) {
-        console.error('Error loading traits:', error);
-        loading.textContent = 'Error loading traits. Please try again.';
+        console.error('Error loading game state:', error);
+        document.querySelectorAll('.slide-panel .loading-placeholder').forEach(loading => {
+            loading.textContent = 'Error loading. Please try again.';
+        });
     }
 }
 
-async function loadMemories() {
+function showPanelList(panel, list, display) {
+    panel.querySelector('.loading-placeholder').style.display = 'none';
+    list.style.display = display;
+}
+
+function renderTraits(traits) {
+    const panel = document.querySelector('#traits-panel');
+    if (!panel) return;
+    const traitsList = panel.querySelector('.traits-list');
+
+    if (traits.length === 0) {
+        traitsList.innerHTML = '<div class="empty-state">No secondary traits developed yet.</div>';
+    } else {
+        traitsList.innerHTML = traits.map(trait => `
+            <div class="trait-item">
+                <span class="trait-name">${trait.name}</span>
+                <span class="trait-value ${trait.value > 0 ? 'positive' : 'negative'}">${trait.value > 0 ? '+' : ''}${trait.value}</span>
+            </div>
+        `).join('');
+    }
+
+    showPanelList(panel, traitsList, 'flex');
+}
+
+function renderMemories(memories) {
     const panel = document.querySelector('#memories-panel');
-    const loading = panel.querySelector('.loading-placeholder');
+    if (!panel) return;
     const memoriesList = panel.querySelector('.memories-list');
 
-    try {
-        const response = await fetch('/game/memories', {
-            headers: {
-                'X-CSRFToken': CSRFToken.getToken()
-            }
-        });
-        
-        if (!response.ok) throw new Error('Failed to load memories');
-        
-        const data = await response.json();
-        
-        if (data.memories.length === 0) {
-            memoriesList.innerHTML = '<div class="empty-state">No memories yet.</div>';
-        } else {
-            memoriesList.innerHTML = data.memories.map(memory => `
-                <div class="memory-item" onclick="window.location.href='/game/memory/${memory.id}'">
-                    <div class="memory-header">
-                        <span class="memory-title"><a href="/game/memory/${memory.id}">${memory.title}</a></span>
-                        <span class="memory-importance">Importance: ${memory.importance}</span>
-                    </div>
-                    <div class="memory-details">
-                        <div class="memory-tags">
-                            ${memory.emotional_tags.map(tag => 
-                                `<span class="memory-tag">${tag}</span>`
-                            ).join('')}
-                        </div>
-                        <span class="memory-age">Age ${memory.age_experienced}</span>
+    if (memories.length === 0) {
+        memoriesList.innerHTML = '<div class="empty-state">No memories yet.</div>';
+    } else {
+        memoriesList.innerHTML = memories.map(memory => `
+            <div class="memory-item" onclick="window.location.href='/game/memory/${memory.id}'">
+                <div class="memory-header">
+                    <span class="memory-title"><a href="/game/memory/${memory.id}">${memory.title}</a></span>
+                    <span class="memory-importance">Importance: ${memory.importance}</span>
+                </div>
+                <div class="memory-details">
+                    <div class="memory-tags">
+                        ${memory.emotional_tags.map(tag => 
+                            `<span class="memory-tag">${tag}</span>`
+                        ).join('')}
                     </div>
+                    <span class="memory-age">Age ${memory.age_experienced}</span>
                 </div>
-            `).join('');
-        }
-        
-        loading.style.display = 'none';
-        memoriesList.style.display = 'flex';
-        
-    } catch (error) {
-        console.error('Error loading memories:', error);
-        loading.textContent = 'Error loading memories. Please try again.';
+            </div>
+        `).join('');
     }
+
+    showPanelList(panel, memoriesList, 'flex');
 }
 
-async function loadCharacters() {
+function renderCharacters(characters) {
     const panel = document.querySelector('#characters-panel');
-    const loading = panel.querySelector('.loading-placeholder');
+    if (!panel) return;
     const charactersList = panel.querySelector('.characters-list');
 
-    try {
-        const response = await fetch('/game/characters', {
-            headers: {
-                'X-CSRFToken': CSRFToken.getToken()
-            }
-        });
-        
-        if (!response.ok) throw new Error('Failed to load characters');
-        
-        const data = await response.json();
-        
-        if (data.characters.length === 0) {
-            charactersList.innerHTML = '<div class="empty-state">No characters found.</div>';
-        } else {
-            // Sort characters alphabetically
-            data.characters.sort((a, b) => a.name.localeCompare(b.name));
-            
-            charactersList.innerHTML = data.characters.map(character => `
-                <div class="character-item" onclick="window.location.href='/game/character/${character.id}'">
-                    <div class="character-item-info">
-                        <div class="character-item-name"><a href="/game/character/${character.id}">${character.name}</a></div>
-                        <div class="character-item-details">
-                            <span class="character-item-age">Age ${character.age}</span> • 
-                            <span class="character-item-relationship">${character.relationship_type}</span>
-                        </div>
+    if (characters.length === 0) {
+        charactersList.innerHTML = '<div class="empty-state">No characters found.</div>';
+    } else {
+        // Sort characters alphabetically
+        const sorted = [...characters].sort((a, b) => a.name.localeCompare(b.name));
+
+        charactersList.innerHTML = sorted.map(character => `
+            <div class="character-item" onclick="window.location.href='/game/character/${character.id}'">
+                <div class="character-item-info">
+                    <div class="character-item-name"><a href="/game/character/${character.id}">${character.name}</a></div>
+                    <div class="character-item-details">
+                        <span class="character-item-age">Age ${character.age}</span> • 
+                        <span class="character-item-relationship">${character.relationship_type}</span>
                     </div>
                 </div>
-            `).join('');
-        }
-        
-        loading.style.display = 'none';
-        charactersList.style.display = 'block';  // Changed from 'flex' to 'block'
-        
-    } catch (error) {
-        console.error('Error loading characters:', error);
-        loading.textContent = 'Error loading characters. Please try again.';
+            </div>
+        `).join('');
     }
+
+    showPanelList(panel, charactersList, 'block');
 }
 
 async function handleNewStory() {
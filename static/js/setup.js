@@ -0,0 +1,59 @@
+// Polls the setup of a new life and opens the game when it is ready
+document.addEventListener('DOMContentLoaded', () => {
+    const container = document.getElementById('lifeSetup');
+    if (!container) return;
+
+    const progress = document.getElementById('setupProgress');
+    const stage = document.getElementById('setupStage');
+    const errorBox = document.getElementById('setupError');
+    const retryButton = document.getElementById('retrySetup');
+    const pollInterval = 1500;  // ms
+
+    const stageText = {
+        'Cast': stage.textContent,
+        'Story': 'Writing your first day at Quillington High...'
+    };
+
+    async function pollStatus() {
+        try {
+            const response = await fetch(container.dataset.statusUrl, { cache: 'no-store' });
+            if (!response.ok) throw new Error('Failed to load setup status');
+
+            const data = await response.json();
+            if (data.redirect) {
+                window.location.href = data.redirect;
+                return;
+            }
+            if (data.status === 'Failed') {
+                progress.style.display = 'none';
+                errorBox.style.display = 'block';
+                return;
+            }
+            stage.textContent = stageText[data.status] || stage.textContent;
+        } catch (error) {
+            console.error('Error checking setup status:', error);
+        }
+        setTimeout(pollStatus, pollInterval);
+    }
+
+    retryButton.addEventListener('click', async () => {
+        retryButton.disabled = true;
+        try {
+            const response = await fetch(container.dataset.retryUrl, {
+                method: 'POST',
+                headers: CSRFToken.addTokenToHeaders()
+            });
+            if (!response.ok) throw new Error('Failed to restart setup');
+
+            errorBox.style.display = 'none';
+            progress.style.display = 'block';
+            pollStatus();
+        } catch (error) {
+            console.error('Error restarting setup:', error);
+        } finally {
+            retryButton.disabled = false;
+        }
+    });
+
+    pollStatus();
+});
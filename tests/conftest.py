@@ -0,0 +1,14 @@
+# ./tests/conftest.py
+
+import mongomock
+import pytest
+
+from models import db
+
+@pytest.fixture(autouse=True)
+def mongo(monkeypatch):
+    """An empty in-memory database for each test"""
+    monkeypatch.setattr(db, 'MongoClient', mongomock.MongoClient)
+    db.reset_client()
+    yield db.get_db()
+    db.reset_client()
@@ -0,0 +1,56 @@
+# ./tests/test_life.py
+
+from bson import ObjectId
+
+from models.game import life as life_module
+from models.game.enums import Difficulty, Intensity, LifeStage
+from models.game.life import Life, lives
+
+def new_life() -> Life:
+    return Life(
+        user_id=ObjectId(),
+        name='Sam',
+        age=16,
+        gender='Female',
+        custom_gender=None,
+        intensity=Intensity.MODERATE,
+        difficulty=Difficulty.BALANCED,
+        custom_directions=None,
+        life_stage=LifeStage.HIGH_SCHOOL,
+        current_employment=None,
+        primary_traits=Life.generate_random_primary_traits(),
+        secondary_traits=[]
+    )
+
+def test_new_life_is_inserted_then_updated():
+    life = new_life()
+    assert life.save()
+    assert life.save()
+    assert lives.find_one({'_id': life._id})['version'] == 2
+
+def test_save_does_not_recreate_a_reaped_life():
+    life = new_life()
+    life.save()
+    lives.delete_one({'_id': life._id})
+    assert not life.save()
+    assert lives.count_documents({}) == 0
+
+def test_save_does_not_recreate_a_reaped_legacy_life():
+    # Lives written before versioning have no version field and load as version 0
+    life = new_life()
+    life.save()
+    lives.update_one({'_id': life._id}, {'$unset': {'version': ''}})
+    life_module._life_cache.clear()
+    loaded = Life.get_by_id(life._id)
+    assert loaded.version == 0
+
+    lives.delete_one({'_id': life._id})
+    assert not loaded.save()
+    assert lives.count_documents({}) == 0
+
+def test_save_does_not_resurrect_a_deleted_life():
+    life = new_life()
+    life.save()
+    lives.update_one({'_id': life._id}, {'$set': {'deleted_at': life.created_at}})
+    assert not life.save()
+    assert lives.find_one({'_id': life._id})['deleted_at'] is not None
@@ -0,0 +1,46 @@
+# ./tests/test_request_timing.py
+
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from monitoring import request_timing
+from monitoring.request_timing import RequestStats
+
+def test_parallel_llm_calls_count_wall_time_once():
+    stats = RequestStats()
+    token = request_timing._current_stats.set(stats)
+
+    def call():
+        with request_timing.llm_timer():
+            time.sleep(0.2)
+
+    try:
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = [executor.submit(contextvars.copy_context().run, call) for _ in range(4)]
+            for future in futures:
+                future.result()
+    finally:
+        request_timing._current_stats.reset(token)
+
+    breakdown = stats.breakdown()
+    assert stats.llm_calls == 4
+    assert 0.2 <= breakdown['llm'] < 0.4
+    assert breakdown['llm'] <= breakdown['total']
+    assert breakdown['python'] >= 0
+
+def test_db_commands_from_many_threads_are_all_counted():
+    stats = RequestStats()
+
+    def commands():
+        for _ in range(1000):
+            stats.db_started('lives')
+            stats.db_finished()
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        for future in [executor.submit(commands) for _ in range(8)]:
+            future.result()
+
+    assert stats.db_commands == 8000
+    assert stats.collections['lives'] == 8000
+    assert stats.db_time <= stats.total_time
@@ -0,0 +1,70 @@
+# ./tests/test_session.py
+
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+from flask import Flask, session
+
+import models.session as session_module
+from config import Config
+from models.session import Session
+from routes.auth_decorator import get_db_session
+
+class FakeClock(datetime):
+    """datetime whose utcnow() is set by the test"""
+    now = datetime(2024, 1, 1)
+
+    @classmethod
+    def utcnow(cls):
+        return cls.now
+
+@pytest.fixture(autouse=True)
+def signed_sessions(monkeypatch):
+    monkeypatch.setattr(Config, 'SESSION_BACKEND', 'signed')
+    monkeypatch.setattr(Config, 'SESSION_LIFETIME', timedelta(minutes=30))
+    monkeypatch.setattr(Config, 'SESSION_TOUCH_INTERVAL', timedelta(minutes=5))
+    monkeypatch.setattr(session_module, 'datetime', FakeClock)
+    monkeypatch.setattr(session_module, 'revocations', session_module.RevocationList())
+    FakeClock.now = datetime(2024, 1, 1)
+
+def test_active_signed_session_outlives_its_first_expiry():
+    token = first_token = Session.create('sid', ObjectId(), '127.0.0.1').token
+
+    # An hour of requests ten minutes apart, twice the session lifetime
+    for _ in range(6):
+        FakeClock.now += timedelta(minutes=10)
+        current = Session.get_by_session_id(token)
+        assert current is not None
+        token = current.token
+
+    assert Session.get_by_session_id(first_token) is None
+
+def test_idle_signed_session_expires():
+    token = Session.create('sid', ObjectId(), '127.0.0.1').token
+    FakeClock.now += Config.SESSION_LIFETIME + timedelta(seconds=1)
+    assert Session.get_by_session_id(token) is None
+
+def test_extended_token_is_written_to_the_cookie():
+    token = Session.create('sid', ObjectId(), '127.0.0.1').token
+    app = Flask(__name__)
+    app.secret_key = 'test'
+
+    FakeClock.now += timedelta(minutes=1)
+    with app.test_request_context():
+        session['session_id'] = token
+        assert get_db_session() is not None
+        assert session['session_id'] == token
+
+    FakeClock.now += timedelta(minutes=10)
+    with app.test_request_context():
+        session['session_id'] = token
+        assert get_db_session() is not None
+        assert session['session_id'] != token
+
+def test_revoked_session_is_not_extended():
+    user_id = ObjectId()
+    token = Session.create('sid', user_id, '127.0.0.1').token
+    FakeClock.now += timedelta(minutes=10)
+    Session.create('sid2', user_id, '127.0.0.1')
+    assert Session.get_by_session_id(token) is None